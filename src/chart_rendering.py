@@ -0,0 +1,188 @@
+"""
+Рендеринг графиков анализа продаж в пуле процессов
+
+Агрегаты считаются заранее (см. CoffeeAnalysis) и передаются в процессы
+как задания (вид графика, данные, путь, DPI). Каждый процесс рисует через
+объектный API matplotlib на бэкенде Agg, поэтому графики строятся
+параллельно и не зависят от GUI-бэкенда основного процесса.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# DPI итоговых графиков и черновиков для предпросмотра
+CHART_DPI = 300
+DRAFT_DPI = 72
+
+# Задание рендеринга: (вид графика, данные, путь к файлу, DPI)
+ChartJob = Tuple[str, Any, str, int]
+
+
+def _init_worker():
+    """Инициализация процесса пула: только неинтерактивный бэкенд"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _chart_style():
+    """Контекст стилей графиков (seaborn-v0_8 + палитра husl)"""
+    import matplotlib.style
+    import seaborn as sns
+    from cycler import cycler
+
+    return matplotlib.style.context([
+        'seaborn-v0_8',
+        {'axes.prop_cycle': cycler(color=sns.color_palette("husl"))},
+    ])
+
+
+def _save_figure(figsize, draw: Callable, path: str, dpi: int):
+    """Создание фигуры, отрисовка и сохранение без использования pyplot"""
+    from matplotlib.figure import Figure
+
+    with _chart_style():
+        fig = Figure(figsize=figsize)
+        ax = fig.add_subplot()
+        draw(ax)
+        fig.tight_layout()
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+
+
+def _render_store_sales(values, path: str, dpi: int):
+    """Продажи по магазинам"""
+    def draw(ax):
+        values.plot(kind='bar', ax=ax)
+        ax.set_title('Продажи по магазинам', fontsize=16, fontweight='bold')
+        ax.set_xlabel('Магазин')
+        ax.set_ylabel('Общая сумма продаж')
+        ax.tick_params(axis='x', labelrotation=45)
+
+    _save_figure((12, 8), draw, path, dpi)
+
+
+def _render_top_products(values, path: str, dpi: int):
+    """Топ товары"""
+    def draw(ax):
+        values.plot(kind='barh', ax=ax)
+        ax.set_title(f'Топ-{len(values)} товаров по продажам', fontsize=16, fontweight='bold')
+        ax.set_xlabel('Общая сумма продаж')
+        ax.set_ylabel('Товар')
+
+    _save_figure((14, 8), draw, path, dpi)
+
+
+def _render_monthly_sales(values, path: str, dpi: int):
+    """Продажи по месяцам"""
+    def draw(ax):
+        values.plot(kind='line', marker='o', ax=ax)
+        ax.set_title('Продажи по месяцам', fontsize=16, fontweight='bold')
+        ax.set_xlabel('Месяц')
+        ax.set_ylabel('Общая сумма продаж')
+        ax.grid(True, alpha=0.3)
+
+    _save_figure((12, 6), draw, path, dpi)
+
+
+def _render_dashboard(data: Dict[str, Any], path: str, dpi: int):
+    """Интерактивный дашборд Plotly (DPI не используется)"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=('Продажи по магазинам', 'Топ товары',
+                        'Продажи по месяцам', 'Распределение по группам товаров'),
+        specs=[[{"type": "bar"}, {"type": "bar"}],
+               [{"type": "scatter"}, {"type": "pie"}]]
+    )
+
+    store_sales = data['store_sales']
+    fig.add_trace(
+        go.Bar(x=store_sales.index.get_level_values('STORE_NAME'),
+               y=store_sales.values,
+               name='Продажи по магазинам'),
+        row=1, col=1
+    )
+
+    product_sales = data['product_sales']
+    fig.add_trace(
+        go.Bar(x=product_sales.values,
+               y=product_sales.index.get_level_values('GOOD_NAME'),
+               orientation='h',
+               name='Топ товары'),
+        row=1, col=2
+    )
+
+    monthly_sales = data['monthly_sales']
+    fig.add_trace(
+        go.Scatter(x=monthly_sales.index,
+                   y=monthly_sales.values,
+                   mode='lines+markers',
+                   name='Продажи по месяцам'),
+        row=2, col=1
+    )
+
+    group_sales = data['group_sales']
+    fig.add_trace(
+        go.Pie(labels=group_sales.index,
+               values=group_sales.values,
+               name='Группы товаров'),
+        row=2, col=2
+    )
+
+    fig.update_layout(
+        title_text="Дашборд продаж кофе",
+        showlegend=False,
+        height=800
+    )
+    fig.write_html(path)
+
+
+RENDERERS: Dict[str, Callable] = {
+    'store_sales': _render_store_sales,
+    'top_products': _render_top_products,
+    'monthly_sales': _render_monthly_sales,
+    'dashboard': _render_dashboard,
+}
+
+
+def render_chart(kind: str, data: Any, path: str, dpi: int = CHART_DPI) -> str:
+    """
+    Рендеринг одного графика (выполняется в процессе пула)
+
+    Args:
+        kind: Вид графика (ключ RENDERERS)
+        data: Предрасчитанные агрегаты для графика
+        path: Путь к файлу
+        dpi: Разрешение PNG
+
+    Returns:
+        str: Путь к сохраненному файлу
+    """
+    if kind not in RENDERERS:
+        raise ValueError(f"Неизвестный вид графика: {kind}")
+    RENDERERS[kind](data, path, dpi)
+    return path
+
+
+def render_charts(jobs: List[ChartJob], max_workers: Optional[int] = None) -> List[str]:
+    """
+    Параллельный рендеринг графиков в пуле процессов
+
+    Args:
+        jobs: Задания (вид, данные, путь, DPI)
+        max_workers: Размер пула (None - по числу заданий и ядер, 1 - в текущем процессе)
+
+    Returns:
+        List[str]: Пути к файлам в порядке заданий
+    """
+    if not jobs:
+        return []
+
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) == 1:
+        return [render_chart(*job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(render_chart, *job) for job in jobs]
+        return [future.result() for future in futures]
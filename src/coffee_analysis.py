@@ -2,21 +2,29 @@
 Модуль для анализа продаж кофе
 """
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 import os
-from typing import List, Dict, Any, Optional
-from .database_connector import DatabaseConnector
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+from .chart_rendering import CHART_DPI, DRAFT_DPI, ChartJob, render_charts
+
+if TYPE_CHECKING:
+    from .database_connector import DatabaseConnector
+
+# matplotlib/seaborn/plotly загружаются только при построении графиков
+# (в процессах chart_rendering), поэтому импорт модуля и загрузка данных
+# не тянут библиотеки визуализации.
 
 
 class CoffeeAnalysis:
     """Класс для анализа продаж кофе"""
     
-    def __init__(self, db_connector: DatabaseConnector):
+    # Измерения куба продаж (гранулярность: магазин, товар, группа, день)
+    CUBE_DIMENSIONS = ['STORE_ID', 'STORE_NAME', 'GODSID', 'GOOD_NAME', 'GROUP_NAME', 'DAY']
+    # Строковые измерения хранятся как category - куб компактен в памяти и на диске
+    CUBE_CATEGORICAL = ['STORE_NAME', 'GOOD_NAME', 'GROUP_NAME']
+    
+    def __init__(self, db_connector: "DatabaseConnector"):
         """
         Инициализация анализатора
         
@@ -27,10 +35,7 @@ class CoffeeAnalysis:
         self.sales_data = None
         self.coffee_products = None
         self.stores_info = None
-        
-        # Настройка стилей для графиков
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
+        self._cube = None
         
     def load_data(self, 
                   store_ids: Optional[List[int]] = None,
@@ -46,9 +51,9 @@ class CoffeeAnalysis:
         """
         print("Загрузка данных...")
         
-        # Загружаем данные о продажах
-        self.sales_data = self.db.get_sales_data(store_ids, start_date, end_date)
-        print(f"УСПЕХ: Загружено {len(self.sales_data)} записей о продажах")
+        # Загружаем продажи кофе (фильтр по группам товаров выполняется в SQL)
+        self.sales_data = self.db.get_coffee_sales_data(store_ids, start_date, end_date)
+        print(f"УСПЕХ: Загружено {len(self.sales_data)} продаж кофе")
         
         # Загружаем информацию о товарах с кофе
         self.coffee_products = self.db.get_coffee_products()
@@ -58,16 +63,90 @@ class CoffeeAnalysis:
         self.stores_info = self.db.get_stores_info()
         print(f"УСПЕХ: Загружено {len(self.stores_info)} магазинов")
         
-        # Фильтруем продажи только по товарам с кофе
-        coffee_ids = self.coffee_products['ID'].tolist()
-        self.sales_data = self.sales_data[self.sales_data['GODSID'].isin(coffee_ids)]
-        print(f"УСПЕХ: Отфильтровано {len(self.sales_data)} продаж кофе")
+        # Преобразуем даты (один разбор колонки, производные поля - векторно)
+        order_date = pd.to_datetime(self.sales_data['ORDER_DATE'])
+        self.sales_data = self.sales_data.assign(
+            ORDER_DATE=order_date,
+            YEAR=order_date.dt.year,
+            MONTH=order_date.dt.month,
+            QUARTER=order_date.dt.quarter,
+        )
+        # Куб строится заново по новым данным при первом обращении
+        self._cube = None
+        
+    def build_cube(self) -> pd.DataFrame:
+        """
+        Построение куба продаж по загруженным данным
+        
+        Куб - колоночная таблица с гранулярностью (магазин, товар, группа, день)
+        и мерами TOTAL_SUM, QUANTITY, PRICE_SUM (суммы) и LINES (число строк продаж).
+        Все разрезы анализа считаются свертками куба, а не исходных строк.
+        
+        Returns:
+            pd.DataFrame: Куб продаж
+        """
+        if self.sales_data is None:
+            raise Exception("Данные не загружены. Вызовите load_data() сначала.")
+        
+        data = self.sales_data
+        keys = [data[column] for column in self.CUBE_DIMENSIONS[:-1]]
+        keys.append(data['ORDER_DATE'].dt.normalize().rename('DAY'))
+        
+        # dropna=False: строки без магазина/группы (LEFT JOIN) остаются в мерах куба
+        cube = data.groupby(keys, dropna=False, sort=False).agg(
+            TOTAL_SUM=('TOTAL_SUM', 'sum'),
+            QUANTITY=('QUANTITY', 'sum'),
+            PRICE_SUM=('PRICE', 'sum'),
+            LINES=('TOTAL_SUM', 'size'),
+        ).reset_index()
         
-        # Преобразуем даты
-        self.sales_data['ORDER_DATE'] = pd.to_datetime(self.sales_data['ORDER_DATE'])
-        self.sales_data['YEAR'] = self.sales_data['ORDER_DATE'].dt.year
-        self.sales_data['MONTH'] = self.sales_data['ORDER_DATE'].dt.month
-        self.sales_data['QUARTER'] = self.sales_data['ORDER_DATE'].dt.quarter
+        for column in self.CUBE_CATEGORICAL:
+            cube[column] = cube[column].astype('category')
+        
+        self._cube = cube
+        return cube
+    
+    @property
+    def cube(self) -> pd.DataFrame:
+        """Куб продаж (строится лениво при первом обращении)"""
+        if self._cube is None:
+            self.build_cube()
+        return self._cube
+    
+    def save_cube(self, path: str):
+        """
+        Сохранение куба продаж для повторного использования в другой сессии
+        
+        Args:
+            path: Путь к файлу куба
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.cube.to_pickle(path)
+        print(f"Куб продаж сохранен: {path} ({len(self.cube)} строк)")
+    
+    def load_cube(self, path: str):
+        """
+        Загрузка ранее сохраненного куба (без запросов к БД)
+        
+        Файл должен быть создан save_cube() - формат pickle доверяет источнику.
+        
+        Args:
+            path: Путь к файлу куба
+        """
+        cube = pd.read_pickle(path)
+        missing = set(self.CUBE_DIMENSIONS) - set(cube.columns)
+        if missing:
+            raise ValueError(f"Файл {path} не является кубом продаж: нет колонок {sorted(missing)}")
+        self._cube = cube
+        print(f"Куб продаж загружен: {path} ({len(cube)} строк)")
+    
+    def _require_cube(self) -> pd.DataFrame:
+        """Куб для сверток; требует загруженных данных или сохраненного куба"""
+        if self._cube is None and self.sales_data is None:
+            raise Exception("Данные не загружены. Вызовите load_data() или load_cube() сначала.")
+        return self.cube
         
     def get_sales_summary(self) -> Dict[str, Any]:
         """
@@ -76,21 +155,22 @@ class CoffeeAnalysis:
         Returns:
             Dict: Сводка по продажам
         """
-        if self.sales_data is None:
-            raise Exception("Данные не загружены. Вызовите load_data() сначала.")
+        cube = self._require_cube()
         
+        total_sales = cube['TOTAL_SUM'].sum()
+        total_orders = cube['LINES'].sum()
         summary = {
-            'total_sales': self.sales_data['TOTAL_SUM'].sum(),
-            'total_quantity': self.sales_data['QUANTITY'].sum(),
-            'total_orders': len(self.sales_data),
-            'unique_products': self.sales_data['GODSID'].nunique(),
-            'unique_stores': self.sales_data['STORE_ID'].nunique(),
+            'total_sales': total_sales,
+            'total_quantity': cube['QUANTITY'].sum(),
+            'total_orders': int(total_orders),
+            'unique_products': cube['GODSID'].nunique(),
+            'unique_stores': cube['STORE_ID'].nunique(),
             'date_range': {
-                'start': self.sales_data['ORDER_DATE'].min(),
-                'end': self.sales_data['ORDER_DATE'].max()
+                'start': cube['DAY'].min(),
+                'end': cube['DAY'].max()
             },
-            'avg_order_value': self.sales_data['TOTAL_SUM'].mean(),
-            'avg_price': self.sales_data['PRICE'].mean()
+            'avg_order_value': total_sales / total_orders if total_orders else float('nan'),
+            'avg_price': cube['PRICE_SUM'].sum() / total_orders if total_orders else float('nan')
         }
         
         return summary
@@ -111,14 +191,13 @@ class CoffeeAnalysis:
         Returns:
             pd.DataFrame: Продажи по магазинам
         """
-        if self.sales_data is None:
-            raise Exception("Данные не загружены.")
+        cube = self._require_cube()
         
-        store_sales = self.sales_data.groupby(['STORE_ID', 'STORE_NAME']).agg({
+        store_sales = cube.groupby(['STORE_ID', 'STORE_NAME'], observed=True).agg({
             'TOTAL_SUM': 'sum',
             'QUANTITY': 'sum',
             'GODSID': 'nunique',
-            'ORDER_DATE': 'count'
+            'LINES': 'sum'
         }).round(2)
         
         store_sales.columns = ['Общая_сумма', 'Общее_количество', 'Уникальных_товаров', 'Количество_продаж']
@@ -136,13 +215,12 @@ class CoffeeAnalysis:
         Returns:
             pd.DataFrame: Продажи по товарам
         """
-        if self.sales_data is None:
-            raise Exception("Данные не загружены.")
+        cube = self._require_cube()
         
-        product_sales = self.sales_data.groupby(['GODSID', 'GOOD_NAME', 'GROUP_NAME']).agg({
+        product_sales = cube.groupby(['GODSID', 'GOOD_NAME', 'GROUP_NAME'], observed=True).agg({
             'TOTAL_SUM': 'sum',
             'QUANTITY': 'sum',
-            'ORDER_DATE': 'count'
+            'LINES': 'sum'
         }).round(2)
         
         product_sales.columns = ['Общая_сумма', 'Общее_количество', 'Количество_продаж']
@@ -160,9 +238,6 @@ class CoffeeAnalysis:
         Returns:
             pd.DataFrame: Продажи по периодам
         """
-        if self.sales_data is None:
-            raise Exception("Данные не загружены.")
-        
         if period == 'month':
             group_col = 'MONTH'
             period_name = 'Месяц'
@@ -175,10 +250,13 @@ class CoffeeAnalysis:
         else:
             raise ValueError("Период должен быть 'month', 'quarter' или 'year'")
         
-        time_sales = self.sales_data.groupby(group_col).agg({
+        cube = self._require_cube()
+        period_key = getattr(cube['DAY'].dt, period).rename(group_col)
+        
+        time_sales = cube.groupby(period_key).agg({
             'TOTAL_SUM': 'sum',
             'QUANTITY': 'sum',
-            'ORDER_DATE': 'count'
+            'LINES': 'sum'
         }).round(2)
         
         time_sales.columns = ['Общая_сумма', 'Общее_количество', 'Количество_продаж']
@@ -186,55 +264,44 @@ class CoffeeAnalysis:
         
         return time_sales
     
-    def create_sales_charts(self, output_dir: str = 'output'):
+    def _sales_chart_jobs(self, output_dir: str, dpi: int) -> List[ChartJob]:
+        """Задания рендеринга PNG-графиков по предрасчитанным сверткам куба"""
+        return [
+            ('store_sales', self.sales_by_store()['Общая_сумма'],
+             f'{output_dir}/sales_by_store.png', dpi),
+            ('top_products', self.sales_by_product(15)['Общая_сумма'],
+             f'{output_dir}/top_products.png', dpi),
+            ('monthly_sales', self.sales_by_time_period('month')['Общая_сумма'],
+             f'{output_dir}/sales_by_month.png', dpi),
+        ]
+    
+    def _dashboard_job(self, output_dir: str) -> ChartJob:
+        """Задание рендеринга интерактивного дашборда"""
+        cube = self._require_cube()
+        data = {
+            'store_sales': self.sales_by_store()['Общая_сумма'],
+            'product_sales': self.sales_by_product(10)['Общая_сумма'],
+            'monthly_sales': self.sales_by_time_period('month')['Общая_сумма'],
+            'group_sales': cube.groupby('GROUP_NAME', observed=True)['TOTAL_SUM'].sum(),
+        }
+        return ('dashboard', data, f'{output_dir}/coffee_dashboard.html', CHART_DPI)
+    
+    def create_sales_charts(self, output_dir: str = 'output', draft: bool = False,
+                            max_workers: Optional[int] = None):
         """
-        Создание графиков продаж
+        Создание графиков продаж (графики строятся параллельно в пуле процессов)
         
         Args:
             output_dir: Директория для сохранения графиков
+            draft: Черновой режим с низким DPI для предпросмотра
+            max_workers: Размер пула процессов (1 - рендеринг в текущем процессе)
         """
-        if self.sales_data is None:
-            raise Exception("Данные не загружены.")
+        self._require_cube()
         
         os.makedirs(output_dir, exist_ok=True)
+        dpi = DRAFT_DPI if draft else CHART_DPI
         
-        # 1. Продажи по магазинам
-        store_sales = self.sales_by_store()
-        
-        plt.figure(figsize=(12, 8))
-        store_sales['Общая_сумма'].plot(kind='bar')
-        plt.title('Продажи по магазинам', fontsize=16, fontweight='bold')
-        plt.xlabel('Магазин')
-        plt.ylabel('Общая сумма продаж')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/sales_by_store.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # 2. Топ товары
-        product_sales = self.sales_by_product(15)
-        
-        plt.figure(figsize=(14, 8))
-        product_sales['Общая_сумма'].plot(kind='barh')
-        plt.title('Топ-15 товаров по продажам', fontsize=16, fontweight='bold')
-        plt.xlabel('Общая сумма продаж')
-        plt.ylabel('Товар')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/top_products.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # 3. Продажи по месяцам
-        monthly_sales = self.sales_by_time_period('month')
-        
-        plt.figure(figsize=(12, 6))
-        monthly_sales['Общая_сумма'].plot(kind='line', marker='o')
-        plt.title('Продажи по месяцам', fontsize=16, fontweight='bold')
-        plt.xlabel('Месяц')
-        plt.ylabel('Общая сумма продаж')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/sales_by_month.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        render_charts(self._sales_chart_jobs(output_dir, dpi), max_workers=max_workers)
         
         print(f"Графики сохранены в директории {output_dir}")
     
@@ -245,67 +312,33 @@ class CoffeeAnalysis:
         Args:
             output_dir: Директория для сохранения дашборда
         """
-        if self.sales_data is None:
-            raise Exception("Данные не загружены.")
+        self._require_cube()
         
         os.makedirs(output_dir, exist_ok=True)
         
-        # Создаем подграфики
-        fig = make_subplots(
-            rows=2, cols=2,
-            subplot_titles=('Продажи по магазинам', 'Топ товары', 
-                          'Продажи по месяцам', 'Распределение по группам товаров'),
-            specs=[[{"type": "bar"}, {"type": "bar"}],
-                   [{"type": "scatter"}, {"type": "pie"}]]
-        )
-        
-        # 1. Продажи по магазинам
-        store_sales = self.sales_by_store()
-        fig.add_trace(
-            go.Bar(x=store_sales.index.get_level_values('STORE_NAME'), 
-                   y=store_sales['Общая_сумма'],
-                   name='Продажи по магазинам'),
-            row=1, col=1
-        )
-        
-        # 2. Топ товары
-        product_sales = self.sales_by_product(10)
-        fig.add_trace(
-            go.Bar(x=product_sales['Общая_сумма'],
-                   y=product_sales.index.get_level_values('GOOD_NAME'),
-                   orientation='h',
-                   name='Топ товары'),
-            row=1, col=2
-        )
+        render_charts([self._dashboard_job(output_dir)], max_workers=1)
+        print(f"Интерактивный дашборд сохранен: {output_dir}/coffee_dashboard.html")
+    
+    def render_reports(self, output_dir: str = 'output', draft: bool = False,
+                       max_workers: Optional[int] = None):
+        """
+        Построение всех графиков и дашборда одним параллельным проходом
         
-        # 3. Продажи по месяцам
-        monthly_sales = self.sales_by_time_period('month')
-        fig.add_trace(
-            go.Scatter(x=monthly_sales.index,
-                      y=monthly_sales['Общая_сумма'],
-                      mode='lines+markers',
-                      name='Продажи по месяцам'),
-            row=2, col=1
-        )
+        Args:
+            output_dir: Директория для сохранения
+            draft: Черновой режим с низким DPI для предпросмотра
+            max_workers: Размер пула процессов (1 - рендеринг в текущем процессе)
+        """
+        self._require_cube()
         
-        # 4. Распределение по группам товаров
-        group_sales = self.sales_data.groupby('GROUP_NAME')['TOTAL_SUM'].sum()
-        fig.add_trace(
-            go.Pie(labels=group_sales.index,
-                   values=group_sales.values,
-                   name='Группы товаров'),
-            row=2, col=2
-        )
+        os.makedirs(output_dir, exist_ok=True)
+        dpi = DRAFT_DPI if draft else CHART_DPI
         
-        fig.update_layout(
-            title_text="Дашборд продаж кофе",
-            showlegend=False,
-            height=800
-        )
+        jobs = self._sales_chart_jobs(output_dir, dpi)
+        jobs.append(self._dashboard_job(output_dir))
+        render_charts(jobs, max_workers=max_workers)
         
-        # Сохраняем как HTML
-        fig.write_html(f'{output_dir}/coffee_dashboard.html')
-        print(f"Интерактивный дашборд сохранен: {output_dir}/coffee_dashboard.html")
+        print(f"Графики и дашборд сохранены в директории {output_dir}")
     
     def export_to_excel(self, output_dir: str = 'output'):
         """
@@ -348,6 +381,8 @@ class CoffeeAnalysis:
 
 
 if __name__ == "__main__":
+    from .database_connector import DatabaseConnector
+    
     # Пример использования
     with DatabaseConnector() as db:
         if db.test_connection():
@@ -366,9 +401,8 @@ if __name__ == "__main__":
             for key, value in summary.items():
                 print(f"{key}: {value}")
             
-            # Создаем отчеты
-            analyzer.create_sales_charts()
-            analyzer.create_interactive_dashboard()
+            # Создаем отчеты (графики и дашборд строятся параллельно)
+            analyzer.render_reports()
             analyzer.export_to_excel()
             
             print("\n🎉 Анализ завершен!")
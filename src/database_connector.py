@@ -15,6 +15,14 @@ load_dotenv('config.env')
 class DatabaseConnector:
     """Класс для работы с базой данных Firebird"""
     
+    # Группы товаров (GOODS.OWNER) с кофе по типам напитка
+    COFFEE_GROUPS = {
+        'MonoCup': ('24435', '25539', '21671', '25546', '25775', '25777', '25789'),
+        'BlendCup': ('23076', '21882', '25767', '248882', '25788'),
+        'CaotinaCup': ('24491', '21385'),
+    }
+    COFFEE_GROUP_IDS = tuple(group_id for ids in COFFEE_GROUPS.values() for group_id in ids)
+    
     def __init__(self, db_path: Optional[str] = None, user: Optional[str] = None, password: Optional[str] = None):
         """
         Инициализация подключения к БД
@@ -221,7 +229,59 @@ class DatabaseConnector:
         if end_date is None:
             end_date = '2025-12-31'
         
-        query = """
+        query = self._sales_query(len(store_ids))
+        params = store_ids + [start_date, end_date]
+        return self.execute_query(query, params)
+    
+    def get_coffee_sales_data(self, 
+                              store_ids: Optional[List[int]] = None,
+                              start_date: Optional[str] = None,
+                              end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Получение продаж только по товарам с кофе
+        
+        В отличие от get_sales_data фильтр по группам кофе (GOODS.OWNER)
+        выполняется на сервере, а сортировка не запрашивается - клиенту
+        передаются только нужные строки.
+        
+        Args:
+            store_ids: Список ID магазинов
+            start_date: Начальная дата (YYYY-MM-DD)
+            end_date: Конечная дата (YYYY-MM-DD)
+            
+        Returns:
+            pd.DataFrame: Данные о продажах кофе (колонки как у get_sales_data)
+        """
+        if store_ids is None:
+            store_ids = [27, 43, 44, 46, 33, 45]  # Активные магазины
+        
+        if start_date is None:
+            start_date = '2018-01-01'
+            
+        if end_date is None:
+            end_date = '2025-12-31'
+        
+        query = self._sales_query(len(store_ids), group_ids=self.COFFEE_GROUP_IDS, ordered=False)
+        params = store_ids + [start_date, end_date]
+        return self.execute_query(query, params)
+    
+    @staticmethod
+    def _sql_list(values) -> str:
+        """Строковые ID групп как список для IN (...)"""
+        return ','.join("'{}'".format(value) for value in values)
+    
+    def _sales_query(self, store_count: int, group_ids=None, ordered: bool = True) -> str:
+        """
+        Запрос строк продаж для get_sales_data и get_coffee_sales_data
+        
+        Args:
+            store_count: Число магазинов (параметров в STORGRPID IN)
+            group_ids: Группы товаров (GOODS.OWNER); None - все товары
+            ordered: Сортировать ли строки по товару и дате
+        """
+        group_filter = "AND g.OWNER IN ({})".format(self._sql_list(group_ids)) if group_ids else ""
+        order_by = "ORDER BY g.NAME, sz.DAT_" if ordered else ""
+        return """
         SELECT 
             s.GODSID,
             g.NAME as GOOD_NAME,
@@ -237,14 +297,12 @@ class DatabaseConnector:
         JOIN GOODS g ON s.GODSID = g.ID
         LEFT JOIN STORGRP sg ON sz.STORGRPID = sg.ID
         LEFT JOIN GOODSGROUPS gg ON g.OWNER = gg.ID
-        WHERE sz.STORGRPID IN ({})
+        WHERE sz.STORGRPID IN ({stores})
         AND sz.CSDTKTHBID IN (1,2,3,5)
         AND sz.DAT_ >= ? AND sz.DAT_ <= ?
-        ORDER BY g.NAME, sz.DAT_
-        """.format(','.join(['?' for _ in store_ids]))
-        
-        params = store_ids + [start_date, end_date]
-        return self.execute_query(query, params)
+        {group_filter}
+        {order_by}
+        """.format(stores=','.join('?' * store_count), group_filter=group_filter, order_by=order_by)
     
     def get_coffee_products(self) -> pd.DataFrame:
         """
@@ -253,21 +311,21 @@ class DatabaseConnector:
         Returns:
             pd.DataFrame: Список товаров с кофе
         """
+        coffee_type = "\n".join(
+            "                   WHEN g.OWNER IN ({}) THEN '{}'".format(self._sql_list(ids), name)
+            for name, ids in self.COFFEE_GROUPS.items()
+        )
         query = """
         SELECT g.ID, g.NAME, g.OWNER, gg.NAME as GROUP_NAME,
                CASE 
-                   WHEN g.OWNER IN ('24435','25539','21671','25546','25775','25777','25789') THEN 'MonoCup'
-                   WHEN g.OWNER IN ('23076','21882','25767','248882','25788') THEN 'BlendCup'
-                   WHEN g.OWNER IN ('24491','21385') THEN 'CaotinaCup'
+{coffee_type}
                    ELSE 'Other'
                END as COFFEE_TYPE
         FROM GOODS g
         LEFT JOIN GOODSGROUPS gg ON g.OWNER = gg.ID
-        WHERE g.OWNER IN ('24435','25539','21671','25546','25775','25777','25789',
-                          '23076','21882','25767','248882','25788',
-                          '24491','21385')
+        WHERE g.OWNER IN ({groups})
         ORDER BY g.NAME
-        """
+        """.format(coffee_type=coffee_type, groups=self._sql_list(self.COFFEE_GROUP_IDS))
         return self.execute_query(query)
     
     def get_stores_info(self) -> pd.DataFrame:
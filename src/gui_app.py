@@ -3,18 +3,11 @@ GUI приложение для анализа продаж кофе
 """
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
 from datetime import datetime, timedelta
 import os
+import threading
+import time
 import traceback
-from .database_connector import DatabaseConnector
-from .remote_db_connector import RemoteDatabaseConnector
-from .proxy_api_connector import (
-    ProxyApiAuthError,
-    ProxyApiConnector,
-    ProxyApiError,
-    ProxyApiRateLimitError,
-)
 from .logger_config import setup_logger
 # from multi_line_treeview import MultiLineTreeview
 import re
@@ -22,6 +15,15 @@ import re
 # Настройка логирования
 logger = setup_logger("coffee_gui")
 
+# Тяжелые зависимости (pandas, fdb, requests) импортируются лениво:
+# коннектор - в момент выбора типа БД, pandas - при первой работе с данными.
+# Это держит холодный старт до первого окна коротким (см. tests/test_import_time.py).
+
+# Предзагруженный отчет старше этого (с момента загрузки) не используется - данные могли измениться
+PREFETCH_TTL = 300
+# Период опроса фонового потока предзагрузки из главного потока Tk, мс
+PREFETCH_POLL_MS = 100
+
 
 class CoffeeAnalysisGUI:
     """Главное окно приложения"""
@@ -40,7 +42,12 @@ class CoffeeAnalysisGUI:
         self.sales_data = None
         self.stores_data = None
         self.products_data = None
-        self.db_type = "local"  # Тип БД: "local" или "remote"
+        self.db_type = "local"  # Тип БД: "local", "remote" или "proxy"
+        
+        # Предзагрузка отчета по умолчанию (см. _start_report_prefetch)
+        self._prefetch = None
+        # Коннекторы не потокобезопасны: запросы из фона и из GUI идут по очереди
+        self._db_lock = threading.Lock()
         
         # Создаем интерфейс
         try:
@@ -233,6 +240,8 @@ class CoffeeAnalysisGUI:
         ttk.Label(params_frame, text="по:").grid(row=0, column=2, sticky=tk.W, padx=(0, 5))
         self.end_date_var = tk.StringVar(value=datetime.now().strftime('%Y-%m-%d'))
         ttk.Entry(params_frame, textvariable=self.end_date_var, width=12).grid(row=0, column=3, sticky=tk.W)
+        self.start_date_var.trace_add("write", self._on_report_params_changed)
+        self.end_date_var.trace_add("write", self._on_report_params_changed)
         
         # Группировка по времени
         ttk.Label(params_frame, text="Группировка:").grid(row=1, column=0, sticky=tk.W, padx=(0, 5), pady=(10, 0))
@@ -264,6 +273,11 @@ class CoffeeAnalysisGUI:
                                     command=self.export_to_excel, state="disabled")
         self.export_btn.grid(row=0, column=1)
         
+        # Индикатор: отчет взят из фоновой предзагрузки
+        self.cache_status_var = tk.StringVar(value="")
+        self.cache_status_label = ttk.Label(report_frame, textvariable=self.cache_status_var, foreground="green")
+        self.cache_status_label.grid(row=0, column=2, padx=(15, 0))
+        
     def create_display_style_section(self, parent, row):
         """Создание секции стиля отображения"""
         # Фрейм стиля отображения
@@ -342,12 +356,16 @@ class CoffeeAnalysisGUI:
         try:
             user = self.db_user_var.get()
             password = self.db_password_var.get()
-            
+            # Тип запоминаем сразу: по нему выбираются ветки работы с коннектором
+            self.db_type = db_type
+
             if db_type == "local":
                 # Подключение к локальной БД
                 db_path = self.db_path_var.get()
                 logger.info(f"Локальная БД: путь={db_path}, пользователь={user}")
                 
+                from .database_connector import DatabaseConnector
+                
                 self.db_connector = DatabaseConnector(
                     db_path=db_path,
                     user=user,
@@ -371,6 +389,8 @@ class CoffeeAnalysisGUI:
                 
                 logger.info(f"Удаленная БД: {host}:{port}/{database}, пользователь={user}")
                 
+                from .remote_db_connector import RemoteDatabaseConnector
+                
                 self.db_connector = RemoteDatabaseConnector(
                     host=host,
                     port=port,
@@ -402,6 +422,8 @@ class CoffeeAnalysisGUI:
                     masked_fallback,
                 )
 
+                from .proxy_api_connector import ProxyApiConnector
+
                 self.db_connector = ProxyApiConnector(
                     api_url=api_url,
                     primary_token=primary_token or None,
@@ -443,17 +465,20 @@ class CoffeeAnalysisGUI:
         logger.info("Отключение от базы данных")
         try:
             if self.db_connector:
+                self._discard_prefetch("отключение от БД")
                 # Для локальной БД вызываем disconnect(), для удаленной просто удаляем объект
-                if isinstance(self.db_connector, DatabaseConnector):
-                    self.db_connector.disconnect()
-                elif isinstance(self.db_connector, ProxyApiConnector):
-                    self.db_connector.close()
-                self.db_connector = None
+                with self._db_lock:
+                    if self.db_type == "local":
+                        self.db_connector.disconnect()
+                    elif self.db_type == "proxy":
+                        self.db_connector.close()
+                    self.db_connector = None
                 
                 self.connection_status_var.set("Отключено")
                 self.connection_status_label.config(foreground="gray")
                 self.generate_btn.config(state="disabled")
                 self.export_btn.config(state="disabled")
+                self.cache_status_var.set("")
                 self.connect_btn.config(state="normal")
                 self.disconnect_btn.config(state="disabled")
                 # Очищаем список магазинов
@@ -489,9 +514,9 @@ class CoffeeAnalysisGUI:
             logger.info("Получение информации о магазинах из БД")
             
             # Для удаленной БД используем execute_query_to_dataframe
-            if isinstance(self.db_connector, ProxyApiConnector):
+            if self.db_type == "proxy":
                 self.stores_data = self.db_connector.get_stores_dataframe()
-            elif isinstance(self.db_connector, RemoteDatabaseConnector):
+            elif self.db_type == "remote":
                 query = "SELECT ID, NAME FROM STORGRP ORDER BY NAME"
                 self.stores_data = self.db_connector.execute_query_to_dataframe(query)
             else:
@@ -509,6 +534,7 @@ class CoffeeAnalysisGUI:
             col = 0
             for i, store in self.stores_data.iterrows():
                 var = tk.BooleanVar(value=True)  # По умолчанию все выбраны
+                var.trace_add("write", self._on_report_params_changed)
                 self.store_vars[store['ID']] = var
                 
                 cb = ttk.Checkbutton(self.stores_frame, text=store['NAME'], variable=var)
@@ -520,12 +546,117 @@ class CoffeeAnalysisGUI:
                     row += 1
                     
             logger.info("Чекбоксы магазинов созданы успешно")
-                    
+
+            # Пользователь почти всегда сразу строит отчет по умолчанию - готовим его заранее
+            self._start_report_prefetch()
+
         except Exception as e:
             logger.error(f"Ошибка загрузки магазинов: {e}")
             logger.error(traceback.format_exc())
             messagebox.showerror("Ошибка", f"Ошибка загрузки магазинов: {str(e)}")
-            
+
+    def _current_report_key(self):
+        """Ключ параметров отчета: (тип БД, магазины, дата с, дата по)"""
+        store_vars = getattr(self, 'store_vars', {})
+        selected_stores = tuple(sorted(store_id for store_id, var in store_vars.items() if var.get()))
+        return (self.db_type, selected_stores, self.start_date_var.get(), self.end_date_var.get())
+
+    def _new_report_load(self, key, target, name):
+        """Загрузка отчета в отдельном потоке: dict с ключом, результатом, ошибкой и потоком"""
+        load = {'key': key, 'result': None, 'error': None, 'finished': None}
+        load['thread'] = threading.Thread(target=target, args=(load,), name=name, daemon=True)
+        return load
+
+    def _start_report_load(self, key):
+        """Загрузка отчета по запросу пользователя в отдельном потоке"""
+        load = self._new_report_load(key, self._run_report_load, "report-load")
+        load['thread'].start()
+        return load
+
+    def _start_report_prefetch(self):
+        """Фоновая предзагрузка отчета с текущими (стандартными) параметрами"""
+        key = self._current_report_key()
+        if not key[1]:
+            return
+
+        prefetch = self._new_report_load(key, self._run_report_prefetch, "report-prefetch")
+        self._prefetch = prefetch
+        logger.info(f"Запуск предзагрузки отчета: магазины={list(key[1])}, период {key[2]} - {key[3]}")
+        prefetch['thread'].start()
+
+    def _run_report_prefetch(self, prefetch):
+        """Тело фонового потока предзагрузки (без обращений к tkinter)"""
+        self._run_report_load(prefetch, prefetch=True)
+
+    def _run_report_load(self, load, prefetch=False):
+        """
+        Тело потока загрузки отчета (без обращений к tkinter)
+
+        Коннектор занят, пока идет другой запрос (например, устаревшая предзагрузка):
+        поток ждет блокировку, а окно тем временем остается отзывчивым.
+        """
+        _, store_ids, start_date, end_date = load['key']
+        try:
+            with self._db_lock:
+                if (prefetch and self._prefetch is not load) or not self.db_connector:
+                    return
+                load['result'] = self._load_report_data(
+                    list(store_ids), start_date, end_date, interactive=False
+                )
+            logger.info(f"Загрузка отчета завершена: {len(load['result'])} записей")
+        except Exception as e:
+            load['error'] = e
+            logger.warning(f"Загрузка отчета не удалась: {e}")
+        finally:
+            load['finished'] = time.monotonic()
+
+    def _discard_prefetch(self, reason):
+        """Сброс предзагруженного отчета"""
+        if self._prefetch is not None:
+            logger.info(f"Предзагруженный отчет отброшен: {reason}")
+            self._prefetch = None
+
+    def _on_report_params_changed(self, *args):
+        """Параметры отчета изменились - предзагрузка больше не соответствует им"""
+        if self._prefetch is not None and self._prefetch['key'] != self._current_report_key():
+            self._discard_prefetch("изменены параметры отчета")
+
+    def _take_prefetched_report(self, key):
+        """
+        Забирает предзагрузку, если она построена для тех же параметров и не устарела
+
+        Returns:
+            dict предзагрузки (поток может еще выполняться) или None
+        """
+        prefetch = self._prefetch
+        if prefetch is None:
+            return None
+        if prefetch['key'] != key:
+            self._discard_prefetch("параметры отчета не совпадают")
+            return None
+        if prefetch['finished'] is not None and time.monotonic() - prefetch['finished'] > PREFETCH_TTL:
+            self._discard_prefetch("устарел")
+            return None
+        self._prefetch = None
+        return prefetch
+
+    def _wait_report_load(self, load, from_prefetch):
+        """Опрашивает поток загрузки через root.after, не блокируя окно"""
+        if load['thread'].is_alive():
+            self.root.after(PREFETCH_POLL_MS, self._wait_report_load, load, from_prefetch)
+            return
+        if from_prefetch and load['result'] is None and self.db_connector:
+            # Предзагрузка не удалась или не успела начать запрос - загружаем заново
+            self.cache_status_var.set("⏳ Загрузка данных")
+            self._wait_report_load(self._start_report_load(load['key']), False)
+            return
+        self.generate_btn.config(state="normal" if self.db_connector else "disabled")
+        if not self.db_connector:
+            # Отключились от БД, пока ждали
+            self.cache_status_var.set("")
+            return
+        self._build_report(load, from_prefetch)
+
     def extract_weight_from_name(self, name):
         """Извлекает вес из названия товара"""
         patterns = [
@@ -574,21 +705,42 @@ class CoffeeAnalysisGUI:
             end_date = self.end_date_var.get()
             logger.info(f"Период анализа: {start_date} - {end_date}")
                 
-            # Загружаем данные с правильным расчетом килограммов
-            logger.info("Загрузка данных о продажах кофе с пачками")
-            
-            if isinstance(self.db_connector, ProxyApiConnector):
-                self.sales_data = self._get_proxy_sales_data(selected_stores, start_date, end_date)
-            elif isinstance(self.db_connector, RemoteDatabaseConnector):
-                # Для удаленной БД выполняем запрос напрямую
-                self.sales_data = self._get_remote_sales_data(selected_stores, start_date, end_date)
-            else:
-                # Для локальной БД используем существующий метод
-                self.sales_data = self.db_connector.get_coffee_sales_with_packages(
-                    store_ids=selected_stores,
-                    start_date=start_date,
-                    end_date=end_date
-                )
+            # Сначала пробуем результат фоновой предзагрузки
+            report_key = (self.db_type, tuple(sorted(selected_stores)), start_date, end_date)
+            load = self._take_prefetched_report(report_key)
+            from_prefetch = load is not None and (load['thread'].is_alive() or load['result'] is not None)
+            if not from_prefetch:
+                # Предзагрузки нет или она не удалась: запрос к БД идет в отдельном потоке,
+                # главный поток Tk не ждет коннектор
+                load = self._start_report_load(report_key)
+            if load['thread'].is_alive():
+                logger.info("Ожидание загрузки отчета")
+                self.generate_btn.config(state="disabled")
+                self.cache_status_var.set("⏳ Ожидание предзагрузки" if from_prefetch else "⏳ Загрузка данных")
+                self._wait_report_load(load, from_prefetch)
+                return
+        except Exception as e:
+            logger.error(f"Ошибка генерации отчета: {e}")
+            logger.error(traceback.format_exc())
+            messagebox.showerror("Ошибка", f"Ошибка генерации отчета: {str(e)}")
+            return
+        self._build_report(load, from_prefetch)
+
+    def _build_report(self, load, from_prefetch):
+        """Построение таблицы отчета по результату загрузки (или предзагрузки)"""
+        if load['error'] is not None:
+            self.cache_status_var.set("")
+            self._show_report_error(load['error'])
+            return
+        if load['result'] is None:
+            # Загрузка не выполнялась: соединение закрыли до ее начала
+            self.cache_status_var.set("")
+            return
+        try:
+            self.sales_data = load['result']
+            if from_prefetch:
+                logger.info("Отчет взят из предзагрузки")
+            self.cache_status_var.set("⚡ Из предзагрузки" if from_prefetch else "")
             
             logger.info(f"Загружено {len(self.sales_data)} записей о продажах")
             
@@ -597,17 +749,6 @@ class CoffeeAnalysisGUI:
                 messagebox.showinfo("Информация", "Нет данных за выбранный период!")
                 return
             
-            # Переименовываем колонки для совместимости
-            logger.info("Переименование колонок")
-            self.sales_data = self.sales_data.rename(columns={
-                'ALLCUP': 'QUANTITY',
-                'PACKAGES_KG': 'TOTAL_WEIGHT_KG',
-                'TOTAL_CASH': 'TOTAL_SUM'
-            })
-            
-            # Преобразуем даты
-            self.sales_data['ORDER_DATE'] = pd.to_datetime(self.sales_data['ORDER_DATE'])
-            
             # Группируем данные
             logger.info("Создание таблицы отчета")
             self.create_report_table()
@@ -620,6 +761,67 @@ class CoffeeAnalysisGUI:
             logger.error(f"Ошибка генерации отчета: {e}")
             logger.error(traceback.format_exc())
             messagebox.showerror("Ошибка", f"Ошибка генерации отчета: {str(e)}")
+
+    def _show_report_error(self, error):
+        """Сообщение об ошибке загрузки отчета (в главном потоке Tk)"""
+        logger.error(f"Ошибка генерации отчета: {error}")
+        if self.db_type == "proxy":
+            from .proxy_api_connector import ProxyApiAuthError, ProxyApiRateLimitError
+
+            if isinstance(error, ProxyApiRateLimitError):
+                messagebox.showwarning(
+                    "Лимит запросов",
+                    "Превышен лимит запросов API. Подождите минуту и попробуйте снова.",
+                )
+                return
+            if isinstance(error, ProxyApiAuthError):
+                messagebox.showerror("Ошибка", "Ошибка аутентификации API. Проверьте токен.")
+                return
+        messagebox.showerror("Ошибка", f"Ошибка генерации отчета: {str(error)}")
+    
+    def _load_report_data(self, store_ids, start_date, end_date, interactive=True):
+        """
+        Загрузка и подготовка данных отчета для текущего типа БД
+        
+        Args:
+            store_ids: Список ID магазинов
+            start_date: Начальная дата
+            end_date: Конечная дата
+            interactive: Показывать ли диалоги об ошибках (False для фоновых потоков)
+            
+        Returns:
+            pd.DataFrame: Данные с колонками QUANTITY, TOTAL_WEIGHT_KG, TOTAL_SUM
+        """
+        import pandas as pd
+        
+        # Загружаем данные с правильным расчетом килограммов
+        logger.info("Загрузка данных о продажах кофе с пачками")
+        
+        if self.db_type == "proxy":
+            sales_data = self._get_proxy_sales_data(store_ids, start_date, end_date, interactive=interactive)
+        elif self.db_type == "remote":
+            # Для удаленной БД выполняем запрос напрямую
+            sales_data = self._get_remote_sales_data(store_ids, start_date, end_date)
+        else:
+            # Для локальной БД используем существующий метод
+            sales_data = self.db_connector.get_coffee_sales_with_packages(
+                store_ids=store_ids,
+                start_date=start_date,
+                end_date=end_date
+            )
+        
+        # Переименовываем колонки для совместимости
+        logger.info("Переименование колонок")
+        sales_data = sales_data.rename(columns={
+            'ALLCUP': 'QUANTITY',
+            'PACKAGES_KG': 'TOTAL_WEIGHT_KG',
+            'TOTAL_CASH': 'TOTAL_SUM'
+        })
+        
+        # Преобразуем даты
+        if not sales_data.empty:
+            sales_data['ORDER_DATE'] = pd.to_datetime(sales_data['ORDER_DATE'])
+        return sales_data
     
     def _get_remote_sales_data(self, store_ids, start_date, end_date):
         """Получение данных о продажах из удаленной БД"""
@@ -688,9 +890,17 @@ class CoffeeAnalysisGUI:
         
         return df
 
-    def _get_proxy_sales_data(self, store_ids, start_date, end_date):
+    def _get_proxy_sales_data(self, store_ids, start_date, end_date, interactive=True):
         """Получение данных о продажах через Proxy API"""
         logger.info("Получение данных через Proxy API")
+        import pandas as pd
+        from .proxy_api_connector import (
+            ProxyApiAuthError,
+            ProxyApiConnector,
+            ProxyApiError,
+            ProxyApiRateLimitError,
+        )
+
         if not isinstance(self.db_connector, ProxyApiConnector):
             raise ValueError("Proxy API connector is not initialized")
 
@@ -698,6 +908,8 @@ class CoffeeAnalysisGUI:
             df = self.db_connector.get_sales_data(store_ids, start_date, end_date)
         except ProxyApiRateLimitError as e:
             logger.warning(f"Превышен лимит запросов Proxy API: {e}")
+            if not interactive:
+                raise
             messagebox.showwarning(
                 "Лимит запросов",
                 "Превышен лимит запросов API. Подождите минуту и попробуйте снова.",
@@ -705,6 +917,8 @@ class CoffeeAnalysisGUI:
             return pd.DataFrame(columns=["STORE_NAME", "ORDER_DATE", "ALLCUP", "PACKAGES_KG", "TOTAL_CASH"])
         except ProxyApiAuthError as e:
             logger.error(f"Ошибка аутентификации Proxy API: {e}")
+            if not interactive:
+                raise
             messagebox.showerror("Ошибка", "Ошибка аутентификации API. Проверьте токен.")
             return pd.DataFrame(columns=["STORE_NAME", "ORDER_DATE", "ALLCUP", "PACKAGES_KG", "TOTAL_CASH"])
         except ProxyApiError as e:
@@ -833,6 +1047,7 @@ class CoffeeAnalysisGUI:
                 }).reset_index()
                 
                 # Экспортируем
+                import pandas as pd
                 with pd.ExcelWriter(filename, engine='openpyxl') as writer:
                     grouped.to_excel(writer, sheet_name='Детальный отчет', index=False)
                     
@@ -0,0 +1,224 @@
+"""
+Общие настройки pytest для тестов веб-бэкенда (web/backend) и Flask-приложения (webapp)
+
+Оба приложения импортируются из своих каталогов. У бэкенда пакет называется `app`,
+поэтому модуль webapp/app.py загружается под именем `webapp_app` (фикстура `webapp_app`).
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+
+for path in (project_root / "webapp", project_root / "web" / "backend"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# Обязательные настройки обоих приложений; реальные запросы к Proxy API не выполняются
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("PROXY_API_URL", "http://proxy.test")
+os.environ.setdefault("PROXY_PRIMARY_TOKEN", "test-token")
+
+
+@pytest.fixture
+def proxy_client_factory():
+    """Фабрика ProxyApiClient бэкенда поверх httpx.MockTransport(handler)"""
+    httpx = pytest.importorskip("httpx")
+    from app.proxy_client import ProxyApiClient
+
+    def make(handler, **kwargs):
+        kwargs.setdefault("backoff_base", 0.001)
+        client = ProxyApiClient("http://proxy.test", "test-token", **kwargs)
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    return make
+
+
+class FakeProxyApi:
+    """Имитация Proxy API: продажи по каждому магазину и дню
+
+    Значения детерминированы (зависят от магазина и дня), так что ответы разных
+    запросов можно сравнивать. ``handler`` - обработчик httpx.MockTransport для
+    бэкенда, ``adapter()`` - транспортный адаптер requests для Flask-приложения.
+    Запросы к /api/query записываются в ``queries``, заголовки всех запросов -
+    в ``headers``; ``health`` - ответ /api/health, ``error_status`` заставляет
+    отвечать ошибкой.
+    """
+
+    def __init__(self, stores=(1, 2, 3), delay=0.0):
+        self.stores = {store_id: f"Магазин {store_id}" for store_id in stores}
+        self.delay = delay
+        self.health = {"status": "ok"}
+        self.error_status = None
+        self.queries = []
+        self.headers = []
+
+    @staticmethod
+    def cups(store_id, day):
+        return 10 + store_id + day.toordinal() % 7
+
+    @staticmethod
+    def cash(store_id, day):
+        return 100.0 * store_id + day.toordinal() % 31
+
+    @staticmethod
+    def packages(store_id, day):
+        return 0.25 * (day.toordinal() % 3)
+
+    def _sales(self, query, params):
+        store_ids = params[:-2] or list(self.stores)
+        start, end = date.fromisoformat(params[-2]), date.fromisoformat(params[-1])
+        rows = []
+        day = start
+        while day <= end:
+            for store_id in store_ids:
+                row = {"STORE_ID": store_id, "STORE_NAME": self.stores[store_id], "ORDER_DATE": day.isoformat()}
+                if "PACKAGES_KG" in query:
+                    row["PACKAGES_KG"] = self.packages(store_id, day)
+                else:
+                    row["ALLCUP"] = self.cups(store_id, day)
+                    row["TOTAL_CASH"] = self.cash(store_id, day)
+                rows.append(row)
+            day += timedelta(days=1)
+        return rows
+
+    def respond(self, path, headers, content):
+        """Статус и тело ответа на запрос к ``path``"""
+        self.headers.append(dict(headers))
+        if self.error_status is not None:
+            return self.error_status, {"error": "upstream failure"}
+        if path == "/api/health":
+            return 200, self.health
+        if path == "/api/tables":
+            return 200, {"tables": ["STORGRP", "STORZAKAZDT", "GOODS"]}
+        body = json.loads(content)
+        query, params = body["query"], body.get("params", [])
+        self.queries.append((query, params))
+        if "FROM STORGRP" in query and "STORZAKAZDT" not in query:
+            data = [{"ID": store_id, "NAME": name} for store_id, name in self.stores.items()]
+        else:
+            data = self._sales(query, params)
+        return 200, {"success": True, "data": data}
+
+    async def handler(self, request):
+        import httpx
+
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        status, payload = self.respond(request.url.path, request.headers, request.content)
+        return httpx.Response(status, json=payload)
+
+    def adapter(self):
+        import requests
+        from requests.adapters import BaseAdapter
+
+        upstream = self
+
+        class Adapter(BaseAdapter):
+            def send(self, request, **kwargs):
+                if upstream.delay:
+                    time.sleep(upstream.delay)
+                path = requests.utils.urlparse(request.url).path
+                status, payload = upstream.respond(path, request.headers, request.body)
+                response = requests.Response()
+                response.status_code = status
+                response._content = json.dumps(payload).encode()
+                response.headers["Content-Type"] = "application/json"
+                response.url = request.url
+                response.request = request
+                return response
+
+            def close(self):
+                pass
+
+        return Adapter()
+
+
+@pytest.fixture
+def fake_proxy_api():
+    return FakeProxyApi()
+
+
+@pytest.fixture
+def backend_app(monkeypatch, proxy_client_factory):
+    """Фабрика FastAPI-приложения бэкенда с Proxy API на MockTransport и настройками из env
+
+    ``make(upstream, **env)`` возвращает ``TestClient``; фоновые задачи startup не запускаются.
+    """
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from app import deps
+    from app.config import get_settings
+    from app.main import create_app
+    from app.pagination import SortedSalesCache
+    from app.sales_cache import SalesCache
+
+    def make(upstream, **env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        get_settings.cache_clear()
+        settings = get_settings()
+        application = create_app()
+        client = proxy_client_factory(upstream.handler)
+        sales_cache = SalesCache(max_bytes=settings.sales_cache_max_bytes, today_ttl=60)
+        sorted_sales_cache = SortedSalesCache(ttl=settings.sales_page_ttl)
+        application.dependency_overrides.update({
+            deps.get_proxy_client: lambda: client,
+            deps.get_sales_cache: lambda: sales_cache,
+            deps.get_sorted_sales_cache: lambda: sorted_sales_cache,
+            deps.get_sales_store: lambda: None,
+            deps.get_shared_cache: lambda: None,
+        })
+        return TestClient(application)
+
+    yield make
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def webapp_app(monkeypatch):
+    """Фабрика модуля Flask-приложения (webapp/app.py) с Proxy API на адаптере requests
+
+    ``make(upstream, **env)`` загружает модуль заново с настройками из env и
+    возвращает его; общий кэш процессов отключен.
+    """
+    pytest.importorskip("flask")
+    pytest.importorskip("numpy")
+    import config as webapp_config
+
+    modules = []
+
+    def make(upstream, **env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        monkeypatch.setenv("SHARED_CACHE_PATH", "")
+        webapp_config.get_settings.cache_clear()
+        spec = importlib.util.spec_from_file_location("webapp_app", project_root / "webapp" / "app.py")
+        module = importlib.util.module_from_spec(spec)
+        # Flask находит каталог шаблонов по модулю в sys.modules
+        monkeypatch.setitem(sys.modules, "webapp_app", module)
+        spec.loader.exec_module(module)
+        module.app.config["TESTING"] = True
+        # Шаблон главной страницы показывает состояние подключения к базе
+        upstream.health.setdefault("proxy_api", {"database_connected": True})
+        adapter = upstream.adapter()
+        module.client.session.mount("http://", adapter)
+        module.client.session.mount("https://", adapter)
+        modules.append(module)
+        return module
+
+    yield make
+    for module in modules:
+        module.client.close()
+        module.page_executor.shutdown(wait=False, cancel_futures=True)
+    webapp_config.get_settings.cache_clear()
@@ -0,0 +1,88 @@
+"""
+Тесты итогов и сводной таблицы веб-бэкенда: /sales/summary, /sales/pivot и app/aggregation.py
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from app.aggregation import period_totals, pivot, pivot_totals, sales_frame, summarize  # noqa: E402
+from conftest import FakeProxyApi  # noqa: E402
+
+ROWS = [
+    {"STORE_NAME": "B", "ORDER_DATE": "2024-01-01", "ALLCUP": 1, "PACKAGES_KG": 0.5, "TOTAL_CASH": 10},
+    {"STORE_NAME": "A", "ORDER_DATE": "2024-01-02", "ALLCUP": 2, "PACKAGES_KG": None, "TOTAL_CASH": 20},
+    {"STORE_NAME": "A", "ORDER_DATE": "2024-01-08", "ALLCUP": 3, "PACKAGES_KG": 1, "TOTAL_CASH": 30},
+    {"STORE_NAME": "B", "ORDER_DATE": "2024-02-01", "ALLCUP": 4, "PACKAGES_KG": 0, "TOTAL_CASH": 40},
+]
+
+
+def test_summary():
+    assert summarize(sales_frame(ROWS)) == {
+        "record_count": 4,
+        "store_count": 2,
+        "day_count": 4,
+        "allcup": 10.0,
+        "packages_kg": 1.5,
+        "total_cash": 100.0,
+    }
+
+
+def test_weekly_pivot_fills_missing_cells_with_zero():
+    table = pivot(sales_frame(ROWS), "week")
+    assert table["stores"] == ["A", "B"]
+    assert table["periods"] == [date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 29)]
+    assert table["allcup"] == [[2.0, 3.0, 0.0], [1.0, 0.0, 4.0]]
+    assert table["packages_kg"] == [[0.0, 1.0, 0.0], [0.5, 0.0, 0.0]]
+
+
+def test_monthly_pivot():
+    table = pivot(sales_frame(ROWS), "month")
+    assert table["periods"] == [date(2024, 1, 1), date(2024, 2, 1)]
+    assert table["total_cash"] == [[50.0, 0.0], [10.0, 40.0]]
+
+
+def test_chunked_totals_equal_whole_range():
+    """Итоги порций (как в выгрузке сводной таблицы) складываются в итог всего диапазона"""
+    whole = pivot(sales_frame(ROWS), "week")
+    totals = period_totals(sales_frame([]), "week")
+    for chunk in (ROWS[:1], ROWS[1:3], ROWS[3:]):
+        totals = totals.add(period_totals(sales_frame(chunk), "week"), fill_value=0.0)
+    assert pivot_totals(totals, "week") == whole
+
+
+def test_empty_pivot():
+    table = pivot(sales_frame([]), "day")
+    assert table["stores"] == [] and table["periods"] == [] and table["allcup"] == []
+
+
+def test_pivot_endpoint(backend_app):
+    pytest.importorskip("fastapi")
+    client = backend_app(FakeProxyApi())
+    params = {"store_ids": [2, 1], "start_date": "2024-01-01", "end_date": "2024-01-14"}
+
+    response = client.get("/sales/pivot", params={**params, "granularity": "week"})
+    assert response.status_code == 200
+    table = response.json()
+    assert table["stores"] == ["Магазин 1", "Магазин 2"]
+    assert table["periods"] == ["2024-01-01", "2024-01-08"]
+    expected = sum(FakeProxyApi.cups(2, date(2024, 1, 8) + timedelta(days=offset)) for offset in range(7))
+    assert table["allcup"][1][1] == expected
+
+    summary = client.get("/sales/summary", params=params).json()
+    assert summary["record_count"] == 28
+    assert summary["allcup"] == sum(map(sum, table["allcup"]))
+
+
+def test_pivot_auto_granularity(backend_app):
+    pytest.importorskip("fastapi")
+    client = backend_app(FakeProxyApi())
+    params = {"store_ids": [1], "start_date": "2024-01-01", "end_date": "2024-03-31", "granularity": "auto"}
+
+    assert client.get("/sales/pivot", params={**params, "max_periods": 100}).json()["granularity"] == "day"
+    assert client.get("/sales/pivot", params={**params, "max_periods": 20}).json()["granularity"] == "week"
+    monthly = client.get("/sales/pivot", params={**params, "max_periods": 5}).json()
+    assert monthly["granularity"] == "month"
+    assert len(monthly["periods"]) == 3
@@ -0,0 +1,150 @@
+"""
+Тесты circuit breaker клиента Proxy API веб-бэкенда: web/backend/app/circuit_breaker.py
+и его учет в ProxyApiClient._request
+"""
+
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from app import circuit_breaker, deadline  # noqa: E402
+from app.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker  # noqa: E402
+from app.proxy_client import (  # noqa: E402
+    ProxyApiAuthError,
+    ProxyApiBudgetExceeded,
+    ProxyApiCircuitOpen,
+    ProxyApiError,
+    ProxyApiServerError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", fake)
+    return fake
+
+
+def test_open_half_open_close(clock):
+    """closed -> open после порога сбоев -> half-open через reset_timeout -> closed после успеха"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Пока идет пробный вызов, остальные отклоняются
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_released_trial_lets_next_call_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def _opened_client(proxy_client_factory, clock, handler):
+    """Клиент с открытым breaker, у которого истек reset_timeout"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    client = proxy_client_factory(handler, breaker=breaker, max_retries=0)
+    breaker.record_failure()
+    clock.now += 10
+    return client
+
+
+def test_client_opens_on_server_errors_and_closes_on_success(proxy_client_factory, clock):
+    statuses = [503, 503, 200]
+
+    def handler(request):
+        status = statuses.pop(0)
+        return httpx.Response(status, json={"status": "ok"})
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    client = proxy_client_factory(handler, breaker=breaker, max_retries=0)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ProxyApiServerError):
+                await client.health()
+        assert breaker.state == OPEN
+        with pytest.raises(ProxyApiCircuitOpen):
+            await client.health()
+        clock.now += 10
+        assert await client.health() == {"status": "ok"}
+
+    asyncio.run(scenario())
+    assert breaker.state == CLOSED
+    assert statuses == []
+
+
+@pytest.mark.parametrize(
+    "status, error",
+    [(400, ProxyApiError), (404, ProxyApiError), (401, ProxyApiAuthError)],
+)
+def test_half_open_client_error_closes_circuit(proxy_client_factory, clock, status, error):
+    """Пробный вызов, закончившийся 4xx, означает, что Proxy API отвечает"""
+    client = _opened_client(proxy_client_factory, clock, lambda request: httpx.Response(status, json={}))
+    with pytest.raises(error):
+        asyncio.run(client.health())
+    assert client.breaker.state == CLOSED
+
+
+def test_half_open_budget_exceeded_releases_trial(proxy_client_factory, clock):
+    """Пробный вызов без бюджета не занимает слот до следующего reset_timeout"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"status": "ok"})
+
+    client = _opened_client(proxy_client_factory, clock, handler)
+
+    async def spent_budget():
+        token = deadline.start(0)
+        try:
+            await client.health()
+        finally:
+            deadline.reset(token)
+
+    with pytest.raises(ProxyApiBudgetExceeded):
+        asyncio.run(spent_budget())
+    assert calls == []
+    assert client.breaker.state == HALF_OPEN
+
+    assert asyncio.run(client.health()) == {"status": "ok"}
+    assert client.breaker.state == CLOSED
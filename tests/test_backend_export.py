@@ -0,0 +1,95 @@
+"""
+Тесты потоковой выгрузки продаж веб-бэкенда: /sales/export и /sales/pivot/export
+"""
+
+import csv
+import io
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+pytest.importorskip("openpyxl")
+
+from conftest import FakeProxyApi  # noqa: E402
+
+START, END = date(2024, 1, 1), date(2024, 1, 12)
+
+
+def _params(**extra):
+    return {"store_ids": [1, 2], "start_date": START.isoformat(), "end_date": END.isoformat(), **extra}
+
+
+def _csv_rows(response):
+    text = response.content.decode("utf-8-sig")
+    return list(csv.reader(io.StringIO(text)))
+
+
+def test_long_export_outlives_request_budget(backend_app):
+    """12 порций по ~0.1 с при REQUEST_BUDGET=0.3: выгрузка приходит целиком"""
+    upstream = FakeProxyApi(delay=0.05)
+    client = backend_app(upstream, REQUEST_BUDGET=0.3, EXPORT_CHUNK_DAYS=1, EXPORT_BUDGET=5)
+
+    response = client.get("/sales/export", params=_params())
+    assert response.status_code == 200
+    rows = _csv_rows(response)
+    assert rows[0] == ["order_date", "store_name", "allcup", "packages_kg", "total_cash"]
+    body = rows[1:]
+    assert len(body) == 12 * 2
+    days = [START + timedelta(days=offset) for offset in range(12)]
+    assert [row[0] for row in body[::2]] == [day.isoformat() for day in days]
+    first = body[0]
+    assert float(first[2]) == FakeProxyApi.cups(1, START)
+    assert float(first[4]) == FakeProxyApi.cash(1, START)
+    # По два запроса (чашки и упаковки) на каждый день
+    assert len(upstream.queries) == 24
+
+
+def test_long_pivot_export_outlives_request_budget(backend_app):
+    upstream = FakeProxyApi(delay=0.05)
+    client = backend_app(upstream, REQUEST_BUDGET=0.3, EXPORT_CHUNK_DAYS=1, EXPORT_BUDGET=5)
+
+    response = client.get("/sales/pivot/export", params=_params(granularity="week"))
+    assert response.status_code == 200
+    rows = _csv_rows(response)
+    # 2024-01-01 - понедельник: недели с 1-го и 8-го
+    assert rows[0] == ["store_name", "measure", "2024-01-01", "2024-01-08"]
+    cups = {row[0]: row[2:] for row in rows[1:] if row[1] == "allcup"}
+    expected = sum(FakeProxyApi.cups(1, START + timedelta(days=offset)) for offset in range(7))
+    assert float(cups["Магазин 1"][0]) == expected
+
+
+def test_chunk_over_export_budget_fails_before_first_byte(backend_app):
+    """Ошибка первой порции - обычный HTTP-ответ 504, а не оборванный файл"""
+    upstream = FakeProxyApi(delay=0.3)
+    client = backend_app(upstream, REQUEST_BUDGET=5, EXPORT_CHUNK_DAYS=1, EXPORT_BUDGET=0.1, PROXY_MAX_RETRIES=0)
+
+    response = client.get("/sales/export", params=_params())
+    assert response.status_code == 504
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        _params(start_date="2024-02-01", end_date="2024-01-01"),
+        _params(end_date="2024-13-01"),
+        _params(store_ids=[]),
+    ],
+)
+def test_invalid_range_is_rejected_without_upstream_calls(backend_app, params):
+    upstream = FakeProxyApi()
+    client = backend_app(upstream)
+    response = client.get("/sales/export", params=params)
+    assert response.status_code in (400, 422)
+    assert upstream.queries == []
+
+
+def test_xlsx_export(backend_app):
+    openpyxl = pytest.importorskip("openpyxl")
+    client = backend_app(FakeProxyApi(), EXPORT_CHUNK_DAYS=5)
+    response = client.get("/sales/export", params=_params(format="xlsx"))
+    assert response.status_code == 200
+    assert 'filename="sales_2024-01-01_2024-01-12.xlsx"' in response.headers["content-disposition"]
+    sheet = openpyxl.load_workbook(io.BytesIO(response.content)).active
+    assert sheet.max_row == 1 + 12 * 2
@@ -0,0 +1,167 @@
+"""
+Тесты живой ленты продаж (SSE) веб-бэкенда: web/backend/app/live_feed.py
+"""
+
+import asyncio
+import logging
+from datetime import date
+
+import orjson
+import pytest
+
+pytest.importorskip("httpx")
+
+from app.live_feed import LiveSalesFeed  # noqa: E402
+from app.proxy_client import ProxyApiUnavailable  # noqa: E402
+
+
+def _row(store_id, allcup, cash, packages=0.0):
+    return {
+        "STORE_ID": store_id,
+        "STORE_NAME": f"store{store_id}",
+        "ORDER_DATE": date.today().isoformat(),
+        "ALLCUP": allcup,
+        "TOTAL_CASH": cash,
+        "PACKAGES_KG": packages,
+    }
+
+
+class ScriptedClient:
+    """get_sales_since по сценарию: список ответов или исключений, затем пустые ответы"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+
+    async def get_sales_since(self, day, after_id):
+        self.calls.append((day, after_id))
+        if not self.script:
+            return [], after_id
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        return step
+
+
+def _parse(message):
+    event, data = message.decode().strip().split("\n")
+    return event[len("event: "):], orjson.loads(data[len("data: "):])
+
+
+async def _collect(feed, count, timeout=2.0):
+    stream = feed.events()
+    messages = []
+    try:
+        while len(messages) < count:
+            message = await asyncio.wait_for(stream.__anext__(), timeout)
+            if not message.startswith(b":"):
+                messages.append(_parse(message))
+    finally:
+        await stream.aclose()
+    return messages
+
+
+def test_snapshot_then_deltas():
+    client = ScriptedClient([
+        ([_row(1, 3, 30.0), _row(2, 1, 10.0)], 10),
+        ([_row(1, 2, 20.0, 0.25)], 12),
+    ])
+    feed = LiveSalesFeed(client, interval=0.01)
+
+    (snapshot_event, snapshot), (delta_event, delta) = asyncio.run(_collect(feed, 2))
+    assert snapshot_event == "snapshot"
+    assert snapshot["last_id"] == 10
+    assert [store["allcup"] for store in snapshot["stores"]] == [3.0, 1.0]
+
+    assert delta_event == "delta"
+    assert delta["last_id"] == 12
+    assert delta["stores"] == [
+        {"store_id": 1, "store_name": "store1", "allcup": 2.0, "packages_kg": 0.25, "total_cash": 20.0}
+    ]
+    # Следующий запрос продолжает с последнего документа
+    assert client.calls[:2] == [(date.today().isoformat(), 0), (date.today().isoformat(), 10)]
+    assert feed.totals[1]["allcup"] == 5.0
+    assert feed.totals[1]["total_cash"] == 50.0
+    # Последний подписчик отключился - опрос остановлен
+    assert not feed.stats()["polling"]
+
+
+def test_proxy_error_is_retried():
+    client = ScriptedClient([ProxyApiUnavailable("down"), ([_row(1, 1, 5.0)], 3)])
+    feed = LiveSalesFeed(client, interval=0.01)
+    [(event, snapshot)] = asyncio.run(_collect(feed, 1))
+    assert event == "snapshot"
+    assert snapshot["last_id"] == 3
+    assert feed.last_error is None
+
+
+def test_unexpected_error_is_logged_and_polling_continues(caplog):
+    """Некорректная строка не останавливает опрос; итоги пересобираются со снимка"""
+    client = ScriptedClient([
+        ([_row(1, 1, 5.0), {"STORE_ID": None}], 4),
+        ([_row(1, 2, 7.0)], 5),
+    ])
+    feed = LiveSalesFeed(client, interval=0.01)
+    with caplog.at_level(logging.ERROR, logger="app.live_feed"):
+        [(event, snapshot)] = asyncio.run(_collect(feed, 1))
+
+    assert event == "snapshot"
+    assert snapshot["last_id"] == 5
+    # Частично примененная первая порция отброшена
+    assert snapshot["stores"][0]["allcup"] == 2.0
+    assert client.calls[1][1] == 0
+    assert any(record.exc_info for record in caplog.records)
+
+
+def test_reconcile_picks_up_late_documents():
+    """Документ 11 зафиксирован после 12: инкрементальный запрос его пропускает, полный перечит находит"""
+    client = ScriptedClient([
+        ([_row(1, 3, 30.0)], 10),
+        ([_row(1, 1, 10.0)], 12),
+        ([_row(1, 5, 50.0, 0.5), _row(2, 1, 4.0)], 12),
+    ])
+    feed = LiveSalesFeed(client, interval=0.01, reconcile_every=2)
+
+    events = asyncio.run(_collect(feed, 3))
+    assert [event for event, _ in events] == ["snapshot", "delta", "snapshot"]
+    reconciled = events[2][1]
+    assert reconciled["last_id"] == 12
+    assert [(store["store_id"], store["allcup"], store["packages_kg"]) for store in reconciled["stores"]] == [
+        (1, 5.0, 0.5),
+        (2, 1.0, 0.0),
+    ]
+    # Полный перечит дня - запрос с начала; следующий инкрементальный продолжит с 12
+    assert [after_id for _, after_id in client.calls[:3]] == [0, 10, 0]
+    assert feed.last_id == 12
+
+
+def test_reconcile_without_changes_is_silent():
+    client = ScriptedClient([
+        ([_row(1, 3, 0.1)], 10),
+        ([_row(1, 1, 0.2)], 11),
+        ([_row(1, 4, 0.1 + 0.2)], 11),
+    ])
+    feed = LiveSalesFeed(client, interval=0.01, reconcile_every=2)
+    published = []
+    feed._publish = published.append
+
+    async def scenario():
+        for _ in range(3):
+            await feed.poll_once()
+
+    asyncio.run(scenario())
+    assert [_parse(message)[0] for message in published] == ["snapshot", "delta"]
+    assert feed.polls_since_reconcile == 0
+    assert feed.last_id == 11
+
+
+def test_reconcile_can_be_disabled():
+    client = ScriptedClient([([_row(1, 1, 1.0)], 1)])
+    feed = LiveSalesFeed(client, interval=0.01, reconcile_every=0)
+
+    async def scenario():
+        for _ in range(5):
+            await feed.poll_once()
+
+    asyncio.run(scenario())
+    assert [after_id for _, after_id in client.calls] == [0, 1, 1, 1, 1]
@@ -0,0 +1,110 @@
+"""
+Тесты метрик веб-бэкенда: app/metrics.py, /metrics и middleware record_metrics
+(кумулятивные бакеты, _sum/_count, метки по шаблону маршрута, формат экспозиции)
+"""
+
+import re
+
+import pytest
+
+from app.metrics import Registry
+
+# name{labels} value - строка сэмпла текстового формата Prometheus 0.0.4
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def _samples(text):
+    """Разбор экспозиции: [(имя, {метка: значение}, значение)]; некорректная строка - ошибка"""
+    assert text.endswith("\n")
+    samples = []
+    for line in text.splitlines():
+        if line.startswith("#"):
+            assert re.match(r"^# (HELP|TYPE) [a-zA-Z_:][a-zA-Z0-9_:]* \S", line), line
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"not an exposition sample: {line!r}"
+        name, labels, value = match.groups()
+        samples.append((name, dict(LABEL.findall(labels or "")), float(value)))
+    return samples
+
+
+def _series(samples, name, **labels):
+    return [
+        (sample_labels, value)
+        for sample_name, sample_labels, value in samples
+        if sample_name == name and all(sample_labels.get(key) == label for key, label in labels.items())
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0, 0.5))
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0, 5.0):
+        histogram.observe(value, route="/a")
+    histogram.observe(0.2, route="/b")
+
+    samples = _samples(registry.render())
+    buckets = _series(samples, "latency_seconds_bucket", route="/a")
+    # Границы отсортированы, значение на границе попадает в ее бакет (le)
+    assert [(labels["le"], value) for labels, value in buckets] == [("0.1", 2), ("0.5", 3), ("1", 4), ("+Inf", 6)]
+    assert _series(samples, "latency_seconds_count", route="/a") == [({"route": "/a"}, 6)]
+    assert _series(samples, "latency_seconds_sum", route="/a")[0][1] == pytest.approx(8.15)
+    assert [value for _, value in _series(samples, "latency_seconds_bucket", route="/b")] == [0, 1, 1, 1]
+    assert _series(samples, "latency_seconds_count", route="/b") == [({"route": "/b"}, 1)]
+
+
+def test_exposition_format():
+    registry = Registry()
+    counter = registry.counter("retries_total", "Retried calls.", ("kind", "reason"))
+    counter.inc(kind="select", reason="timeout")
+    counter.inc(2, kind="select", reason="timeout")
+    counter.inc(0.5, kind="other", reason='quote " and \\ and\nnewline')
+    registry.histogram("empty_seconds", "Never observed.")
+
+    text = registry.render()
+    lines = text.splitlines()
+    assert lines[:2] == ["# HELP retries_total Retried calls.", "# TYPE retries_total counter"]
+    # Пустая гистограмма: только заголовок
+    assert lines[-2:] == ["# HELP empty_seconds Never observed.", "# TYPE empty_seconds histogram"]
+    assert 'retries_total{kind="other",reason="quote \\" and \\\\ and\\nnewline"} 0.5' in lines
+    # Целые значения без дробной части, серии отсортированы по меткам
+    assert lines[2:4] == [
+        'retries_total{kind="other",reason="quote \\" and \\\\ and\\nnewline"} 0.5',
+        'retries_total{kind="select",reason="timeout"} 3',
+    ]
+    assert len(_samples(text)) == 2
+
+
+def test_metrics_endpoint_labels_routes_by_template(backend_app, fake_proxy_api):
+    client = backend_app(fake_proxy_api)
+
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    client.app.add_api_route("/items/{item_id}", item)
+    for item_id in (101, 202, 303):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.get("/no/such/path").status_code == 404
+    assert client.get("/stores", params={"refresh": "1"}).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    samples = _samples(response.text)
+    routes = {labels["route"] for labels, _ in _series(samples, "http_request_duration_seconds_count")}
+
+    assert "/items/{item_id}" in routes
+    assert not any(route.startswith("/items/") and route != "/items/{item_id}" for route in routes)
+    assert "/stores" in routes
+    assert "unmatched" in routes
+    assert not any("?" in route for route in routes)
+
+    [(_, count)] = _series(samples, "http_request_duration_seconds_count", route="/items/{item_id}", status="200")
+    assert count >= 3
+    buckets = _series(samples, "http_request_duration_seconds_bucket", route="/items/{item_id}", status="200")
+    values = [value for _, value in buckets]
+    assert values == sorted(values)
+    assert buckets[-1][0]["le"] == "+Inf" and values[-1] == count
+    assert _series(samples, "http_request_duration_seconds_count", route="unmatched", status="404")
+    assert _series(samples, "http_response_size_bytes_count", route="/items/{item_id}")
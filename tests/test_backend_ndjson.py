@@ -0,0 +1,66 @@
+"""
+Тесты потокового режима NDJSON для GET /sales веб-бэкенда
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from app.routers import sales as sales_router  # noqa: E402
+from app.serialization import iter_sales_ndjson  # noqa: E402
+from conftest import FakeProxyApi  # noqa: E402
+
+PARAMS = {"store_ids": [1, 2, 3], "start_date": "2024-03-01", "end_date": "2024-03-10"}
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize(
+    "params, headers",
+    [({"format": "ndjson"}, {}), ({}, {"Accept": "application/x-ndjson"})],
+)
+def test_ndjson_streams_one_record_per_line(backend_app, monkeypatch, params, headers):
+    monkeypatch.setattr(sales_router, "STREAM_BATCH_SIZE", 7)
+    client = backend_app(FakeProxyApi())
+
+    response = client.get("/sales", params={**PARAMS, **params}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = _lines(response)
+    assert len(records) == 30
+    assert set(records[0]) == {"store_name", "order_date", "allcup", "packages_kg", "total_cash"}
+
+    # Те же записи, что и в обычном JSON-ответе
+    items = client.get("/sales", params=PARAMS).json()["items"]
+    assert records == items
+
+
+def test_batches_split_rows_without_losing_any():
+    rows = [
+        {"STORE_NAME": "A", "ORDER_DATE": f"2024-01-{day:02d}", "ALLCUP": day, "TOTAL_CASH": 1.5, "PACKAGES_KG": None}
+        for day in range(1, 11)
+    ]
+    chunks = list(iter_sales_ndjson(rows, batch_size=3))
+    assert len(chunks) == 4
+    records = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [record["allcup"] for record in records] == list(range(1, 11))
+    assert records[0]["packages_kg"] == 0.0
+    assert records[0]["order_date"] == "2024-01-01T00:00:00"
+
+
+def test_malformed_row_is_reported_in_band():
+    """Заголовки уже отправлены: ошибка - последней строкой потока"""
+    rows = [
+        {"STORE_NAME": "A", "ORDER_DATE": "2024-01-01", "ALLCUP": 1},
+        {"STORE_NAME": "A", "ORDER_DATE": "2024-01-02", "ALLCUP": 1},
+        {"STORE_NAME": "A", "ORDER_DATE": "not a date", "ALLCUP": 1},
+    ]
+    chunks = list(iter_sales_ndjson(rows, batch_size=2))
+    assert len(chunks) == 2
+    assert len(chunks[0].splitlines()) == 2
+    assert json.loads(chunks[1]) == {"error": "Malformed sales record"}
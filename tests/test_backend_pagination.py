@@ -0,0 +1,163 @@
+"""
+Тесты keyset-пагинации продаж веб-бэкенда: /sales/page и app/pagination.py
+"""
+
+import asyncio
+import base64
+from datetime import date
+
+import pytest
+
+pytest.importorskip("orjson")
+
+from app.pagination import SORT_KEYS, InvalidCursor, SortedSales, SortedSalesCache  # noqa: E402
+from conftest import FakeProxyApi  # noqa: E402
+
+
+def _rows():
+    # Много одинаковых сумм: порядок держится на (магазин, день)
+    return [
+        {
+            "STORE_ID": store,
+            "STORE_NAME": f"S{store}",
+            "ORDER_DATE": f"2024-01-{day:02d}",
+            "TOTAL_CASH": (store * day) % 5,
+        }
+        for store in range(4)
+        for day in range(1, 26)
+    ]
+
+
+def _walk(sorted_sales, limit):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = sorted_sales.page(cursor, limit)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("sort", sorted(SORT_KEYS))
+@pytest.mark.parametrize("limit", [1, 7, 25, 100, 1000])
+def test_cursor_walk_has_no_duplicates_or_gaps(sort, limit):
+    rows = _rows()
+    sorted_sales = SortedSales(rows, sort)
+    pages = _walk(sorted_sales, limit)
+    walked = [row for page in pages for row in page]
+
+    assert len(walked) == len(rows)
+    assert len({(row["STORE_NAME"], row["ORDER_DATE"]) for row in walked}) == len(rows)
+    assert walked == sorted(rows, key=SORT_KEYS[sort])
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+@pytest.mark.parametrize("sort", sorted(SORT_KEYS))
+def test_same_named_stores_across_page_boundary(sort):
+    """Одноименные магазины за один день различаются по ID и не теряются на границе страниц"""
+    rows = [
+        {"STORE_ID": store_id, "STORE_NAME": "Кофейня", "ORDER_DATE": "2024-01-05", "TOTAL_CASH": 100}
+        for store_id in (7, 3, 5)
+    ]
+    rows.append({"STORE_ID": 1, "STORE_NAME": "Кофейня", "ORDER_DATE": "2024-01-04", "TOTAL_CASH": 100})
+    sorted_sales = SortedSales(rows, sort)
+
+    first, cursor = sorted_sales.page(None, 1)
+    second, cursor = sorted_sales.page(cursor, 2)
+    third, cursor = sorted_sales.page(cursor, 2)
+    assert cursor is None
+    walked = first + second + third
+    assert sorted(row["STORE_ID"] for row in walked) == [1, 3, 5, 7]
+    same_day = [row["STORE_ID"] for row in walked if row["ORDER_DATE"] == "2024-01-05"]
+    assert same_day == [3, 5, 7]
+
+
+def test_cursor_of_another_sort_is_rejected():
+    rows = _rows()
+    _, cursor = SortedSales(rows, "date").page(None, 10)
+    with pytest.raises(InvalidCursor):
+        SortedSales(rows, "store").page(cursor, 10)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-base64!",
+        base64.urlsafe_b64encode(b'["date", 5]').decode(),
+        base64.urlsafe_b64encode(b'["date", ["x", 1]]').decode(),
+    ],
+)
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        SortedSales(_rows(), "date").page(cursor, 10)
+
+
+def test_sorted_cache_builds_once():
+    cache = SortedSalesCache(ttl=60, max_entries=2)
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return SortedSales(_rows(), "date")
+
+    async def scenario():
+        first = await cache.get_or_build("a", build)
+        second = await cache.get_or_build("a", build)
+        await cache.get_or_build("b", build)
+        await cache.get_or_build("c", build)
+        await cache.get_or_build("a", build)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    # "a" вытеснен после "b" и "c"
+    assert len(builds) == 4
+
+
+@pytest.mark.parametrize("sort", ["date", "store", "total_cash"])
+def test_page_endpoint_walk(backend_app, sort):
+    pytest.importorskip("fastapi")
+    upstream = FakeProxyApi()
+    client = backend_app(upstream)
+    params = {"store_ids": [1, 2, 3], "start_date": "2024-01-01", "end_date": "2024-01-20", "sort": sort, "limit": 7}
+
+    items, cursor, pages = [], None, 0
+    while True:
+        page = client.get("/sales/page", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        assert page["total"] == 60
+        items.extend(page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 9
+    assert len({(item["store_name"], item["order_date"]) for item in items}) == len(items) == 60
+    # Сортировка сделана один раз, страницы берутся из кэша
+    assert len(upstream.queries) == 2
+
+
+def test_page_endpoint_keeps_same_named_stores_apart(backend_app):
+    pytest.importorskip("fastapi")
+    upstream = FakeProxyApi(stores=(1, 2))
+    upstream.stores[2] = upstream.stores[1]
+    client = backend_app(upstream)
+    params = {"store_ids": [1, 2], "start_date": "2024-01-01", "end_date": "2024-01-03", "sort": "store", "limit": 4}
+
+    first = client.get("/sales/page", params=params).json()
+    assert first["total"] == 6
+    second = client.get("/sales/page", params={**params, "cursor": first["next_cursor"]}).json()
+    assert second["next_cursor"] is None
+    items = first["items"] + second["items"]
+    assert len(items) == 6
+    assert {item["store_name"] for item in items} == {upstream.stores[1]}
+    # Каждый магазин - своя строка за день, суммы не сложены
+    assert sorted(item["total_cash"] for item in items) == sorted(
+        FakeProxyApi.cash(store_id, date(2024, 1, day)) for store_id in (1, 2) for day in (1, 2, 3)
+    )
+
+
+def test_page_endpoint_rejects_bad_cursor(backend_app):
+    pytest.importorskip("fastapi")
+    client = backend_app(FakeProxyApi())
+    params = {"store_ids": [1], "start_date": "2024-01-01", "end_date": "2024-01-05", "cursor": "garbage"}
+    assert client.get("/sales/page", params=params).status_code == 400
@@ -0,0 +1,100 @@
+"""
+Тесты клиента Proxy API веб-бэкенда: параллельные запросы и объединение одинаковых (single-flight)
+"""
+
+import asyncio
+import time
+from datetime import date
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from app import deadline  # noqa: E402
+from app.proxy_client import ProxyApiTimeout  # noqa: E402
+from conftest import FakeProxyApi  # noqa: E402
+
+
+def test_sales_statements_run_concurrently(proxy_client_factory):
+    upstream = FakeProxyApi(delay=0.2)
+    client = proxy_client_factory(upstream.handler)
+
+    started = time.monotonic()
+    rows = asyncio.run(client.get_sales([1, 2], "2024-01-01", "2024-01-03"))
+    assert time.monotonic() - started < 0.35
+    assert len(upstream.queries) == 2
+    assert len(rows) == 6
+    row = next(row for row in rows if row["STORE_ID"] == 2 and row["ORDER_DATE"] == "2024-01-02")
+    assert row["ALLCUP"] == FakeProxyApi.cups(2, date(2024, 1, 2))
+    assert "PACKAGES_KG" in row
+
+
+def test_identical_concurrent_calls_share_one_upstream_call(proxy_client_factory):
+    upstream = FakeProxyApi(delay=0.05)
+    client = proxy_client_factory(upstream.handler)
+
+    async def scenario():
+        return await asyncio.gather(
+            client.get_sales([1, 2], "2024-01-01", "2024-01-03"),
+            client.get_sales([2, 1, 1], "2024-01-01", "2024-01-03"),
+            client.get_sales([1, 2], "2024-01-01", "2024-01-03"),
+        )
+
+    first, second, third = asyncio.run(scenario())
+    assert first == second == third
+    assert len(upstream.queries) == 2
+    # Завершенный вызов не остается в таблице
+    assert client._inflight == {}
+
+
+def test_different_calls_are_not_coalesced(proxy_client_factory):
+    upstream = FakeProxyApi()
+    client = proxy_client_factory(upstream.handler)
+
+    async def scenario():
+        await asyncio.gather(
+            client.get_sales([1], "2024-01-01", "2024-01-03"),
+            client.get_sales([1], "2024-01-01", "2024-01-04"),
+        )
+
+    asyncio.run(scenario())
+    assert len(upstream.queries) == 4
+
+
+def test_cancelled_caller_does_not_cancel_shared_call(proxy_client_factory):
+    upstream = FakeProxyApi(delay=0.1)
+    client = proxy_client_factory(upstream.handler)
+
+    async def scenario():
+        first = asyncio.ensure_future(client.get_sales([1], "2024-01-01", "2024-01-02"))
+        second = asyncio.ensure_future(client.get_sales([1], "2024-01-01", "2024-01-02"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        rows = await second
+        assert first.cancelled()
+        return rows
+
+    assert len(asyncio.run(scenario())) == 2
+    assert len(upstream.queries) == 2
+
+
+def test_waiter_with_short_budget_stops_waiting(proxy_client_factory):
+    """Вызов с меньшим бюджетом не ждет общий запрос дольше своего бюджета"""
+    upstream = FakeProxyApi(delay=0.3)
+    client = proxy_client_factory(upstream.handler)
+
+    async def with_budget(budget):
+        token = deadline.start(budget)
+        try:
+            return await client.get_sales([1], "2024-01-01", "2024-01-02")
+        finally:
+            deadline.reset(token)
+
+    async def scenario():
+        return await asyncio.gather(with_budget(5), with_budget(0.1), return_exceptions=True)
+
+    started = time.monotonic()
+    patient, hurried = asyncio.run(scenario())
+    assert isinstance(hurried, ProxyApiTimeout)
+    assert len(patient) == 2
+    assert time.monotonic() - started < 1
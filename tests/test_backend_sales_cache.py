@@ -0,0 +1,121 @@
+"""
+Тесты кэша продаж по ячейкам (магазин, день) веб-бэкенда: web/backend/app/sales_cache.py
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from app.proxy_client import ProxyApiUnavailable  # noqa: E402
+from app.sales_cache import SalesCache  # noqa: E402
+
+
+class FakeClient:
+    """Вместо ProxyApiClient: строка на каждый магазин и день, запросы записываются"""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    async def get_sales(self, store_ids, start_date, end_date):
+        self.calls.append((tuple(store_ids), start_date, end_date))
+        if self.fail:
+            raise ProxyApiUnavailable("down")
+        day, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        rows = []
+        while day <= end:
+            for store_id in store_ids:
+                rows.append({
+                    "STORE_ID": store_id,
+                    "STORE_NAME": f"store{store_id}",
+                    "ORDER_DATE": day.isoformat(),
+                    "ALLCUP": 1,
+                    "TOTAL_CASH": 10.0,
+                    "PACKAGES_KG": 0.5,
+                })
+            day += timedelta(days=1)
+        return rows
+
+
+def _get(cache, client, stores, start, end):
+    return asyncio.run(cache.get_sales(client, stores, start, end))
+
+
+def test_full_hit_does_not_query_upstream():
+    """Повторный запрос того же окна собирается из кэша"""
+    cache, client = SalesCache(max_bytes=10 ** 7, today_ttl=60), FakeClient()
+    first = _get(cache, client, [1, 2], "2024-01-01", "2024-01-10")
+    second = _get(cache, client, [1, 2], "2024-01-01", "2024-01-10")
+    assert first == second
+    assert len(second) == 20
+    assert len(client.calls) == 1
+
+
+def test_gap_fetches_only_missing_runs():
+    """Закэшированные дни по краям диапазона не загружаются повторно"""
+    cache, client = SalesCache(max_bytes=10 ** 7, today_ttl=60), FakeClient()
+    _get(cache, client, [1], "2024-01-01", "2024-01-03")
+    _get(cache, client, [1], "2024-01-08", "2024-01-10")
+    client.calls.clear()
+
+    rows = _get(cache, client, [1], "2024-01-01", "2024-01-10")
+    assert client.calls == [((1,), "2024-01-04", "2024-01-07")]
+    assert [row["ORDER_DATE"] for row in rows] == [
+        (date(2024, 1, 1) + timedelta(days=offset)).isoformat() for offset in range(10)
+    ]
+
+
+def test_runs_are_fetched_per_store_and_concurrently():
+    """Разные пропуски у разных магазинов - отдельные запросы только по ним"""
+    cache, client = SalesCache(max_bytes=10 ** 7, today_ttl=60), FakeClient()
+    _get(cache, client, [1], "2024-01-01", "2024-01-05")
+    _get(cache, client, [2], "2024-01-03", "2024-01-05")
+    client.calls.clear()
+
+    rows = _get(cache, client, [1, 2, 3], "2024-01-01", "2024-01-05")
+    assert sorted(client.calls) == [
+        ((2,), "2024-01-01", "2024-01-02"),
+        ((3,), "2024-01-01", "2024-01-05"),
+    ]
+    assert len(rows) == 15
+
+
+def test_byte_budget_evicts_least_recently_used():
+    """Бюджет памяти соблюдается, вытесняются давно не используемые ячейки"""
+    cache, client = SalesCache(max_bytes=10 ** 7, today_ttl=60), FakeClient()
+    _get(cache, client, [1], "2024-01-01", "2024-01-01")
+    cell_size = cache.stats()["bytes"]
+    cache = SalesCache(max_bytes=cell_size * 3, today_ttl=60)
+
+    _get(cache, client, [1], "2024-01-01", "2024-01-03")
+    _get(cache, client, [1], "2024-01-01", "2024-01-01")  # 1 января становится самым свежим
+    _get(cache, client, [1], "2024-01-04", "2024-01-04")
+    stats = cache.stats()
+    assert stats["bytes"] <= cell_size * 3
+    assert stats["evictions"] == 1
+
+    client.calls.clear()
+    _get(cache, client, [1], "2024-01-01", "2024-01-01")
+    assert client.calls == []
+    _get(cache, client, [1], "2024-01-02", "2024-01-02")
+    assert client.calls == [((1,), "2024-01-02", "2024-01-02")]
+
+
+def test_stale_cells_served_when_upstream_fails():
+    """С serve_stale просроченные ячейки отдаются, пока Proxy API недоступен"""
+    today = date.today().isoformat()
+    cache, client = SalesCache(max_bytes=10 ** 7, today_ttl=0, serve_stale=True), FakeClient()
+    fresh = _get(cache, client, [1], today, today)
+    client.fail = True
+    assert _get(cache, client, [1], today, today) == fresh
+    assert cache.stats()["stale_served"] == 1
+
+    strict = SalesCache(max_bytes=10 ** 7, today_ttl=0)
+    client.fail = False
+    _get(strict, client, [1], today, today)
+    client.fail = True
+    with pytest.raises(ProxyApiUnavailable):
+        _get(strict, client, [1], today, today)
@@ -0,0 +1,117 @@
+"""
+Тесты локального хранилища дневных агрегатов и фоновой синхронизации веб-бэкенда:
+web/backend/app/sales_store.py
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from app import deps  # noqa: E402
+from app.sales_store import SalesMaterializer, SalesStore, date_chunks  # noqa: E402
+from conftest import FakeProxyApi  # noqa: E402
+
+
+def _row(store_id, day, allcup=1.0):
+    return {
+        "STORE_ID": store_id,
+        "STORE_NAME": f"Магазин {store_id}",
+        "ORDER_DATE": day.isoformat(),
+        "ALLCUP": allcup,
+        "PACKAGES_KG": None,
+        "TOTAL_CASH": 10,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SalesStore(str(tmp_path / "sales.sqlite"))
+
+
+def test_date_chunks_cover_range_without_overlap():
+    chunks = list(date_chunks(date(2024, 1, 1), date(2024, 1, 10), 4))
+    assert chunks == [
+        (date(2024, 1, 1), date(2024, 1, 4)),
+        (date(2024, 1, 5), date(2024, 1, 8)),
+        (date(2024, 1, 9), date(2024, 1, 10)),
+    ]
+    assert list(date_chunks(date(2024, 1, 2), date(2024, 1, 1), 4)) == []
+
+
+def test_uncovered_range_is_not_served(store):
+    start, end = date(2024, 1, 1), date(2024, 1, 5)
+    assert store.get_sales([1], start, end) is None
+    store.replace_range({1: "Магазин 1"}, start, end, [_row(1, start)])
+    assert store.get_sales([1], start, end) is not None
+    # Выход за синхронизированное окно или несинхронизированный магазин - живой путь
+    assert store.get_sales([1], start, end + timedelta(days=1)) is None
+    assert store.get_sales([1, 2], start, end) is None
+
+
+def test_replace_range_drops_stale_cells(store):
+    start, end = date(2024, 1, 1), date(2024, 1, 3)
+    store.replace_range({1: "Магазин 1"}, start, end, [_row(1, start), _row(1, end)])
+    # Документ за 3-е число удален в источнике
+    store.replace_range({1: "Магазин 1"}, end, end, [])
+    rows = store.get_sales([1], start, end)
+    assert [row["ORDER_DATE"] for row in rows] == ["2024-01-01"]
+    assert rows[0]["PACKAGES_KG"] == 0.0
+    assert store.synced_stores()[1][1:] == (start, end)
+
+
+def test_materializer_backfills_then_refreshes_recent_days(store, proxy_client_factory):
+    upstream = FakeProxyApi(stores=(1, 2))
+    client = proxy_client_factory(upstream.handler)
+    materializer = SalesMaterializer(store, client, backfill_days=10, refresh_days=2, refresh_interval=60, chunk_days=4)
+    today = date.today()
+
+    asyncio.run(materializer.sync_once())
+    sales_queries = [params for query, params in upstream.queries if "STORZAKAZDT" in query]
+    # 10 дней порциями по 4: три порции, по два запроса на каждую
+    assert len(sales_queries) == 6
+    assert store.stats()["cells"] == 20
+    rows = store.get_sales([1, 2], today - timedelta(days=9), today)
+    assert len(rows) == 20
+    first = next(row for row in rows if row["STORE_ID"] == 2)
+    assert first["ALLCUP"] == FakeProxyApi.cups(2, date.fromisoformat(first["ORDER_DATE"]))
+
+    upstream.queries.clear()
+    asyncio.run(materializer.sync_once())
+    refresh = [params for query, params in upstream.queries if "STORZAKAZDT" in query]
+    assert {tuple(params[-2:]) for params in refresh} == {((today - timedelta(days=1)).isoformat(), today.isoformat())}
+    assert materializer.last_error is None
+
+
+def test_materializer_keeps_running_after_failure(store, proxy_client_factory):
+    client = proxy_client_factory(lambda request: httpx.Response(400, json={"error": "bad"}), max_retries=0)
+    materializer = SalesMaterializer(store, client, backfill_days=3, refresh_days=1, refresh_interval=0.01)
+
+    async def scenario():
+        task = asyncio.create_task(materializer.run_forever())
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert "400" in materializer.last_error
+
+
+def test_endpoints_read_covered_ranges_from_store(store, backend_app):
+    pytest.importorskip("fastapi")
+    start, end = date(2024, 1, 1), date(2024, 1, 2)
+    store.replace_range({1: "Магазин 1"}, start, end, [_row(1, start, 5), _row(1, end, 7)])
+    upstream = FakeProxyApi()
+    client = backend_app(upstream)
+    client.app.dependency_overrides[deps.get_sales_store] = lambda: store
+
+    params = {"store_ids": [1], "start_date": start.isoformat(), "end_date": end.isoformat()}
+    assert client.get("/sales/summary", params=params).json()["allcup"] == 12.0
+    assert upstream.queries == []
+
+    # Диапазон шире синхронизированного - через Proxy API
+    client.get("/sales/summary", params={**params, "end_date": "2024-01-03"})
+    assert len(upstream.queries) == 2
@@ -0,0 +1,69 @@
+"""
+Тесты быстрой сериализации продаж веб-бэкенда (orjson, формат columnar): web/backend/app/serialization.py
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("orjson")
+
+from app.schemas import SalesRecord, SalesResponse  # noqa: E402
+from app.serialization import (  # noqa: E402
+    SALES_COLUMNS,
+    MalformedSalesRow,
+    coerce_sales_rows,
+    encode_sales_columnar,
+    encode_sales_json,
+)
+from conftest import FakeProxyApi  # noqa: E402
+
+ROWS = [
+    {"STORE_NAME": "Магазин 1", "ORDER_DATE": "2024-01-01", "ALLCUP": 12, "TOTAL_CASH": "150.5", "PACKAGES_KG": 0.25},
+    {"STORE_NAME": "Магазин 2", "ORDER_DATE": "2024-01-01T00:00:00", "ALLCUP": None, "TOTAL_CASH": 0},
+    {"STORE_NAME": "Магазин 1", "ORDER_DATE": "2024-01-02", "ALLCUP": "3", "TOTAL_CASH": 10, "PACKAGES_KG": 1},
+]
+
+
+def test_json_matches_pydantic_response():
+    """Быстрый путь дает тот же JSON, что и SalesResponse"""
+    columns = coerce_sales_rows(ROWS)
+    fast = json.loads(encode_sales_json(columns))
+    records = [
+        SalesRecord(
+            store_name=row["STORE_NAME"],
+            order_date=row["ORDER_DATE"],
+            allcup=row.get("ALLCUP") or 0,
+            packages_kg=row.get("PACKAGES_KG") or 0,
+            total_cash=row.get("TOTAL_CASH") or 0,
+        )
+        for row in ROWS
+    ]
+    slow = SalesResponse(items=records, count=len(records)).model_dump(mode="json")
+    assert fast == slow
+
+
+def test_columnar_shape():
+    payload = json.loads(encode_sales_columnar(coerce_sales_rows(ROWS)))
+    assert payload["columns"] == SALES_COLUMNS
+    assert payload["count"] == 3
+    assert payload["data"][0] == ["Магазин 1", "2024-01-01T00:00:00", 12.0, 0.25, 150.5]
+    assert payload["data"][1][2:] == [0.0, 0.0, 0.0]
+
+
+def test_malformed_row_names_the_row():
+    rows = ROWS + [{"STORE_NAME": "X", "ORDER_DATE": "2024-01-03", "ALLCUP": "many"}]
+    with pytest.raises(MalformedSalesRow) as excinfo:
+        coerce_sales_rows(rows)
+    assert excinfo.value.row is rows[-1]
+
+
+def test_columnar_endpoint_matches_json(backend_app):
+    pytest.importorskip("fastapi")
+    client = backend_app(FakeProxyApi())
+    params = {"store_ids": [1, 2], "start_date": "2024-01-01", "end_date": "2024-01-05"}
+
+    items = client.get("/sales", params=params).json()["items"]
+    columnar = client.get("/sales", params={**params, "format": "columnar"}).json()
+    assert columnar["count"] == len(items) == 10
+    assert [dict(zip(columnar["columns"], row)) for row in columnar["data"]] == items
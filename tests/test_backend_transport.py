@@ -0,0 +1,172 @@
+"""
+Тесты транспорта клиента Proxy API веб-бэкенда: повторы с backoff, Retry-After,
+бюджет запроса (deadline) и смена токена
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from app import deadline  # noqa: E402
+from app.proxy_client import (  # noqa: E402
+    ProxyApiAuthError,
+    ProxyApiBudgetExceeded,
+    ProxyApiError,
+    ProxyApiServerError,
+    ProxyApiTimeout,
+    ProxyApiUnavailable,
+    _parse_retry_after,
+)
+
+
+class Script:
+    """Обработчик MockTransport: ответы по порядку, запросы записываются"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.requests = []
+        self.times = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        self.times.append(time.monotonic())
+        step = self.steps.pop(0) if len(self.steps) > 1 else self.steps[0]
+        if isinstance(step, Exception):
+            raise step
+        return step
+
+
+def ok():
+    return httpx.Response(200, json={"status": "ok"})
+
+
+def _run_with_budget(coro_factory, budget):
+    async def scenario():
+        token = deadline.start(budget)
+        try:
+            return await coro_factory()
+        finally:
+            deadline.reset(token)
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried(proxy_client_factory, status):
+    script = Script(httpx.Response(status), ok())
+    client = proxy_client_factory(script, max_retries=2)
+    assert asyncio.run(client.health()) == {"status": "ok"}
+    assert len(script.requests) == 2
+
+
+def test_connection_error_is_retried(proxy_client_factory):
+    script = Script(httpx.ConnectError("refused"), httpx.ReadError("reset"), ok())
+    client = proxy_client_factory(script, max_retries=2)
+    assert asyncio.run(client.health()) == {"status": "ok"}
+    assert len(script.requests) == 3
+
+
+def test_retries_are_bounded(proxy_client_factory):
+    script = Script(httpx.Response(503))
+    client = proxy_client_factory(script, max_retries=2)
+    with pytest.raises(ProxyApiServerError):
+        asyncio.run(client.health())
+    assert len(script.requests) == 3
+
+    script = Script(httpx.ConnectError("refused"))
+    client = proxy_client_factory(script, max_retries=1)
+    with pytest.raises(ProxyApiUnavailable):
+        asyncio.run(client.health())
+    assert len(script.requests) == 2
+
+
+def test_client_error_is_not_retried(proxy_client_factory):
+    script = Script(httpx.Response(400, json={"error": "bad query"}))
+    client = proxy_client_factory(script, max_retries=3)
+    with pytest.raises(ProxyApiError) as excinfo:
+        asyncio.run(client.execute_query("SELECT 1 FROM RDB$DATABASE"))
+    assert not isinstance(excinfo.value, ProxyApiServerError)
+    assert len(script.requests) == 1
+
+
+def test_writes_are_not_retried(proxy_client_factory):
+    script = Script(httpx.Response(503), httpx.Response(200, json={"success": True, "data": []}))
+    client = proxy_client_factory(script, max_retries=3)
+    with pytest.raises(ProxyApiServerError):
+        asyncio.run(client.execute_query("UPDATE GOODS SET NAME = ? WHERE ID = ?", [1, 2]))
+    assert len(script.requests) == 1
+
+
+def test_retry_after_is_honoured(proxy_client_factory):
+    script = Script(httpx.Response(429, headers={"Retry-After": "0.2"}), ok())
+    client = proxy_client_factory(script, max_retries=1, backoff_base=0)
+    asyncio.run(client.health())
+    assert script.times[1] - script.times[0] >= 0.2
+
+
+def test_retry_after_beyond_budget_gives_up(proxy_client_factory):
+    """Повтор, который не укладывается в бюджет, не делается"""
+    script = Script(httpx.Response(503, headers={"Retry-After": "30"}), ok())
+    client = proxy_client_factory(script, max_retries=3)
+    started = time.monotonic()
+    with pytest.raises(ProxyApiServerError):
+        _run_with_budget(client.health, 1.0)
+    assert time.monotonic() - started < 0.5
+    assert len(script.requests) == 1
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after(None) is None
+    assert _parse_retry_after("3") == 3.0
+    assert _parse_retry_after("-1") == 0.0
+    assert _parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= _parse_retry_after(later) <= 60
+
+
+def test_attempt_timeout_and_header_follow_budget(proxy_client_factory):
+    script = Script(ok())
+    client = proxy_client_factory(script, timeout=30)
+    _run_with_budget(client.health, 2.0)
+    forwarded = float(script.requests[0].headers["X-Request-Timeout"])
+    assert 1.5 < forwarded <= 2.0
+    assert script.requests[0].extensions["timeout"]["read"] == pytest.approx(forwarded, abs=0.01)
+
+    asyncio.run(client.health())
+    assert float(script.requests[1].headers["X-Request-Timeout"]) == 30.0
+
+
+def test_spent_budget_fails_without_calling(proxy_client_factory):
+    script = Script(ok())
+    client = proxy_client_factory(script)
+    with pytest.raises(ProxyApiBudgetExceeded):
+        _run_with_budget(client.health, 0)
+    assert script.requests == []
+
+
+def test_read_timeout_becomes_proxy_timeout(proxy_client_factory):
+    script = Script(httpx.ReadTimeout("slow"))
+    client = proxy_client_factory(script, max_retries=1)
+    with pytest.raises(ProxyApiTimeout):
+        asyncio.run(client.health())
+    assert len(script.requests) == 2
+
+
+def test_unauthorized_switches_to_fallback_token(proxy_client_factory):
+    script = Script(httpx.Response(401), ok())
+    client = proxy_client_factory(script, fallback_token="fallback")
+    assert asyncio.run(client.health()) == {"status": "ok"}
+    assert [request.headers["Authorization"] for request in script.requests] == [
+        "Bearer test-token",
+        "Bearer fallback",
+    ]
+
+    script = Script(httpx.Response(401))
+    client = proxy_client_factory(script)
+    with pytest.raises(ProxyApiAuthError):
+        asyncio.run(client.health())
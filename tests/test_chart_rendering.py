@@ -0,0 +1,109 @@
+"""
+Тесты рендеринга графиков: src/chart_rendering.py и черновой режим
+CoffeeAnalysis.create_sales_charts / render_reports (DRAFT_DPI против CHART_DPI)
+"""
+
+import struct
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+matplotlib = pytest.importorskip("matplotlib")
+pytest.importorskip("seaborn")
+
+matplotlib.use("Agg")
+
+from src import chart_rendering  # noqa: E402
+from src.chart_rendering import CHART_DPI, DRAFT_DPI, render_charts  # noqa: E402
+from src.coffee_analysis import CoffeeAnalysis  # noqa: E402
+from test_coffee_analysis_cube import _sales_rows  # noqa: E402
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+INCH = 0.0254
+
+
+def _png_dpi(path):
+    """DPI из чанка pHYs (пиксели на метр) - Pillow для проверки не нужен"""
+    with open(path, "rb") as file:
+        data = file.read()
+    assert data[:8] == PNG_SIGNATURE
+    offset = 8
+    while offset < len(data):
+        length, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        if kind == b"pHYs":
+            x, y, unit = struct.unpack(">IIB", data[offset + 8:offset + 17])
+            assert unit == 1
+            return round(x * INCH), round(y * INCH)
+        offset += length + 12
+    raise AssertionError(f"{path}: нет чанка pHYs")
+
+
+def _png_size(path):
+    with open(path, "rb") as file:
+        header = file.read(24)
+    return struct.unpack(">II", header[16:24])
+
+
+@pytest.fixture
+def values():
+    return pd.Series([120.0, 80.5, 42.0], index=["Центр", "Вокзал", "Парк"])
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_render_charts_saves_files_at_job_dpi(tmp_path, values, max_workers):
+    jobs = [
+        ("store_sales", values, str(tmp_path / "stores.png"), 40),
+        ("top_products", values, str(tmp_path / "products.png"), 80),
+        ("monthly_sales", values.reset_index(drop=True), str(tmp_path / "months.png"), 40),
+    ]
+    # Пути возвращаются в порядке заданий, в том числе из пула процессов
+    assert render_charts(jobs, max_workers=max_workers) == [job[2] for job in jobs]
+    for _, _, path, dpi in jobs:
+        assert _png_dpi(path) == (dpi, dpi)
+    # Тот же график при вдвое большем DPI - примерно вдвое больше пикселей по стороне
+    width_low, _ = _png_size(jobs[0][2])
+    render_charts([("store_sales", values, str(tmp_path / "stores_hi.png"), 80)], max_workers=1)
+    width_high, _ = _png_size(tmp_path / "stores_hi.png")
+    assert width_high == pytest.approx(2 * width_low, rel=0.05)
+
+
+def test_render_charts_rejects_unknown_kind(tmp_path, values):
+    assert render_charts([]) == []
+    with pytest.raises(ValueError, match="Неизвестный вид графика"):
+        render_charts([("pie", values, str(tmp_path / "pie.png"), 40)], max_workers=1)
+
+
+def test_init_worker_selects_agg(monkeypatch):
+    selected = []
+    monkeypatch.setattr(matplotlib, "use", selected.append)
+    chart_rendering._init_worker()
+    assert selected == ["Agg"]
+
+
+@pytest.fixture
+def analysis():
+    analysis = CoffeeAnalysis(db_connector=None)
+    analysis.sales_data = _sales_rows()
+    return analysis
+
+
+def test_draft_charts_use_draft_dpi(analysis, tmp_path):
+    analysis.create_sales_charts(str(tmp_path), draft=True, max_workers=1)
+    for name in ("sales_by_store.png", "top_products.png", "sales_by_month.png"):
+        assert _png_dpi(tmp_path / name) == (DRAFT_DPI, DRAFT_DPI)
+
+
+@pytest.mark.parametrize("draft, dpi", [(True, DRAFT_DPI), (False, CHART_DPI)])
+def test_render_reports_passes_dpi(analysis, tmp_path, monkeypatch, draft, dpi):
+    calls = []
+    monkeypatch.setattr(
+        "src.coffee_analysis.render_charts", lambda jobs, max_workers=None: calls.append((jobs, max_workers))
+    )
+    analysis.render_reports(str(tmp_path), draft=draft, max_workers=1)
+
+    [(jobs, max_workers)] = calls
+    assert max_workers == 1
+    assert [job[0] for job in jobs] == ["store_sales", "top_products", "monthly_sales", "dashboard"]
+    assert [job[3] for job in jobs[:-1]] == [dpi] * 3
+    # Дашборд - HTML, черновой режим его не касается
+    assert jobs[-1][2].endswith("coffee_dashboard.html")
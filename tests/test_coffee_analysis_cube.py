@@ -0,0 +1,159 @@
+"""
+Тесты куба продаж CoffeeAnalysis: src/coffee_analysis.py
+(свертки куба против группировок исходных строк, сохранение и загрузка куба)
+
+БД не нужна: строки продаж задаются синтетическим DataFrame.
+"""
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.coffee_analysis import CoffeeAnalysis  # noqa: E402
+
+STORES = {1: "Центр", 2: "Вокзал", 3: None}
+GOODS = {10: ("Латте", "Кофе с молоком"), 11: ("Эспрессо", "Черный кофе"), 12: ("Раф", None)}
+
+
+def _sales_rows(count=400, seed=3):
+    """Строки как после load_data: несколько магазинов, товаров и дней, пустые названия"""
+    rng = np.random.default_rng(seed)
+    store_ids = rng.choice(list(STORES), count)
+    good_ids = rng.choice(list(GOODS), count)
+    # Несколько продаж в один день в разное время - куб сворачивает их в день
+    order_dates = pd.Timestamp("2023-11-15") + pd.to_timedelta(rng.integers(0, 120 * 24, count), unit="h")
+    quantity = rng.integers(1, 5, count).astype(float)
+    price = rng.choice([120.0, 150.5, 180.25], count)
+    data = pd.DataFrame(
+        {
+            "STORE_ID": store_ids,
+            "STORE_NAME": [STORES[store_id] for store_id in store_ids],
+            "GODSID": good_ids,
+            "GOOD_NAME": [GOODS[good_id][0] for good_id in good_ids],
+            "GROUP_NAME": [GOODS[good_id][1] for good_id in good_ids],
+            "ORDER_DATE": order_dates,
+            "QUANTITY": quantity,
+            "PRICE": price,
+            "TOTAL_SUM": quantity * price,
+        }
+    )
+    data["YEAR"] = data["ORDER_DATE"].dt.year
+    data["MONTH"] = data["ORDER_DATE"].dt.month
+    data["QUARTER"] = data["ORDER_DATE"].dt.quarter
+    return data
+
+
+@pytest.fixture
+def analysis():
+    analysis = CoffeeAnalysis(db_connector=None)
+    analysis.sales_data = _sales_rows()
+    return analysis
+
+
+def test_cube_is_coarser_than_rows(analysis):
+    cube = analysis.build_cube()
+    rows = analysis.sales_data
+    assert len(cube) < len(rows)
+    assert list(cube.columns[:len(CoffeeAnalysis.CUBE_DIMENSIONS)]) == CoffeeAnalysis.CUBE_DIMENSIONS
+    # Строки без названия магазина или группы не теряются
+    assert cube["LINES"].sum() == len(rows)
+    assert cube["TOTAL_SUM"].sum() == pytest.approx(rows["TOTAL_SUM"].sum())
+    assert (cube["DAY"] == cube["DAY"].dt.normalize()).all()
+    for column in CoffeeAnalysis.CUBE_CATEGORICAL:
+        assert isinstance(cube[column].dtype, pd.CategoricalDtype)
+
+
+def test_summary_matches_rows(analysis):
+    rows = analysis.sales_data
+    summary = analysis.get_sales_summary()
+    assert summary["total_sales"] == pytest.approx(rows["TOTAL_SUM"].sum())
+    assert summary["total_quantity"] == pytest.approx(rows["QUANTITY"].sum())
+    assert summary["total_orders"] == len(rows)
+    assert summary["unique_products"] == rows["GODSID"].nunique()
+    assert summary["unique_stores"] == rows["STORE_ID"].nunique()
+    assert summary["date_range"]["start"] == rows["ORDER_DATE"].min().normalize()
+    assert summary["date_range"]["end"] == rows["ORDER_DATE"].max().normalize()
+    assert summary["avg_order_value"] == pytest.approx(rows["TOTAL_SUM"].mean())
+    assert summary["avg_price"] == pytest.approx(rows["PRICE"].mean())
+
+
+def _assert_same(actual, expected):
+    """Одинаковые группы и значения; порядок при равных суммах не важен
+
+    Уровни индекса сверток куба - category, у группировки строк - строки.
+    """
+    actual = actual.set_axis(pd.Index(actual.index.tolist(), name=actual.index.name, tupleize_cols=True))
+    actual.index.names = expected.index.names
+    pd.testing.assert_frame_equal(
+        actual.sort_index(), expected.sort_index(), check_dtype=False, check_index_type=False
+    )
+
+
+def test_sales_by_store_matches_rows(analysis):
+    rows = analysis.sales_data
+    expected = rows.groupby(["STORE_ID", "STORE_NAME"]).agg(
+        {"TOTAL_SUM": "sum", "QUANTITY": "sum", "GODSID": "nunique", "ORDER_DATE": "count"}
+    ).round(2)
+    expected.columns = ["Общая_сумма", "Общее_количество", "Уникальных_товаров", "Количество_продаж"]
+
+    actual = analysis.sales_by_store()
+    _assert_same(actual, expected)
+    # Магазин без названия в разрез не попадает, как и при группировке строк
+    assert 3 not in actual.index.get_level_values("STORE_ID")
+    assert actual["Общая_сумма"].is_monotonic_decreasing
+
+
+def test_sales_by_product_matches_rows(analysis):
+    rows = analysis.sales_data
+    expected = rows.groupby(["GODSID", "GOOD_NAME", "GROUP_NAME"]).agg(
+        {"TOTAL_SUM": "sum", "QUANTITY": "sum", "ORDER_DATE": "count"}
+    ).round(2)
+    expected.columns = ["Общая_сумма", "Общее_количество", "Количество_продаж"]
+
+    _assert_same(analysis.sales_by_product(top_n=len(GOODS)), expected)
+    [top] = analysis.sales_by_product(top_n=1).index
+    assert top == expected["Общая_сумма"].idxmax()
+
+
+@pytest.mark.parametrize("period, group_col", [("month", "MONTH"), ("quarter", "QUARTER"), ("year", "YEAR")])
+def test_sales_by_time_period_matches_rows(analysis, period, group_col):
+    rows = analysis.sales_data
+    expected = rows.groupby(group_col).agg({"TOTAL_SUM": "sum", "QUANTITY": "sum", "ORDER_DATE": "count"}).round(2)
+    expected.columns = ["Общая_сумма", "Общее_количество", "Количество_продаж"]
+
+    actual = analysis.sales_by_time_period(period)
+    assert actual.index.name == {"month": "Месяц", "quarter": "Квартал", "year": "Год"}[period]
+    _assert_same(actual.rename_axis(group_col), expected)
+
+
+def test_unobserved_categories_are_not_reported(analysis):
+    analysis.sales_data = analysis.sales_data[analysis.sales_data["STORE_ID"] != 2]
+    cube = analysis.build_cube()
+    # Категория, которой нет в строках, не дает пустых групп в свертках
+    cube["STORE_NAME"] = cube["STORE_NAME"].cat.add_categories(["Закрытый"])
+    assert list(analysis.sales_by_store().index.get_level_values("STORE_NAME")) == ["Центр"]
+
+
+def test_cube_round_trip(analysis, tmp_path):
+    expected_store = analysis.sales_by_store()
+    expected_summary = analysis.get_sales_summary()
+    path = tmp_path / "cubes" / "coffee.pkl"
+    analysis.save_cube(str(path))
+
+    restored = CoffeeAnalysis(db_connector=None)
+    restored.load_cube(str(path))
+    pd.testing.assert_frame_equal(restored.cube, analysis.cube)
+    pd.testing.assert_frame_equal(restored.sales_by_store(), expected_store)
+    assert restored.get_sales_summary() == expected_summary
+
+
+def test_load_cube_rejects_other_frames(tmp_path):
+    path = tmp_path / "rows.pkl"
+    _sales_rows(count=10).to_pickle(path)
+
+    analysis = CoffeeAnalysis(db_connector=None)
+    with pytest.raises(ValueError, match="не является кубом"):
+        analysis.load_cube(str(path))
+    with pytest.raises(Exception, match="Данные не загружены"):
+        analysis.get_sales_summary()
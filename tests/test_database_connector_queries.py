@@ -0,0 +1,99 @@
+"""
+Проверка SQL-запросов продаж DatabaseConnector: src/database_connector.py
+(число параметров магазинов, список групп кофе, сортировка)
+
+Запросы не выполняются: execute_query подменяется и записывает запрос и параметры.
+"""
+
+import re
+
+import pytest
+
+pytest.importorskip("fdb")
+pytest.importorskip("pandas")
+
+from src.database_connector import DatabaseConnector  # noqa: E402
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    connector = DatabaseConnector(db_path="test.fdb")
+    connector.executed = []
+    monkeypatch.setattr(
+        connector, "execute_query", lambda query, params=None: connector.executed.append((query, params))
+    )
+    return connector
+
+
+def _store_placeholders(query):
+    return re.search(r"sz\.STORGRPID IN \(([^)]*)\)", query).group(1)
+
+
+def _group_ids(query):
+    """Группы из фильтра WHERE (последнее условие g.OWNER IN)"""
+    matches = re.findall(r"g\.OWNER IN \(([^)]*)\)", query)
+    return tuple(value.strip("'") for value in matches[-1].split(",")) if matches else None
+
+
+def test_coffee_groups_are_flattened_in_order():
+    assert DatabaseConnector.COFFEE_GROUP_IDS == tuple(
+        group_id for ids in DatabaseConnector.COFFEE_GROUPS.values() for group_id in ids
+    )
+    assert len(set(DatabaseConnector.COFFEE_GROUP_IDS)) == len(DatabaseConnector.COFFEE_GROUP_IDS)
+
+
+def test_sql_list_quotes_every_id():
+    assert DatabaseConnector._sql_list(("1", "22")) == "'1','22'"
+
+
+@pytest.mark.parametrize("store_count", [1, 3, 6])
+def test_placeholders_match_store_count(connector, store_count):
+    query = connector._sales_query(store_count)
+    assert _store_placeholders(query) == ",".join("?" * store_count)
+    # Магазины и две даты
+    assert query.count("?") == store_count + 2
+
+
+def test_coffee_sales_query(connector):
+    connector.get_coffee_sales_data([27, 43, 44], "2024-01-01", "2024-01-31")
+    [(query, params)] = connector.executed
+
+    assert params == [27, 43, 44, "2024-01-01", "2024-01-31"]
+    assert query.count("?") == len(params)
+    assert _group_ids(query) == DatabaseConnector.COFFEE_GROUP_IDS
+    # Порядок строк клиенту не нужен - сортировка не запрашивается
+    assert "ORDER BY" not in query
+
+
+def test_coffee_sales_defaults(connector):
+    connector.get_coffee_sales_data()
+    [(query, params)] = connector.executed
+    assert params == [27, 43, 44, 46, 33, 45, "2018-01-01", "2025-12-31"]
+    assert _store_placeholders(query) == "?,?,?,?,?,?"
+
+
+def test_all_sales_query_is_unfiltered_and_ordered(connector):
+    connector.get_sales_data([27], "2024-01-01", "2024-01-31")
+    [(query, params)] = connector.executed
+
+    assert params == [27, "2024-01-01", "2024-01-31"]
+    assert _group_ids(query) is None
+    assert "ORDER BY g.NAME, sz.DAT_" in query
+
+
+def test_same_columns_for_both_queries(connector):
+    def columns(query):
+        select = query[query.index("SELECT") + len("SELECT"):query.index("FROM")]
+        return [column.split()[-1] for column in select.split(",")]
+
+    assert columns(connector._sales_query(2)) == columns(
+        connector._sales_query(2, group_ids=DatabaseConnector.COFFEE_GROUP_IDS, ordered=False)
+    )
+
+
+def test_coffee_products_query_uses_the_same_groups(connector):
+    connector.get_coffee_products()
+    [(query, _)] = connector.executed
+    assert _group_ids(query) == DatabaseConnector.COFFEE_GROUP_IDS
+    for name, ids in DatabaseConnector.COFFEE_GROUPS.items():
+        assert "WHEN g.OWNER IN ({}) THEN '{}'".format(DatabaseConnector._sql_list(ids), name) in query
@@ -0,0 +1,141 @@
+"""
+Тесты прореживания длинных рядов (LTTB) и укрупнения периодов:
+web/backend/app/downsampling.py, /sales/series и webapp/services/downsampling.py
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+from app import downsampling as backend  # noqa: E402
+from conftest import FakeProxyApi  # noqa: E402
+from services import downsampling as webapp  # noqa: E402
+from services.columnar import SalesColumns  # noqa: E402
+
+LTTB = pytest.mark.parametrize("lttb", [backend.lttb, webapp.lttb], ids=["backend", "webapp"])
+
+
+def _series(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=np.int64) * 86400, rng.normal(100.0, 5.0, n)
+
+
+@LTTB
+@pytest.mark.parametrize("n, threshold", [(10, 3), (100, 10), (1000, 300), (731, 730), (5000, 97)])
+def test_endpoints_are_kept(lttb, n, threshold):
+    x, y = _series(n)
+    kept = lttb(x, y, threshold)
+    assert len(kept) == threshold
+    assert kept[0] == 0
+    assert kept[-1] == n - 1
+    # Индексы строго возрастают: точки не повторяются и идут по порядку
+    assert np.all(np.diff(kept) > 0)
+
+
+@LTTB
+def test_peak_and_dip_survive(lttb):
+    x, y = _series(2000)
+    y[537] = 1000.0
+    y[1411] = -1000.0
+    kept = lttb(x, y, 50)
+    assert 537 in kept
+    assert 1411 in kept
+
+
+@LTTB
+def test_short_series_is_returned_whole(lttb):
+    x, y = _series(20)
+    assert list(lttb(x, y, 20)) == list(range(20))
+    assert list(lttb(x, y, 50)) == list(range(20))
+    # Меньше трех точек LTTB не строит
+    assert list(lttb(x, y, 2)) == list(range(20))
+
+
+def test_backend_and_webapp_agree():
+    x, y = _series(3000)
+    assert list(backend.lttb(x, y, 123)) == list(webapp.lttb(x, y, 123))
+
+
+@pytest.mark.parametrize("module", [backend, webapp], ids=["backend", "webapp"])
+def test_auto_granularity(module):
+    start, end = date(2022, 1, 1), date(2023, 12, 31)
+    assert module.period_count(start, end, "day") == 730
+    assert module.period_count(start, end, "week") == 105
+    assert module.period_count(start, end, "month") == 24
+    assert module.auto_granularity(start, end, 730) == "day"
+    assert module.auto_granularity(start, end, 200) == "week"
+    assert module.auto_granularity(start, end, 30) == "month"
+    assert module.auto_granularity(start, end, 10) == "month"
+
+
+def test_series_endpoint_keeps_range_ends(backend_app, fake_proxy_api):
+    client = backend_app(fake_proxy_api)
+    params = {"store_ids": [1, 2], "start_date": "2022-01-01", "end_date": "2023-12-31", "max_points": 50}
+
+    response = client.get("/sales/series", params=params)
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["granularity"] == "day"
+    assert [line["store_name"] for line in payload["stores"]] == ["Магазин 1", "Магазин 2"]
+    for store_id, line in zip((1, 2), payload["stores"]):
+        assert line["source_points"] == 730
+        assert len(line["periods"]) == len(line["values"]) == 50
+        assert line["periods"][0] == "2022-01-01"
+        assert line["periods"][-1] == "2023-12-31"
+        assert line["values"][0] == FakeProxyApi.cash(store_id, date(2022, 1, 1))
+
+
+def test_series_endpoint_auto_granularity(backend_app, fake_proxy_api):
+    client = backend_app(fake_proxy_api)
+    params = {
+        "store_ids": [1],
+        "start_date": "2022-01-01",
+        "end_date": "2023-12-31",
+        "measure": "allcup",
+        "granularity": "auto",
+        "max_points": 50,
+    }
+    payload = client.get("/sales/series", params=params).json()
+    assert payload["granularity"] == "month"
+    [line] = payload["stores"]
+    # Месяцев меньше бюджета - ряд не прорежен
+    assert line["source_points"] == len(line["values"]) == 24
+    january = sum(FakeProxyApi.cups(1, date(2022, 1, 1) + timedelta(days=offset)) for offset in range(31))
+    assert line["values"][0] == january
+
+
+def test_series_endpoint_validates_budget(backend_app, fake_proxy_api):
+    client = backend_app(fake_proxy_api)
+    params = {"store_ids": [1], "start_date": "2024-01-01", "end_date": "2024-01-31", "max_points": 2}
+    assert client.get("/sales/series", params=params).status_code == 422
+
+
+def test_webapp_chart_keeps_range_ends():
+    upstream = FakeProxyApi(stores=(1, 2))
+    start, end = date(2022, 1, 1), date(2023, 2, 4)
+    columns = SalesColumns.from_records(upstream._sales("ALLCUP", [start.isoformat(), end.isoformat()]))
+
+    chart = webapp.sales_chart(columns, max_points=30, width=600, height=100)
+    assert chart["days"] == 400
+    assert chart["shown"] == 30
+    assert chart["start"] == start and chart["end"] == end
+    points = [tuple(map(float, point.split(","))) for point in chart["points"].split()]
+    assert len(points) == 30
+    assert points[0][0] == 0.0 and points[-1][0] == 600.0
+    daily = [sum(upstream.cash(store, start + timedelta(days=offset)) for store in (1, 2)) for offset in range(400)]
+    assert chart["max"] == max(daily)
+
+
+def test_webapp_period_rows_are_coarsened():
+    upstream = FakeProxyApi(stores=(1,))
+    start, end = date(2023, 1, 1), date(2023, 12, 31)
+    columns = SalesColumns.from_records(upstream._sales("ALLCUP", [start.isoformat(), end.isoformat()]))
+
+    periods = webapp.period_rows(columns, start, end, max_rows=12)
+    assert periods["granularity"] == "month"
+    assert [row["period"] for row in periods["rows"]] == [date(2023, month, 1) for month in range(1, 13)]
+    assert sum(row["total_cups"] for row in periods["rows"]) == columns.totals()["total_cups"]
+    assert webapp.sales_chart(SalesColumns.from_records([]), max_points=30) is None
@@ -0,0 +1,200 @@
+"""
+Тесты предзагрузки отчета GUI: src/gui_app.py
+(совпадение ключа, сброс, PREFETCH_TTL и загрузка отчета вне главного потока Tk)
+
+Окно не создается: методы вызываются на объекте с подставными виджетами и коннектором.
+"""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("tkinter")
+pd = pytest.importorskip("pandas")
+
+from src import gui_app  # noqa: E402
+from src.gui_app import CoffeeAnalysisGUI  # noqa: E402
+
+STORES = (1, 2)
+KEY = ("local", STORES, "2024-01-01", "2024-01-31")
+
+
+class FakeVar:
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class FakeWidget:
+    def __init__(self):
+        self.options = {}
+
+    def config(self, **options):
+        self.options.update(options)
+
+
+class FakeRoot:
+    """root.after без цикла событий: отложенные вызовы выполняет ``run_pending``"""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback, *args):
+        self.pending.append((callback, args))
+
+    def run_pending(self, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while self.pending:
+            assert time.monotonic() < deadline, "report load did not finish"
+            callback, args = self.pending.pop(0)
+            time.sleep(0.01)
+            callback(*args)
+
+
+class FakeConnector:
+    """Локальная БД: get_coffee_sales_with_packages по вызову, вызовы записываются"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_coffee_sales_with_packages(self, store_ids, start_date, end_date):
+        self.calls.append((list(store_ids), start_date, end_date))
+        return pd.DataFrame(
+            {
+                "STORE_NAME": ["Магазин 1"],
+                "ORDER_DATE": [start_date],
+                "ALLCUP": [3],
+                "PACKAGES_KG": [0.5],
+                "TOTAL_CASH": [30.0],
+            }
+        )
+
+
+@pytest.fixture
+def gui(monkeypatch):
+    gui = CoffeeAnalysisGUI.__new__(CoffeeAnalysisGUI)
+    gui.root = FakeRoot()
+    gui.db_connector = FakeConnector()
+    gui.db_type = "local"
+    gui.sales_data = None
+    gui._prefetch = None
+    gui._db_lock = threading.Lock()
+    gui.store_vars = {store_id: FakeVar(True) for store_id in STORES}
+    gui.start_date_var = FakeVar(KEY[2])
+    gui.end_date_var = FakeVar(KEY[3])
+    gui.cache_status_var = FakeVar("")
+    gui.generate_btn = FakeWidget()
+    gui.export_btn = FakeWidget()
+    gui.built = []
+    monkeypatch.setattr(gui, "create_report_table", lambda: gui.built.append(gui.sales_data))
+    messages = []
+    for name in ("showinfo", "showerror", "showwarning"):
+        monkeypatch.setattr(gui_app.messagebox, name, lambda *args, name=name: messages.append((name, args)))
+    gui.messages = messages
+    return gui
+
+
+def _prefetched(gui):
+    gui._start_report_prefetch()
+    prefetch = gui._prefetch
+    prefetch["thread"].join(2)
+    return prefetch
+
+
+def test_prefetch_loads_default_report(gui):
+    prefetch = _prefetched(gui)
+    assert prefetch["key"] == KEY
+    assert prefetch["error"] is None
+    assert list(prefetch["result"].columns) == ["STORE_NAME", "ORDER_DATE", "QUANTITY", "TOTAL_WEIGHT_KG", "TOTAL_SUM"]
+    assert gui.db_connector.calls == [([1, 2], KEY[2], KEY[3])]
+
+
+def test_take_matching_prefetch(gui):
+    prefetch = _prefetched(gui)
+    assert gui._take_prefetched_report(KEY) is prefetch
+    # Предзагрузка используется один раз
+    assert gui._prefetch is None
+    assert gui._take_prefetched_report(KEY) is None
+
+
+def test_other_parameters_discard_prefetch(gui):
+    _prefetched(gui)
+    assert gui._take_prefetched_report(("local", (1,), KEY[2], KEY[3])) is None
+    assert gui._prefetch is None
+
+
+def test_expired_prefetch_is_not_used(gui, monkeypatch):
+    prefetch = _prefetched(gui)
+    monkeypatch.setattr(gui_app.time, "monotonic", lambda: prefetch["finished"] + gui_app.PREFETCH_TTL + 1)
+    assert gui._take_prefetched_report(KEY) is None
+    assert gui._prefetch is None
+
+
+def test_changed_parameters_discard_prefetch(gui):
+    _prefetched(gui)
+    gui._on_report_params_changed()
+    assert gui._prefetch is not None
+    gui.store_vars[2].set(False)
+    gui._on_report_params_changed()
+    assert gui._prefetch is None
+
+
+def test_discarded_prefetch_does_not_query(gui):
+    with gui._db_lock:
+        gui._start_report_prefetch()
+        prefetch = gui._prefetch
+        gui._discard_prefetch("тест")
+    prefetch["thread"].join(2)
+    assert prefetch["result"] is None
+    assert gui.db_connector.calls == []
+
+
+def test_report_from_prefetch(gui):
+    prefetch = _prefetched(gui)
+    gui.generate_report()
+    assert gui.built == [prefetch["result"]]
+    assert gui.cache_status_var.get() == "⚡ Из предзагрузки"
+    assert len(gui.db_connector.calls) == 1
+
+
+def test_busy_connector_does_not_block_tk_thread(gui):
+    """Пока коннектор занят чужим запросом, generate_report сразу возвращает управление"""
+    gui.store_vars[2].set(False)
+    release = threading.Event()
+    holder = threading.Thread(target=lambda: (gui._db_lock.acquire(), release.wait(2), gui._db_lock.release()))
+    holder.start()
+    while not gui._db_lock.locked():
+        time.sleep(0.001)
+
+    started = time.monotonic()
+    gui.generate_report()
+    assert time.monotonic() - started < 0.2
+    assert gui.generate_btn.options["state"] == "disabled"
+    assert gui.cache_status_var.get() == "⏳ Загрузка данных"
+    assert gui.built == []
+
+    release.set()
+    holder.join()
+    gui.root.run_pending()
+    assert gui.generate_btn.options["state"] == "normal"
+    assert len(gui.built) == 1
+    assert gui.db_connector.calls == [([1], KEY[2], KEY[3])]
+    assert gui.cache_status_var.get() == ""
+
+
+def test_failed_load_shows_error(gui, monkeypatch):
+    def failing(**kwargs):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(gui.db_connector, "get_coffee_sales_with_packages", failing)
+    gui.generate_report()
+    gui.root.run_pending()
+    assert gui.built == []
+    assert gui.messages[-1][0] == "showerror"
+    assert "database is down" in gui.messages[-1][1][1]
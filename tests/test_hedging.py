@@ -0,0 +1,200 @@
+"""
+Тесты хеджирования медленных запросов и передачи бюджета запроса в Proxy API:
+web/backend/app/proxy_client.py, webapp/proxy_client.py и обработчики бюджета обоих приложений
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("requests")
+
+import deadline as webapp_deadline  # noqa: E402
+import proxy_client as webapp_proxy_client  # noqa: E402
+from app import deadline as backend_deadline  # noqa: E402
+from conftest import FakeProxyApi  # noqa: E402
+
+SLOW = 0.5
+SAMPLES = 20
+
+
+class SlowFirstProxyApi(FakeProxyApi):
+    """Первые ``slow`` запросов отвечают через ``delay`` секунд, остальные сразу"""
+
+    def __init__(self, slow=1, delay=SLOW):
+        super().__init__()
+        self.slow = slow
+        self.slow_delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next_delay(self):
+        with self._lock:
+            self.calls += 1
+            return self.slow_delay if self.calls <= self.slow else 0.0
+
+    async def handler(self, request):
+        await asyncio.sleep(self._next_delay())
+        return await super().handler(request)
+
+    def adapter(self):
+        adapter = super().adapter()
+        send = adapter.send
+
+        def slow_send(request, **kwargs):
+            time.sleep(self._next_delay())
+            return send(request, **kwargs)
+
+        adapter.send = slow_send
+        return adapter
+
+
+def _warm(latencies, kind, seconds=0.01):
+    for _ in range(SAMPLES):
+        latencies.observe(kind, seconds)
+
+
+# Бэкенд (asyncio) ----------------------------------------------------------
+
+
+def test_backend_slow_call_is_hedged(proxy_client_factory):
+    upstream = SlowFirstProxyApi()
+    client = proxy_client_factory(upstream.handler, hedge=True, hedge_min_delay=0.02)
+    _warm(client.latencies, "health")
+
+    started = time.monotonic()
+    assert asyncio.run(client.health()) == {"status": "ok"}
+    assert time.monotonic() - started < SLOW / 2
+    # Ответил дубликат, медленная попытка отменена
+    assert upstream.calls == 2
+
+
+def test_backend_fast_call_is_not_hedged(proxy_client_factory):
+    upstream = SlowFirstProxyApi(slow=0)
+    client = proxy_client_factory(upstream.handler, hedge=True, hedge_min_delay=0.05)
+    _warm(client.latencies, "health")
+    assert asyncio.run(client.health()) == {"status": "ok"}
+    assert upstream.calls == 1
+
+
+def test_backend_needs_latency_history_to_hedge(proxy_client_factory):
+    upstream = SlowFirstProxyApi(delay=0.1)
+    client = proxy_client_factory(upstream.handler, hedge=True, hedge_min_delay=0.01)
+    for _ in range(SAMPLES - 1):
+        client.latencies.observe("health", 0.01)
+    assert asyncio.run(client.health()) == {"status": "ok"}
+    assert upstream.calls == 1
+
+
+def test_backend_writes_are_not_hedged(proxy_client_factory):
+    upstream = SlowFirstProxyApi(delay=0.1)
+    client = proxy_client_factory(upstream.handler, hedge=True, hedge_min_delay=0.01)
+    _warm(client.latencies, "query")
+    asyncio.run(client._request("POST", "/api/query", json={"query": "SELECT ID, NAME FROM STORGRP"}))
+    assert upstream.calls == 1
+
+
+def test_backend_no_hedge_when_budget_is_shorter_than_delay(proxy_client_factory):
+    upstream = SlowFirstProxyApi(delay=0.1)
+    client = proxy_client_factory(upstream.handler, hedge=True, hedge_min_delay=0.3)
+    _warm(client.latencies, "health")
+
+    async def scenario():
+        token = backend_deadline.start(0.25)
+        try:
+            return await client.health()
+        finally:
+            backend_deadline.reset(token)
+
+    assert asyncio.run(scenario()) == {"status": "ok"}
+    assert upstream.calls == 1
+
+
+def test_backend_request_timeout_header_caps_upstream_budget(backend_app, fake_proxy_api):
+    client = backend_app(fake_proxy_api, REQUEST_BUDGET=20)
+
+    assert client.get("/stores", headers={"X-Request-Timeout": "2"}).status_code == 200
+    assert 1.5 < float(fake_proxy_api.headers[-1]["x-request-timeout"]) <= 2.0
+
+    assert client.get("/stores").status_code == 200
+    assert 19.5 < float(fake_proxy_api.headers[-1]["x-request-timeout"]) <= 20.0
+
+    # Некорректный заголовок игнорируется
+    assert client.get("/stores", headers={"X-Request-Timeout": "soon"}).status_code == 200
+    assert float(fake_proxy_api.headers[-1]["x-request-timeout"]) > 19.5
+
+
+# Flask-приложение (потоки) -------------------------------------------------
+
+
+@pytest.fixture
+def webapp_client():
+    clients = []
+
+    def make(upstream, **kwargs):
+        client = webapp_proxy_client.ProxyApiClient("http://proxy.test", "test-token", **kwargs)
+        client.session.mount("http://", upstream.adapter())
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_webapp_slow_call_is_hedged(webapp_client):
+    upstream = SlowFirstProxyApi()
+    client = webapp_client(upstream, hedge=True, hedge_min_delay=0.02)
+    _warm(client.latencies, "health")
+
+    started = time.monotonic()
+    assert client.health() == {"status": "ok"}
+    assert time.monotonic() - started < SLOW / 2
+    assert upstream.calls == 2
+
+
+def test_webapp_fast_call_is_not_hedged(webapp_client):
+    upstream = SlowFirstProxyApi(slow=0)
+    client = webapp_client(upstream, hedge=True, hedge_min_delay=0.05)
+    _warm(client.latencies, "health")
+    assert client.health() == {"status": "ok"}
+    assert upstream.calls == 1
+
+
+def test_webapp_hedged_attempts_share_the_deadline(webapp_client):
+    upstream = SlowFirstProxyApi()
+    client = webapp_client(upstream, hedge=True, hedge_min_delay=0.02)
+    _warm(client.latencies, "health")
+
+    token = webapp_deadline.start(2.0)
+    try:
+        client.health()
+    finally:
+        webapp_deadline.reset(token)
+    # Проигравшая попытка не прерывается: дожидаемся ее ответа
+    for _ in range(100):
+        if len(upstream.headers) == 2:
+            break
+        time.sleep(0.01)
+    # Обе попытки выполнялись в пуле потоков, но с бюджетом вызывающего
+    assert len(upstream.headers) == 2
+    assert all(float(headers["X-Request-Timeout"]) <= 2.0 for headers in upstream.headers)
+
+
+def test_webapp_request_timeout_header_caps_upstream_budget(webapp_app, fake_proxy_api):
+    module = webapp_app(fake_proxy_api, REQUEST_BUDGET=20)
+    client = module.app.test_client()
+
+    assert client.get("/", headers={"X-Request-Timeout": "2"}).status_code == 200
+    forwarded = [float(headers["X-Request-Timeout"]) for headers in fake_proxy_api.headers]
+    # Запросы из пула потоков страницы и клиента тоже укладываются в бюджет
+    assert forwarded and all(0 < value <= 2.0 for value in forwarded)
+
+    fake_proxy_api.headers.clear()
+    module.page_cache.clear()
+    assert client.get("/").status_code == 200
+    assert fake_proxy_api.headers
+    assert all(2.0 < float(headers["X-Request-Timeout"]) <= 20.0 for headers in fake_proxy_api.headers)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк времени импорта (холодный старт GUI)
+
+Запускает интерпретатор с `-X importtime` и проверяет, что:
+- импорт src.gui_app не тянет pandas, fdb, requests и библиотеки графиков;
+- импорт src.coffee_analysis не тянет fdb и библиотеки графиков;
+- суммарное время импорта укладывается в бюджет (IMPORT_BUDGET_MS, по умолчанию 300 мс);
+- при наличии дисплея - время до первого окна укладывается в бюджет
+  (FIRST_WINDOW_BUDGET_MS, по умолчанию 1500 мс).
+
+Запуск: python tests/test_import_time.py  или  python -m pytest tests/test_import_time.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "300"))
+FIRST_WINDOW_BUDGET_MS = float(os.getenv("FIRST_WINDOW_BUDGET_MS", "1500"))
+
+DATA_MODULES = {"pandas", "numpy", "fdb", "requests", "urllib3"}
+PLOT_MODULES = {"matplotlib", "seaborn", "plotly"}
+
+FIRST_WINDOW_SNIPPET = """
+import time
+start = time.perf_counter()
+import tkinter as tk
+from src.gui_app import CoffeeAnalysisGUI
+try:
+    root = tk.Tk()
+except tk.TclError:
+    print("NO_DISPLAY")
+    raise SystemExit(0)
+CoffeeAnalysisGUI(root)
+root.update()
+print(f"{(time.perf_counter() - start) * 1000:.1f}")
+root.destroy()
+"""
+
+
+def _run_python(args):
+    """Запуск интерпретатора в чистом каталоге (логи GUI не попадают в проект)"""
+    env = dict(os.environ, PYTHONPATH=str(project_root), PYTHONDONTWRITEBYTECODE="1")
+    with tempfile.TemporaryDirectory() as workdir:
+        return subprocess.run(
+            [sys.executable, *args],
+            cwd=workdir,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+
+
+def measure_import(module: str):
+    """
+    Замер импорта модуля через -X importtime
+
+    Returns:
+        tuple: (суммарное время в мс, множество загруженных корневых пакетов)
+    """
+    result = _run_python(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        raise RuntimeError(f"Импорт {module} завершился ошибкой:\n{result.stderr}")
+
+    total_us = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # строка заголовка
+        # Модули верхнего уровня идут без отступа, вложенные - с отступом
+        if name.startswith(" ") and not name.startswith("  "):
+            total_us += int(cumulative)
+        loaded.add(name.strip().split(".")[0])
+    return total_us / 1000, loaded
+
+
+def measure_first_window():
+    """Время от старта интерпретатора до первой отрисовки окна (мс) или None без дисплея"""
+    result = _run_python(["-c", FIRST_WINDOW_SNIPPET])
+    if result.returncode != 0:
+        raise RuntimeError(f"Ошибка создания окна:\n{result.stderr}")
+    output = result.stdout.strip().splitlines()
+    if not output or output[-1] == "NO_DISPLAY":
+        return None
+    return float(output[-1])
+
+
+def test_gui_import_is_lightweight():
+    """GUI не должен загружать данные/БД/графики при импорте"""
+    elapsed_ms, loaded = measure_import("src.gui_app")
+    print(f"import src.gui_app: {elapsed_ms:.1f} мс")
+    heavy = loaded & (DATA_MODULES | PLOT_MODULES)
+    assert not heavy, f"Тяжелые зависимости загружены при старте GUI: {sorted(heavy)}"
+    assert elapsed_ms <= IMPORT_BUDGET_MS, (
+        f"Импорт GUI занял {elapsed_ms:.1f} мс (бюджет {IMPORT_BUDGET_MS:.0f} мс)"
+    )
+
+
+def test_analysis_import_skips_plotting():
+    """Анализ не должен загружать fdb и библиотеки графиков до построения графиков"""
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("pandas не установлен - проверка src.coffee_analysis пропущена")
+        return
+    elapsed_ms, loaded = measure_import("src.coffee_analysis")
+    print(f"import src.coffee_analysis: {elapsed_ms:.1f} мс")
+    heavy = loaded & (PLOT_MODULES | {"fdb"})
+    assert not heavy, f"Лишние зависимости загружены при импорте анализа: {sorted(heavy)}"
+
+
+def test_first_window_budget():
+    """Холодный старт до первого окна"""
+    elapsed_ms = measure_first_window()
+    if elapsed_ms is None:
+        print("Нет дисплея - замер первого окна пропущен")
+        return
+    print(f"Первое окно: {elapsed_ms:.1f} мс")
+    assert elapsed_ms <= FIRST_WINDOW_BUDGET_MS, (
+        f"Старт до первого окна занял {elapsed_ms:.1f} мс (бюджет {FIRST_WINDOW_BUDGET_MS:.0f} мс)"
+    )
+
+
+if __name__ == "__main__":
+    test_gui_import_is_lightweight()
+    test_analysis_import_skips_plotting()
+    test_first_window_budget()
+    print("OK: бюджет холодного старта соблюден")
@@ -0,0 +1,82 @@
+"""
+Проверка SQL-запросов продаж клиентов Proxy API веб-бэкенда и Flask-приложения:
+имена столбцов только латиницей, одинаковый фильтр упаковок кофе
+"""
+
+import asyncio
+import json
+import re
+from datetime import date
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("requests")
+
+import proxy_client as webapp_proxy_client  # noqa: E402
+from app import proxy_client as backend_proxy_client  # noqa: E402
+
+# Кириллица вне строковых литералов ('...') - опечатка в имени столбца
+LITERAL = re.compile(r"'[^']*'")
+CYRILLIC = re.compile(r"[А-Яа-яЁё]")
+
+
+def _identifiers_ascii(query):
+    return not CYRILLIC.search(LITERAL.sub("''", query))
+
+
+def test_package_filters_are_identical():
+    assert webapp_proxy_client.PACKAGE_GOODS_FILTER == backend_proxy_client.PACKAGE_GOODS_FILTER
+
+
+def test_webapp_sales_queries_use_latin_identifiers(monkeypatch):
+    client = webapp_proxy_client.ProxyApiClient("http://proxy.test", "test-token")
+    queries = []
+
+    def execute_query(query, params=None, kind="query"):
+        queries.append((kind, query, list(params)))
+        return []
+
+    monkeypatch.setattr(client, "execute_query", execute_query)
+    try:
+        assert client.get_sales([1, 2], "2024-01-01", "2024-01-31") == []
+    finally:
+        client.close()
+
+    assert sorted(kind for kind, _, _ in queries) == ["cups", "packages"]
+    for kind, query, params in queries:
+        assert _identifiers_ascii(query), kind
+        assert query.count("?") == len(params) == 4
+    packages = next(query for kind, query, _ in queries if kind == "packages")
+    assert webapp_proxy_client.PACKAGE_GOODS_FILTER in packages
+
+
+def test_webapp_sales_keep_same_named_stores_apart(fake_proxy_api):
+    fake_proxy_api.stores[4] = fake_proxy_api.stores[1]
+    client = webapp_proxy_client.ProxyApiClient("http://proxy.test", "test-token")
+    client.session.mount("http://", fake_proxy_api.adapter())
+    try:
+        rows = client.get_sales([1, 4], "2024-01-01", "2024-01-02")
+    finally:
+        client.close()
+
+    assert sorted((row["STORE_ID"], row["ORDER_DATE"]) for row in rows) == [
+        (1, "2024-01-01"), (1, "2024-01-02"), (4, "2024-01-01"), (4, "2024-01-02"),
+    ]
+    assert {row["STORE_NAME"] for row in rows} == {fake_proxy_api.stores[1]}
+    by_id = {(row["STORE_ID"], row["ORDER_DATE"]): row for row in rows}
+    assert by_id[4, "2024-01-02"]["PACKAGES_KG"] == fake_proxy_api.packages(4, date(2024, 1, 2))
+
+
+def test_backend_sales_queries_use_latin_identifiers(proxy_client_factory):
+    queries = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        queries.append(body["query"])
+        return httpx.Response(200, json={"success": True, "data": []})
+
+    client = proxy_client_factory(handler)
+    assert asyncio.run(client.get_sales([1], "2024-01-01", "2024-01-31")) == []
+    assert len(queries) == 2
+    assert all(_identifiers_ascii(query) for query in queries)
@@ -0,0 +1,143 @@
+"""
+Тесты общего для процессов кэша (SQLite + аренда ключа):
+web/backend/app/shared_cache.py и webapp/services/shared_cache.py
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("orjson")
+
+import deadline as webapp_deadline  # noqa: E402
+from app import deadline as backend_deadline  # noqa: E402
+from app.shared_cache import SharedCache as BackendSharedCache  # noqa: E402
+from services.shared_cache import SharedCache as WebappSharedCache  # noqa: E402
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "shared.sqlite")
+
+
+# Бэкенд (asyncio) ----------------------------------------------------------
+
+
+def test_backend_concurrent_callers_load_once(cache_path):
+    cache = BackendSharedCache(cache_path, poll_interval=0.01)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load("key", 60, load) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [{"value": 42}] * 5
+    assert len(loads) == 1
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["waits"] == 4
+    # Следующий вызов - попадание в кэш
+    assert asyncio.run(cache.get_or_load("key", 60, load)) == {"value": 42}
+    assert cache.stats()["hits"] == 1
+
+
+def test_backend_failed_holder_hands_over_lease(cache_path):
+    cache = BackendSharedCache(cache_path, poll_interval=0.01)
+
+    async def failing():
+        await asyncio.sleep(0.03)
+        raise RuntimeError("upstream down")
+
+    async def load():
+        return [1, 2, 3]
+
+    async def scenario():
+        holder = asyncio.ensure_future(cache.get_or_load("key", 60, failing))
+        # Ждущий приходит, когда аренда уже взята
+        while not await asyncio.to_thread(cache._is_leased, "key"):
+            await asyncio.sleep(0.001)
+        waiter = asyncio.ensure_future(cache.get_or_load("key", 60, load))
+        return await asyncio.gather(holder, waiter, return_exceptions=True)
+
+    failed, loaded = asyncio.run(scenario())
+    assert isinstance(failed, RuntimeError)
+    assert loaded == [1, 2, 3]
+    assert cache.get("key") == [1, 2, 3]
+
+
+def test_backend_wait_is_capped_by_request_budget(cache_path):
+    """Ожидающий не ждет аренду lease_timeout секунд, если его бюджет меньше"""
+    cache = BackendSharedCache(cache_path, lease_timeout=30, poll_interval=0.01)
+    # Ключ загружает другой процесс, который не завершится
+    assert cache._try_lease("key")
+
+    async def load():
+        return "direct"
+
+    async def scenario():
+        token = backend_deadline.start(0.4)
+        try:
+            return await cache.get_or_load("key", 60, load)
+        finally:
+            backend_deadline.reset(token)
+
+    started = time.monotonic()
+    assert asyncio.run(scenario()) == "direct"
+    assert time.monotonic() - started < 0.35
+    # Чужая аренда не снята, результат не опубликован
+    assert cache._is_leased("key")
+    assert cache.get("key") is None
+
+
+# Flask-приложение (потоки) -------------------------------------------------
+
+
+def test_webapp_concurrent_callers_load_once(cache_path):
+    cache = WebappSharedCache(cache_path, poll_interval=0.01)
+    loads = []
+    results = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return {"value": 42}
+
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("key", 60, load)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"value": 42}] * 5
+    assert len(loads) == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_webapp_wait_is_capped_by_request_budget(cache_path):
+    cache = WebappSharedCache(cache_path, lease_timeout=30, poll_interval=0.01)
+    assert cache._try_lease("key")
+
+    token = webapp_deadline.start(0.4)
+    try:
+        started = time.monotonic()
+        assert cache.get_or_load("key", 60, lambda: "direct") == "direct"
+        assert time.monotonic() - started < 0.35
+    finally:
+        webapp_deadline.reset(token)
+    assert cache.get("key") is None
+
+
+def test_webapp_expired_entries_are_not_served(cache_path):
+    cache = WebappSharedCache(cache_path)
+    cache.put("key", {"a": 1}, ttl=-1)
+    assert cache.get("key") is None
+    assert cache.get_or_load("key", 60, lambda: {"a": 2}) == {"a": 2}
@@ -0,0 +1,82 @@
+"""
+Тесты колоночной аналитики Flask-приложения: webapp/services/columnar.py
+(результаты сверяются с построчной реализацией webapp/services/analytics.py)
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from conftest import FakeProxyApi  # noqa: E402
+from services.analytics import aggregate_sales, build_table_rows, group_sales_by_store  # noqa: E402
+from services.columnar import SORTS, SalesColumns  # noqa: E402
+
+RECORDS = [
+    {"STORE_NAME": "Б", "ORDER_DATE": "2024-03-02", "ALLCUP": 5, "TOTAL_CASH": "150.5", "PACKAGES_KG": 0.5},
+    {"STORE_NAME": "А", "ORDER_DATE": "2024-03-02", "ALLCUP": 3, "TOTAL_CASH": 90.0, "PACKAGES_KG": None},
+    {"STORE_NAME": "Б", "ORDER_DATE": "2024-03-01", "ALLCUP": None, "TOTAL_CASH": 150.5},
+    {"STORE_NAME": "А", "ORDER_DATE": "2024-03-03T00:00:00", "ALLCUP": 7, "TOTAL_CASH": 10.0, "PACKAGES_KG": 1},
+]
+
+
+def test_totals_match_row_by_row_aggregation():
+    assert SalesColumns.from_records(RECORDS).totals() == aggregate_sales(RECORDS)
+
+
+def test_by_store_matches_grouping():
+    by_store = SalesColumns.from_records(RECORDS).by_store()
+    grouped = group_sales_by_store(RECORDS)
+    assert list(by_store) == ["А", "Б"]
+    assert by_store == {store: aggregate_sales(rows) for store, rows in grouped.items()}
+
+
+def test_rows_have_table_shape():
+    columns = SalesColumns.from_records(RECORDS)
+    rows = columns.rows(columns.order("store"))
+    # Порядок store совпадает с сортировкой build_table_rows
+    assert rows == build_table_rows(RECORDS)
+
+
+def test_orders():
+    columns = SalesColumns.from_records(RECORDS)
+
+    def keys(sort):
+        return [(row["store_name"], row["order_date"].day) for row in columns.rows(columns.order(sort))]
+
+    # Сначала новые даты, при равной дате - по магазину
+    assert keys("date") == [("А", 3), ("А", 2), ("Б", 2), ("Б", 1)]
+    assert keys("store") == [("А", 2), ("А", 3), ("Б", 1), ("Б", 2)]
+    # Равные суммы упорядочены по магазину и дате
+    assert keys("sum") == [("Б", 1), ("Б", 2), ("А", 2), ("А", 3)]
+    with pytest.raises(ValueError):
+        columns.order("price")
+
+
+@pytest.mark.parametrize("sort", SORTS)
+def test_sort_key_is_consistent_with_order(sort):
+    upstream = FakeProxyApi(stores=(3, 1, 2))
+    records = upstream._sales("ALLCUP", ["2024-01-01", "2024-01-20"])
+    columns = SalesColumns.from_records(records)
+    keys = [columns.sort_key(sort, int(index)) for index in columns.order(sort)]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(records)
+
+
+def test_empty_payload():
+    columns = SalesColumns.from_records([])
+    assert len(columns) == 0
+    assert columns.totals() == {"total_sales": 0.0, "total_cups": 0.0, "total_packages": 0.0}
+    assert columns.by_store() == {}
+    assert columns.rows(columns.order("date")) == []
+
+
+def test_dashboard_totals(webapp_app, fake_proxy_api):
+    """Итоги на главной странице считаются по массивам продаж всех магазинов"""
+    module = webapp_app(fake_proxy_api)
+    expected = aggregate_sales(fake_proxy_api._sales("ALLCUP", list(module._default_dates())))
+
+    response = module.app.test_client().get("/")
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert f">{round(expected['total_sales'], 2)}<" in page
+    assert f">{round(expected['total_cups'], 0)}<" in page
@@ -0,0 +1,107 @@
+"""
+Тесты кэша отрисованных страниц и условных GET Flask-приложения:
+webapp/services/page_cache.py и webapp/app.py
+"""
+
+from datetime import date
+
+from services.page_cache import PageCache
+
+SALES_URL = "/sales?start_date=2024-01-01&end_date=2024-01-31"
+
+
+def test_ttl_depends_on_today():
+    cache = PageCache(today_ttl=60, history_ttl=3600)
+    today = date(2024, 3, 10)
+    assert cache.ttl_for(date(2024, 3, 10), today) == 60
+    assert cache.ttl_for(date(2024, 3, 9), today) == 3600
+
+
+def test_lru_eviction_and_expiry():
+    cache = PageCache(max_entries=2)
+    cache.put("a", "A", ttl=60)
+    cache.put("b", "B", ttl=60)
+    assert cache.get("a").body == "A"
+    cache.put("c", "C", ttl=60)
+    # Вытеснена давно не использованная страница
+    assert cache.get("b") is None
+    assert cache.get("a").body == "A"
+    cache.put("d", "D", ttl=-1)
+    assert cache.get("d") is None
+
+
+def test_unchanged_render_keeps_validators():
+    cache = PageCache()
+    first = cache.put("key", "<p>1</p>", ttl=-1)
+    again = cache.put("key", "<p>1</p>", ttl=60)
+    changed = cache.put("key", "<p>2</p>", ttl=60)
+    assert again.etag == first.etag
+    assert again.last_modified == first.last_modified
+    assert changed.etag != first.etag
+
+
+def test_repeat_view_is_served_from_cache(webapp_app, fake_proxy_api):
+    module = webapp_app(fake_proxy_api)
+    client = module.app.test_client()
+
+    first = client.get(SALES_URL)
+    assert first.status_code == 200
+    assert first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+    assert "no-cache" in first.headers["Cache-Control"]
+    queries = len(fake_proxy_api.queries)
+
+    again = client.get(SALES_URL)
+    assert again.status_code == 200
+    assert again.get_data() == first.get_data()
+    assert len(fake_proxy_api.queries) == queries
+
+    # Нормализованные фильтры: некорректный сорт - тот же ключ, что и date
+    assert client.get(SALES_URL + "&sort=price").headers["ETag"] == first.headers["ETag"]
+    assert len(fake_proxy_api.queries) == queries
+
+
+def test_conditional_get_returns_304(webapp_app, fake_proxy_api):
+    module = webapp_app(fake_proxy_api)
+    client = module.app.test_client()
+    first = client.get(SALES_URL)
+
+    by_etag = client.get(SALES_URL, headers={"If-None-Match": first.headers["ETag"]})
+    assert by_etag.status_code == 304
+    assert by_etag.get_data() == b""
+
+    by_date = client.get(SALES_URL, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert by_date.status_code == 304
+
+    stale = client.get(SALES_URL, headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+def test_page_after_upstream_error_is_not_cached(webapp_app, fake_proxy_api):
+    module = webapp_app(fake_proxy_api, PROXY_MAX_RETRIES=0)
+    client = module.app.test_client()
+
+    fake_proxy_api.error_status = 500
+    failed = client.get(SALES_URL)
+    assert failed.status_code == 200
+    assert "ETag" not in failed.headers
+
+    fake_proxy_api.error_status = None
+    recovered = client.get(SALES_URL)
+    assert recovered.status_code == 200
+    assert recovered.headers["ETag"]
+    assert recovered.get_data() != failed.get_data()
+    assert fake_proxy_api.queries
+
+
+def test_dashboard_is_cached(webapp_app, fake_proxy_api):
+    module = webapp_app(fake_proxy_api)
+    client = module.app.test_client()
+    first = client.get("/")
+    assert first.status_code == 200
+    requests_made = len(fake_proxy_api.headers)
+
+    again = client.get("/", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert len(fake_proxy_api.headers) == requests_made
+
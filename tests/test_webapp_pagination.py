@@ -0,0 +1,124 @@
+"""
+Тесты keyset-пагинации таблицы продаж Flask-приложения: webapp/services/pagination.py
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.columnar import SORTS, SalesColumns  # noqa: E402
+from services.pagination import (  # noqa: E402
+    MAX_PAGE_SIZE,
+    SortedRows,
+    SortedRowsCache,
+    clamp_page_size,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def _records():
+    # Повторяющиеся суммы и магазины, перемешанный порядок
+    return [
+        {
+            "STORE_ID": store + 1,
+            "STORE_NAME": f"Магазин {store}",
+            "ORDER_DATE": f"2024-02-{day:02d}",
+            "ALLCUP": day,
+            "TOTAL_CASH": (store * 7 + day) % 4,
+            "PACKAGES_KG": None,
+        }
+        for day in (3, 1, 2, 5, 4, 9, 8, 7, 6, 10)
+        for store in (2, 0, 1)
+    ]
+
+
+def _walk(sorted_rows, limit):
+    pages, cursor = [], None
+    while True:
+        page = sorted_rows.page(cursor, limit)
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("limit", [1, 4, 10, 30, 100])
+def test_cursor_walk_has_no_duplicates_or_gaps(sort, limit):
+    columns = SalesColumns.from_records(_records())
+    sorted_rows = SortedRows(columns, sort)
+    pages = _walk(sorted_rows, limit)
+    walked = [row for page in pages for row in page["rows"]]
+
+    assert len(walked) == 30
+    assert len({(row["store_name"], row["order_date"]) for row in walked}) == 30
+    # Смещения страниц идут подряд
+    assert [page["offset"] for page in pages] == list(range(0, 30, limit))[: len(pages)]
+    keys = [columns.sort_key(sort, int(index)) for index in sorted_rows.order]
+    assert keys == sorted(keys)
+
+
+@pytest.mark.parametrize("sort", SORTS)
+def test_same_named_stores_across_page_boundary(sort):
+    """Одноименные магазины за один день различаются по ID и не теряются на границе страниц"""
+    records = [
+        {"STORE_ID": store_id, "STORE_NAME": "Кофейня", "ORDER_DATE": "2024-02-05", "TOTAL_CASH": 100}
+        for store_id in (7, 3, 5)
+    ]
+    records.append({"STORE_ID": 1, "STORE_NAME": "Кофейня", "ORDER_DATE": "2024-02-04", "TOTAL_CASH": 100})
+    columns = SalesColumns.from_records(records)
+    sorted_rows = SortedRows(columns, sort)
+
+    pages = _walk(sorted_rows, 2)
+    assert [len(page["rows"]) for page in pages] == [2, 2]
+    walked = [int(columns.store_id[index]) for index in sorted_rows.order]
+    assert sorted(walked) == [1, 3, 5, 7]
+    # Ключи всех строк различны, поэтому курсор указывает ровно на одну позицию
+    keys = [columns.sort_key(sort, int(index)) for index in sorted_rows.order]
+    assert len(set(keys)) == 4 and keys == sorted(keys)
+    same_day = [store_id for store_id in walked if store_id != 1]
+    assert same_day == [3, 5, 7]
+
+
+def test_date_sort_is_newest_first():
+    sorted_rows = SortedRows(SalesColumns.from_records(_records()), "date")
+    rows = sorted_rows.page(None, 3)["rows"]
+    assert [row["order_date"].day for row in rows] == [10, 10, 10]
+    assert [row["store_name"] for row in rows] == ["Магазин 0", "Магазин 1", "Магазин 2"]
+
+
+def test_foreign_or_broken_cursor_restarts_from_first_page():
+    sorted_rows = SortedRows(SalesColumns.from_records(_records()), "store")
+    first = sorted_rows.page(None, 5)
+    assert sorted_rows.page(encode_cursor("date", (0, "x")), 5)["offset"] == 0
+    assert sorted_rows.page("garbage", 5)["offset"] == 0
+    assert sorted_rows.page(encode_cursor("store", (1, 2, 3)), 5)["rows"] == first["rows"]
+
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor("sum", (-12.5, "Магазин", 1700000000))
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "sum") == (-12.5, "Магазин", 1700000000)
+    assert decode_cursor(cursor, "date") is None
+    assert decode_cursor("", "sum") is None
+
+
+def test_page_size_is_clamped():
+    assert clamp_page_size(None) == clamp_page_size(0) == clamp_page_size(-5) == 100
+    assert clamp_page_size(10 ** 6) == MAX_PAGE_SIZE
+
+
+def test_sorted_rows_cache_is_lru():
+    cache = SortedRowsCache(max_entries=2, ttl=60)
+    columns = SalesColumns.from_records(_records())
+    builds = []
+
+    def build():
+        builds.append(1)
+        return SortedRows(columns, "date")
+
+    for key in ("a", "a", "b", "a", "c", "b"):
+        cache.get_or_build(key, build)
+    # a, b, c построены; b вытеснен (a использовался позже), затем построен снова
+    assert len(builds) == 4
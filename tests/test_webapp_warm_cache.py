@@ -0,0 +1,157 @@
+"""
+Тесты кэша схемы и списка магазинов клиента Proxy API Flask-приложения:
+_WarmValue и ProxyApiClient.get_stores в webapp/proxy_client.py
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("requests")
+
+from proxy_client import ProxyApiClient, ProxyApiError, _WarmValue  # noqa: E402
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def make_client():
+    clients = []
+
+    def make(upstream, **kwargs):
+        kwargs.setdefault("max_retries", 0)
+        client = ProxyApiClient("http://proxy.test", "test-token", **kwargs)
+        client.session.mount("http://", upstream.adapter())
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def _settle(value):
+    """Дождаться конца фонового обновления"""
+    for _ in range(200):
+        if not value._refreshing:
+            return
+        time.sleep(0.01)
+    raise AssertionError("refresh did not finish")
+
+
+def test_concurrent_cold_callers_load_once(executor):
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return len(loads)
+
+    value = _WarmValue(load, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(value.get(executor))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [1] * 5
+    assert len(loads) == 1
+
+
+def test_stale_value_is_served_while_refreshing(executor):
+    release = threading.Event()
+    loads = []
+
+    def load():
+        loads.append(1)
+        if len(loads) > 1:
+            release.wait(2)
+        return len(loads)
+
+    value = _WarmValue(load, ttl=0)
+    assert value.get(executor) == 1
+    # Устаревшее значение отдается сразу, обновление идет в фоне - и только одно
+    assert value.get(executor) == 1
+    assert value.get(executor) == 1
+    release.set()
+    _settle(value)
+    assert len(loads) == 2
+    assert value.get(executor) == 2
+
+
+def test_failed_refresh_keeps_previous_value(executor):
+    results = iter([["old"], RuntimeError("upstream down"), ["new"]])
+
+    def load():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    value = _WarmValue(load, ttl=0)
+    assert value.get(executor) == ["old"]
+    assert value.get(executor) == ["old"]
+    _settle(value)
+    # Неудачное обновление повторяется при следующем обращении
+    assert value.get(executor) == ["old"]
+    _settle(value)
+    assert value.get(executor) == ["new"]
+
+
+def test_cold_failure_is_raised_and_retried(executor):
+    attempts = []
+
+    def load():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ProxyApiError("down")
+        return "ok"
+
+    value = _WarmValue(load, ttl=60)
+    with pytest.raises(ProxyApiError):
+        value.get(executor)
+    assert value.get(executor) == "ok"
+
+
+def test_stores_take_one_roundtrip_when_warm(make_client, fake_proxy_api):
+    client = make_client(fake_proxy_api)
+
+    stores = client.get_stores()
+    assert stores == [{"ID": 1, "NAME": "Магазин 1"}, {"ID": 2, "NAME": "Магазин 2"}, {"ID": 3, "NAME": "Магазин 3"}]
+    requests_made = len(fake_proxy_api.headers)
+    # /api/tables и запрос магазинов
+    assert requests_made == 2
+
+    assert client.get_stores() == stores
+    assert client.has_table("storgrp")
+    assert not client.has_table("MISSING")
+    assert len(fake_proxy_api.headers) == requests_made
+
+
+def test_missing_table_gives_no_stores(make_client, fake_proxy_api):
+    client = make_client(fake_proxy_api)
+    client._tables = _WarmValue(lambda: {"GOODS"}, 60)
+    assert client.get_stores() == []
+    assert fake_proxy_api.queries == []
+
+
+def test_stale_stores_are_refreshed_in_background(make_client, fake_proxy_api):
+    client = make_client(fake_proxy_api, stores_ttl=0)
+    assert len(client.get_stores()) == 3
+
+    fake_proxy_api.stores[4] = "Магазин 4"
+    # Первый вызов после истечения TTL отдает прежний список
+    assert len(client.get_stores()) == 3
+    _settle(client._stores)
+    assert len(client._stores._value) == 4
+    # Обновился только список магазинов: таблицы живут schema_ttl
+    assert len(fake_proxy_api.headers) == 3
+    assert len(fake_proxy_api.queries) == 2
@@ -0,0 +1,78 @@
+"""
+Тесты прогрева процесса Flask-приложения: warm_up в webapp/app.py
+(медленный или недоступный Proxy API не задерживает старт дольше WARMUP_BUDGET)
+"""
+
+import logging
+import threading
+import time
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from conftest import FakeProxyApi  # noqa: E402
+
+BUDGET = 0.5
+
+
+class UnreachableProxyApi(FakeProxyApi):
+    """Proxy API, который не отвечает: соединение не устанавливается
+    или ответ не приходит за таймаут попытки (``delay`` секунд)"""
+
+    def __init__(self, delay=None):
+        super().__init__()
+        self.stall = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def adapter(self):
+        adapter = super().adapter()
+        upstream = self
+
+        def send(request, timeout=None, **kwargs):
+            with upstream._lock:
+                upstream.calls += 1
+            if upstream.stall is None:
+                raise requests.ConnectionError("connection refused")
+            # Как таймаут сокета: попытка обрывается не позже своего таймаута
+            time.sleep(min(upstream.stall, timeout))
+            raise requests.ReadTimeout("read timed out")
+
+        adapter.send = send
+        return adapter
+
+
+@pytest.mark.parametrize("delay", [None, 5.0], ids=["unreachable", "slow"])
+def test_warm_up_returns_within_budget(webapp_app, caplog, delay):
+    upstream = UnreachableProxyApi(delay)
+    # Без бюджета повторы с backoff заняли бы десятки секунд
+    module = webapp_app(upstream, WARMUP_BUDGET=BUDGET, PROXY_MAX_RETRIES=50, WARMUP_CONNECTIONS=3)
+    module.client.backoff_factor = 0.05
+
+    started = time.monotonic()
+    with caplog.at_level(logging.WARNING):
+        module.warm_up()
+    elapsed = time.monotonic() - started
+
+    assert elapsed < BUDGET + 0.5
+    assert upstream.calls >= 4
+    assert "Proxy API warm-up failed (4 of 4 calls)" in caplog.text
+    # Вызовы не продолжаются после возврата: все завершились внутри бюджета
+    calls = upstream.calls
+    time.sleep(0.2)
+    assert upstream.calls == calls
+
+
+def test_warm_up_loads_stores(webapp_app, fake_proxy_api, caplog):
+    module = webapp_app(fake_proxy_api, WARMUP_CONNECTIONS=2)
+    with caplog.at_level(logging.WARNING):
+        module.warm_up()
+
+    assert "warm-up failed" not in caplog.text
+    assert len(module.client.get_stores()) == 3
+    # Проверка состояния на каждое соединение; магазины загружены и берутся из клиента
+    requests_made = len(fake_proxy_api.headers)
+    module.client.get_stores()
+    assert len(fake_proxy_api.headers) == requests_made
+    assert all(0 < float(headers["X-Request-Timeout"]) <= 10 for headers in fake_proxy_api.headers)
@@ -0,0 +1,88 @@
+"""Vectorized sales aggregates: summary totals and store x period pivots.
+
+The pivot mirrors the desktop report table (``create_report_table`` in
+``src/gui_app.py``): daily rows are grouped by store and period, summed and
+spread into a store x period grid with missing cells filled with zero.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+import pandas as pd
+
+
+MEASURES = ["ALLCUP", "PACKAGES_KG", "TOTAL_CASH"]
+GRANULARITIES = ("day", "week", "month")
+
+
+def sales_frame(rows: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    """Build a typed frame from merged upstream sales rows."""
+    frame = pd.DataFrame.from_records(list(rows), columns=["STORE_NAME", "ORDER_DATE", *MEASURES])
+    frame["STORE_NAME"] = frame["STORE_NAME"].astype(str)
+    frame["ORDER_DATE"] = pd.to_datetime(frame["ORDER_DATE"])
+    frame[MEASURES] = frame[MEASURES].apply(pd.to_numeric).fillna(0.0).astype(float)
+    return frame
+
+
+def _period_start(dates: pd.Series, granularity: str) -> pd.Series:
+    # Same periods as the desktop report: day, week starting on Monday, calendar month
+    if granularity == "day":
+        return dates.dt.normalize()
+    if granularity == "week":
+        return dates.dt.to_period("W").dt.start_time
+    if granularity == "month":
+        return dates.dt.to_period("M").dt.start_time
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def summarize(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Totals over the whole frame."""
+    totals = frame[MEASURES].sum()
+    return {
+        "record_count": int(len(frame)),
+        "store_count": int(frame["STORE_NAME"].nunique()),
+        "day_count": int(frame["ORDER_DATE"].dt.normalize().nunique()),
+        "allcup": float(totals["ALLCUP"]),
+        "packages_kg": float(totals["PACKAGES_KG"]),
+        "total_cash": float(totals["TOTAL_CASH"]),
+    }
+
+
+def period_totals(frame: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """Measures summed per (store, period start).
+
+    Totals of consecutive date chunks can be combined with
+    ``DataFrame.add(other, fill_value=0)``.
+    """
+    return (
+        frame.assign(PERIOD=_period_start(frame["ORDER_DATE"], granularity))
+        .groupby(["STORE_NAME", "PERIOD"], sort=True)[MEASURES]
+        .sum()
+    )
+
+
+def pivot(frame: pd.DataFrame, granularity: str) -> Dict[str, Any]:
+    """Store x period grid for every measure, stores and periods sorted ascending."""
+    return pivot_totals(period_totals(frame, granularity), granularity)
+
+
+def pivot_totals(grouped: pd.DataFrame, granularity: str) -> Dict[str, Any]:
+    """``pivot`` over totals already produced by ``period_totals``."""
+    grouped = grouped.sort_index()
+    periods = grouped.index.get_level_values("PERIOD").unique().sort_values()
+    table = grouped.unstack("PERIOD", fill_value=0.0)
+
+    def grid(measure: str) -> List[List[float]]:
+        if table.empty:
+            return []
+        return table[measure].reindex(columns=periods, fill_value=0.0).to_numpy().tolist()
+
+    return {
+        "granularity": granularity,
+        "periods": [period.date() for period in periods],
+        "stores": table.index.tolist(),
+        "allcup": grid("ALLCUP"),
+        "packages_kg": grid("PACKAGES_KG"),
+        "total_cash": grid("TOTAL_CASH"),
+    }
@@ -0,0 +1,77 @@
+"""Circuit breaker guarding calls to the Proxy API."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. Then it half-opens and
+    lets a single trial call through: success closes the circuit, failure
+    opens it again. A trial that ends without a verdict is released so the
+    next call can take its place; one that never reports back is replaced
+    after another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now."""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - (self.opened_at or now) < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self._trial_started = None
+        if self._trial_started is not None and now - self._trial_started < self.reset_timeout:
+            return False
+        self._trial_started = now
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until the next call may be let through."""
+        if self.state != OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def release(self) -> None:
+        """Give up the trial slot without judging the upstream (e.g. the caller's budget ran out)."""
+        if self.state == HALF_OPEN:
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._trial_started = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": round(self.retry_after(), 1),
+        }
@@ -5,7 +5,8 @@ from __future__ import annotations
 from functools import lru_cache
 from typing import List
 
-from pydantic import AnyUrl, BaseSettings, Field, field_validator
+from pydantic import AnyUrl, Field, field_validator
+from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
@@ -22,6 +23,46 @@ class Settings(BaseSettings):
     proxy_primary_token: str = Field("", env="PROXY_PRIMARY_TOKEN")
     proxy_fallback_token: str = Field("", env="PROXY_FALLBACK_TOKEN")
     proxy_timeout: int = Field(30, env="PROXY_TIMEOUT")
+    proxy_max_connections: int = Field(20, env="PROXY_MAX_CONNECTIONS")
+    proxy_max_keepalive: int = Field(10, env="PROXY_MAX_KEEPALIVE")
+    proxy_keepalive_expiry: float = Field(30.0, env="PROXY_KEEPALIVE_EXPIRY")
+    proxy_http2: bool = Field(False, env="PROXY_HTTP2")
+    proxy_max_retries: int = Field(2, env="PROXY_MAX_RETRIES")
+    request_budget: float = Field(25.0, env="REQUEST_BUDGET")
+    # Duplicate a slow idempotent query once its latency passes the p95 of its kind
+    proxy_hedge: bool = Field(False, env="PROXY_HEDGE")
+    proxy_hedge_min_delay: float = Field(0.05, env="PROXY_HEDGE_MIN_DELAY")
+    proxy_breaker_threshold: int = Field(5, env="PROXY_BREAKER_THRESHOLD")
+    proxy_breaker_reset: float = Field(30.0, env="PROXY_BREAKER_RESET")
+    health_probe_interval: float = Field(15.0, env="HEALTH_PROBE_INTERVAL")
+    # Seconds between polls for new documents behind /sales/live
+    live_poll_interval: float = Field(10.0, env="LIVE_POLL_INTERVAL")
+    # Every N polls the live feed re-reads the whole day (0 disables)
+    live_reconcile_every: int = Field(30, env="LIVE_RECONCILE_EVERY")
+
+    sales_cache_max_bytes: int = Field(64 * 1024 * 1024, env="SALES_CACHE_MAX_BYTES")
+    sales_cache_today_ttl: int = Field(60, env="SALES_CACHE_TODAY_TTL")
+    sales_cache_serve_stale: bool = Field(True, env="SALES_CACHE_SERVE_STALE")
+    sales_page_ttl: int = Field(30, env="SALES_PAGE_TTL")
+    # Days of upstream data fetched and written per step of a file export
+    export_chunk_days: int = Field(31, env="EXPORT_CHUNK_DAYS")
+    # Time budget of each chunk of an export; exports outlive REQUEST_BUDGET
+    export_budget: float = Field(25.0, env="EXPORT_BUDGET")
+    # Point budgets: per store series of /sales/series, periods of /sales/pivot?granularity=auto
+    series_max_points: int = Field(500, env="SERIES_MAX_POINTS")
+    pivot_max_periods: int = Field(60, env="PIVOT_MAX_PERIODS")
+
+    # Cross-worker cache file; empty disables it. Windows reaching today use
+    # SALES_CACHE_TODAY_TTL, closed windows SHARED_CACHE_HISTORY_TTL.
+    shared_cache_path: str = Field("", env="SHARED_CACHE_PATH")
+    shared_cache_history_ttl: int = Field(3600, env="SHARED_CACHE_HISTORY_TTL")
+    shared_cache_stores_ttl: int = Field(300, env="SHARED_CACHE_STORES_TTL")
+
+    # Empty path disables the local store and the background sync
+    sales_store_path: str = Field("", env="SALES_STORE_PATH")
+    sales_store_backfill_days: int = Field(730, env="SALES_STORE_BACKFILL_DAYS")
+    sales_store_refresh_days: int = Field(3, env="SALES_STORE_REFRESH_DAYS")
+    sales_store_refresh_interval: int = Field(300, env="SALES_STORE_REFRESH_INTERVAL")
 
     allowed_origins: List[str] = Field(default_factory=list, env="ALLOWED_ORIGINS")
 
@@ -0,0 +1,42 @@
+"""Per-request time budget shared with upstream calls.
+
+The HTTP middleware starts a deadline for every incoming request; the
+Proxy API client reads it to bound each attempt and to stop retrying once
+the budget is spent. File exports replace it with a budget per chunk
+(``restart``). Outside a request there is no deadline.
+"""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def start(budget: float) -> Token:
+    """Set a deadline ``budget`` seconds from now (never later than an enclosing one)."""
+    deadline = time.monotonic() + budget
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    return _deadline.set(deadline)
+
+
+def restart(budget: float) -> Token:
+    """Set a deadline ``budget`` seconds from now, replacing any enclosing one."""
+    return _deadline.set(time.monotonic() + budget)
+
+
+def reset(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None when unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
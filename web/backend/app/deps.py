@@ -3,9 +3,17 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Optional
 
+from .circuit_breaker import CircuitBreaker
 from .config import Settings, get_settings
+from .health_monitor import HealthMonitor
+from .live_feed import LiveSalesFeed
+from .pagination import SortedSalesCache
 from .proxy_client import ProxyApiClient
+from .sales_cache import SalesCache
+from .sales_store import SalesMaterializer, SalesStore
+from .shared_cache import SharedCache
 
 
 @lru_cache()
@@ -16,6 +24,80 @@ def get_proxy_client() -> ProxyApiClient:
         primary_token=settings.proxy_primary_token or None,
         fallback_token=settings.proxy_fallback_token or None,
         timeout=settings.proxy_timeout,
+        max_connections=settings.proxy_max_connections,
+        max_keepalive_connections=settings.proxy_max_keepalive,
+        keepalive_expiry=settings.proxy_keepalive_expiry,
+        http2=settings.proxy_http2,
+        max_retries=settings.proxy_max_retries,
+        hedge=settings.proxy_hedge,
+        hedge_min_delay=settings.proxy_hedge_min_delay,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.proxy_breaker_threshold,
+            reset_timeout=settings.proxy_breaker_reset,
+        ),
+    )
+
+
+@lru_cache()
+def get_sales_cache() -> SalesCache:
+    settings: Settings = get_settings()
+    return SalesCache(
+        max_bytes=settings.sales_cache_max_bytes,
+        today_ttl=settings.sales_cache_today_ttl,
+        serve_stale=settings.sales_cache_serve_stale,
+    )
+
+
+@lru_cache()
+def get_health_monitor() -> HealthMonitor:
+    settings: Settings = get_settings()
+    return HealthMonitor(get_proxy_client(), interval=settings.health_probe_interval)
+
+
+@lru_cache()
+def get_live_feed() -> LiveSalesFeed:
+    settings: Settings = get_settings()
+    return LiveSalesFeed(
+        get_proxy_client(),
+        interval=settings.live_poll_interval,
+        reconcile_every=settings.live_reconcile_every,
+    )
+
+
+@lru_cache()
+def get_sorted_sales_cache() -> SortedSalesCache:
+    settings: Settings = get_settings()
+    return SortedSalesCache(ttl=settings.sales_page_ttl)
+
+
+@lru_cache()
+def get_sales_store() -> Optional[SalesStore]:
+    settings: Settings = get_settings()
+    if not settings.sales_store_path:
+        return None
+    return SalesStore(settings.sales_store_path)
+
+
+@lru_cache()
+def get_shared_cache() -> Optional[SharedCache]:
+    settings: Settings = get_settings()
+    if not settings.shared_cache_path:
+        return None
+    return SharedCache(settings.shared_cache_path)
+
+
+@lru_cache()
+def get_sales_materializer() -> Optional[SalesMaterializer]:
+    settings: Settings = get_settings()
+    store = get_sales_store()
+    if store is None:
+        return None
+    return SalesMaterializer(
+        store,
+        get_proxy_client(),
+        backfill_days=settings.sales_store_backfill_days,
+        refresh_days=settings.sales_store_refresh_days,
+        refresh_interval=settings.sales_store_refresh_interval,
     )
 
 
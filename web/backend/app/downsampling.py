@@ -0,0 +1,87 @@
+"""Downsampling of long sales series for charts and tables.
+
+Charts get Largest-Triangle-Three-Buckets (LTTB): a fixed number of
+points chosen from the daily totals so that peaks and dips survive.
+Tables can instead be coarsened to weeks or months, choosing the finest
+granularity whose period count fits the budget.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import GRANULARITIES
+
+
+def period_count(start: date, end: date, granularity: str) -> int:
+    """Number of periods of ``granularity`` touched by the range."""
+    if granularity == "day":
+        return (end - start).days + 1
+    if granularity == "week":
+        return (end.toordinal() - end.weekday() - (start.toordinal() - start.weekday())) // 7 + 1
+    if granularity == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def auto_granularity(start: date, end: date, max_periods: int) -> str:
+    """Finest granularity with at most ``max_periods`` periods; month otherwise."""
+    for granularity in GRANULARITIES:
+        if period_count(start, end, granularity) <= max_periods:
+            return granularity
+    return GRANULARITIES[-1]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the ``threshold`` points of (x, y) kept by LTTB.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the point kept
+    from the previous bucket and the mean of the next one.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # threshold - 2 non-empty buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        # Twice the triangle area; the factor does not change the argmax
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def downsample_series(grouped: pd.DataFrame, measure: str, max_points: int) -> List[Dict[str, Any]]:
+    """One series per store from ``period_totals`` output, at most ``max_points`` points each."""
+    series = []
+    for store, totals in grouped[measure.upper()].groupby(level="STORE_NAME", sort=True):
+        periods = totals.index.get_level_values("PERIOD").to_numpy(dtype="datetime64[D]")
+        values = totals.to_numpy(dtype=float)
+        kept = lttb(periods.astype(np.int64), values, max_points)
+        series.append(
+            {
+                "store_name": store,
+                "periods": periods[kept].astype(object).tolist(),
+                "values": values[kept].tolist(),
+                "source_points": int(len(values)),
+            }
+        )
+    return series
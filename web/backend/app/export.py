@@ -0,0 +1,169 @@
+"""Streaming file exports of sales data: CSV, XLSX and Parquet.
+
+Rows arrive in batches, one date chunk of upstream data at a time, and are
+written as they come. CSV goes to the client directly. XLSX and Parquet keep
+their index at the end of the file, so constant-memory writers fill a
+temporary file that is streamed out once complete. Parquet needs the
+optional ``pyarrow`` package.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import importlib.util
+import io
+import tempfile
+from datetime import date
+from typing import IO, Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from openpyxl import Workbook
+
+from .serialization import coerce_sales_rows
+
+
+EXPORT_FORMATS = ("csv", "xlsx", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+FILE_CHUNK_SIZE = 64 * 1024
+
+SALES_HEADER = ["order_date", "store_name", "allcup", "packages_kg", "total_cash"]
+SALES_TYPES = ["date", "string", "float", "float", "float"]
+PIVOT_MEASURES = ("allcup", "packages_kg", "total_cash")
+
+Row = Sequence[Any]
+Batches = AsyncIterator[List[Row]]
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def sales_rows(rows: Sequence[Dict[str, Any]]) -> List[Row]:
+    """Upstream rows of one chunk as export rows, ordered by day and store."""
+    columns = coerce_sales_rows(rows)
+    days = [date.fromisoformat(value[:10]) for value in columns["order_date"]]
+    return sorted(
+        zip(days, columns["store_name"], columns["allcup"], columns["packages_kg"], columns["total_cash"]),
+        key=lambda row: (row[0], row[1]),
+    )
+
+
+def pivot_rows(table: Dict[str, Any]) -> Tuple[List[str], List[str], List[Row]]:
+    """Header, column types and rows of a pivot: one row per store and measure, one column per period."""
+    periods = [period.isoformat() for period in table["periods"]]
+    header = ["store_name", "measure", *periods]
+    types = ["string", "string", *(["float"] * len(periods))]
+    rows = [
+        [store, measure, *table[measure][index]]
+        for index, store in enumerate(table["stores"])
+        for measure in PIVOT_MEASURES
+    ]
+    return header, types, rows
+
+
+async def primed(batches: Batches) -> Batches:
+    """Fetch the first batch before the response starts.
+
+    Errors loading it still become a regular HTTP error; later ones can
+    only cut the stream short.
+    """
+    try:
+        first: Optional[List[Row]] = await batches.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def chained() -> Batches:
+        if first is not None:
+            yield first
+            async for batch in batches:
+                yield batch
+
+    return chained()
+
+
+async def single_batch(rows: List[Row]) -> Batches:
+    yield rows
+
+
+def stream_export(
+    export_format: str,
+    header: List[str],
+    types: List[str],
+    batches: Batches,
+    sheet_title: str,
+) -> AsyncIterator[bytes]:
+    if export_format == "csv":
+        return _iter_csv(header, batches)
+    if export_format == "xlsx":
+        return _iter_xlsx(header, batches, sheet_title)
+    if export_format == "parquet":
+        return _iter_parquet(header, types, batches)
+    raise ValueError(f"Unknown export format: {export_format}")
+
+
+async def _iter_csv(header: List[str], batches: Batches) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    # BOM so that Excel detects UTF-8 and shows Cyrillic store names
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _iter_file_chunks(file: IO[bytes]) -> AsyncIterator[bytes]:
+    file.seek(0)
+    while True:
+        chunk = await asyncio.to_thread(file.read, FILE_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _append_rows(sheet: Any, rows: List[Row]) -> None:
+    for row in rows:
+        sheet.append(row)
+
+
+async def _iter_xlsx(header: List[str], batches: Batches, sheet_title: str) -> AsyncIterator[bytes]:
+    # Write-only workbooks spool rows to disk instead of keeping cells in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append(header)
+    async for batch in batches:
+        await asyncio.to_thread(_append_rows, sheet, batch)
+    with tempfile.TemporaryFile() as file:
+        await asyncio.to_thread(workbook.save, file)
+        async for chunk in _iter_file_chunks(file):
+            yield chunk
+
+
+async def _iter_parquet(header: List[str], types: List[str], batches: Batches) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {"string": pa.string(), "float": pa.float64(), "date": pa.date32()}
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in zip(header, types)])
+
+    with tempfile.TemporaryFile() as file:
+        writer = pq.ParquetWriter(file, schema)
+        try:
+            async for batch in batches:
+                # One row group per batch keeps only the current chunk in memory
+                columns = list(zip(*batch)) if batch else [[] for _ in header]
+                table = pa.Table.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                    schema=schema,
+                )
+                await asyncio.to_thread(writer.write_table, table)
+        finally:
+            writer.close()
+        async for chunk in _iter_file_chunks(file):
+            yield chunk
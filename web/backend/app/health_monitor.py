@@ -0,0 +1,66 @@
+"""Background probing of the Proxy API health endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from .proxy_client import ProxyApiClient, ProxyApiError
+
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Probes the upstream every ``interval`` seconds and caches the result.
+
+    ``GET /health`` reads the cached status instead of calling upstream.
+    Probes bypass the client's open circuit and report their outcome to it,
+    so a recovered upstream closes the circuit within one interval.
+    """
+
+    def __init__(self, client: ProxyApiClient, interval: float) -> None:
+        self.client = client
+        self.interval = interval
+        self.healthy: Optional[bool] = None
+        self.status: Dict[str, Any] = {}
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+        self.latency: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def check(self) -> None:
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                self.status = await self.client.health(probe=True)
+                self.healthy = True
+                self.last_error = None
+            except ProxyApiError as exc:
+                if self.healthy is not False:
+                    logger.warning("Proxy API health probe failed: %s", exc)
+                self.healthy = False
+                self.last_error = str(exc)
+            self.latency = time.perf_counter() - started
+            self.checked_at = datetime.now(timezone.utc)
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Cached status; the first call before any probe waits for one."""
+        if self.checked_at is None:
+            await self.check()
+        return {
+            **self.status,
+            "healthy": self.healthy,
+            "error": self.last_error,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "latency": round(self.latency, 4) if self.latency is not None else None,
+            "circuit": self.client.breaker.stats(),
+        }
+
+    async def run_forever(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,222 @@
+"""Live sales of the current day pushed to subscribers over Server-Sent Events.
+
+A single poller asks the Proxy API only for documents newer than the last
+seen document ID and folds them into per-store running totals. Every
+connected client shares that poller: it receives a snapshot of today's
+totals on connect and then per-store deltas as they arrive.
+
+Document IDs are a watermark, not a commit log: a document committed after
+a higher ID was already seen is skipped by the incremental query. Every
+``reconcile_every`` polls the whole day is re-read and the totals replaced,
+so such late documents are counted with a bounded delay.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import math
+import time
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+import orjson
+
+from .proxy_client import ProxyApiClient, ProxyApiError
+
+
+logger = logging.getLogger(__name__)
+
+MEASURES = ("allcup", "packages_kg", "total_cash")
+
+
+def sse_message(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def _same_totals(left: Dict[int, Dict[str, Any]], right: Dict[int, Dict[str, Any]]) -> bool:
+    """Equal per-store totals, up to float summation order."""
+    if left.keys() != right.keys():
+        return False
+    return all(
+        math.isclose(left[store_id][measure], right[store_id][measure], rel_tol=1e-9, abs_tol=1e-6)
+        for store_id in left
+        for measure in MEASURES
+    )
+
+
+class LiveSalesFeed:
+    """Per-store totals of today, updated incrementally by one background poller.
+
+    The poller runs only while at least one client is subscribed. A client
+    whose queue overflows gets a fresh snapshot instead of the missed deltas.
+    """
+
+    def __init__(
+        self,
+        client: ProxyApiClient,
+        interval: float,
+        heartbeat: float = 15.0,
+        queue_size: int = 64,
+        reconcile_every: int = 30,
+    ) -> None:
+        self.client = client
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.reconcile_every = reconcile_every
+        self.day: Optional[date] = None
+        self.last_id = 0
+        self.polls_since_reconcile = 0
+        self.totals: Dict[int, Dict[str, Any]] = {}
+        self.last_poll: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    # State --------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "day": self.day.isoformat() if self.day else None,
+            "last_id": self.last_id,
+            "stores": sorted(self.totals.values(), key=lambda store: str(store["store_name"])),
+        }
+
+    def _apply(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add delta rows to the running totals and return them in event form."""
+        deltas = []
+        for row in rows:
+            store_id = int(row["STORE_ID"])
+            delta = {
+                "store_id": store_id,
+                "store_name": row.get("STORE_NAME"),
+                "allcup": float(row.get("ALLCUP", 0) or 0),
+                "packages_kg": float(row.get("PACKAGES_KG", 0) or 0),
+                "total_cash": float(row.get("TOTAL_CASH", 0) or 0),
+            }
+            totals = self.totals.setdefault(
+                store_id, {"store_id": store_id, "store_name": delta["store_name"], **dict.fromkeys(MEASURES, 0.0)}
+            )
+            for measure in MEASURES:
+                totals[measure] += delta[measure]
+            deltas.append(delta)
+        return deltas
+
+    async def poll_once(self) -> None:
+        today = date.today()
+        if self.day != today:
+            # New day (or first poll): start over from the first document
+            self.day, self.last_id, self.totals = today, 0, {}
+            self.polls_since_reconcile = 0
+            rows, self.last_id = await self.client.get_sales_since(today.isoformat(), 0)
+            self._apply(rows)
+            self._publish(sse_message("snapshot", self.snapshot()))
+            return
+
+        self.polls_since_reconcile += 1
+        if self.reconcile_every and self.polls_since_reconcile >= self.reconcile_every:
+            await self.reconcile()
+            return
+
+        rows, last_id = await self.client.get_sales_since(today.isoformat(), self.last_id)
+        if not rows:
+            return
+        self.last_id = last_id
+        deltas = self._apply(rows)
+        self._publish(sse_message("delta", {"day": today.isoformat(), "last_id": last_id, "stores": deltas}))
+
+    async def reconcile(self) -> None:
+        """Re-read the whole day and replace the running totals.
+
+        Picks up documents that committed below the watermark after it had
+        moved past them. Subscribers get a snapshot when the totals changed.
+        """
+        today = self.day or date.today()
+        rows, last_id = await self.client.get_sales_since(today.isoformat(), 0)
+        running, self.totals = self.totals, {}
+        self._apply(rows)
+        self.last_id = max(self.last_id, last_id)
+        self.polls_since_reconcile = 0
+        if not _same_totals(running, self.totals):
+            logger.info("Live sales totals of %s reconciled with a full re-read", today)
+            self._publish(sse_message("snapshot", self.snapshot()))
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except ProxyApiError as exc:
+                logger.warning("Live sales poll failed: %s", exc)
+                self.last_error = str(exc)
+                # A failed day switch is retried from scratch on the next poll
+                if self.last_id == 0:
+                    self.day = None
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Live sales poll failed")
+                self.last_error = str(exc)
+                # The totals may be half-applied: rebuild them from a fresh snapshot
+                self.day = None
+            self.last_poll = time.time()
+            await asyncio.sleep(self.interval)
+
+    # Subscribers --------------------------------------------------------
+    def _publish(self, message: bytes) -> None:
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too slow to keep up: replace the backlog with the current totals
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(sse_message("snapshot", self.snapshot()))
+
+    def _ensure_polling(self) -> None:
+        if self._task is None or self._task.done():
+            # A clean context: the poller must not inherit the subscribing
+            # request's deadline
+            self._task = asyncio.create_task(self.run_forever(), context=contextvars.Context())
+
+    async def _stop_polling(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def events(self) -> AsyncIterator[bytes]:
+        """SSE stream for one client: the current snapshot, then deltas and heartbeats."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        self._ensure_polling()
+        try:
+            if self.day is not None:
+                yield sse_message("snapshot", self.snapshot())
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield b": keep-alive\n\n"
+                    continue
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers:
+                await self._stop_polling()
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+        await self._stop_polling()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "polling": self._task is not None and not self._task.done(),
+            "day": self.day.isoformat() if self.day else None,
+            "last_id": self.last_id,
+            "last_poll": self.last_poll,
+            "last_error": self.last_error,
+        }
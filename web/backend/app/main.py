@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from . import deadline
 from .config import get_settings
-from .deps import close_proxy_client
-from .routers import health, sales, stores
+from .deps import close_proxy_client, get_health_monitor, get_live_feed, get_sales_materializer
+from .metrics import HTTP_REQUEST_DURATION, HTTP_RESPONSE_SIZE
+from .proxy_client import ProxyApiCircuitOpen, ProxyApiError, ProxyApiTimeout
+from .routers import health, live, metrics, sales, stores
 
 
 def create_app() -> FastAPI:
@@ -30,16 +36,78 @@ def create_app() -> FastAPI:
             allow_headers=["*"],
         )
 
+    @app.middleware("http")
+    async def request_deadline(request: Request, call_next):
+        budget = settings.request_budget
+        requested = request.headers.get("x-request-timeout")
+        if requested:
+            try:
+                budget = min(budget, max(0.0, float(requested)))
+            except ValueError:
+                pass
+        token = deadline.start(budget)
+        try:
+            return await call_next(request)
+        finally:
+            deadline.reset(token)
+
+    # Registered last, so it wraps the deadline middleware and measures the whole request
+    @app.middleware("http")
+    async def record_metrics(request: Request, call_next):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await call_next(request)
+            return response
+        finally:
+            # Route template, not the raw path, keeps label cardinality bounded
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            status = str(response.status_code) if response is not None else "500"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, method=request.method, route=route_path, status=status
+            )
+            if response is not None and "content-length" in response.headers:
+                HTTP_RESPONSE_SIZE.observe(int(response.headers["content-length"]), route=route_path)
+
+    @app.exception_handler(ProxyApiCircuitOpen)
+    async def proxy_circuit_open_handler(request: Request, exc: ProxyApiCircuitOpen) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+        )
+
+    @app.exception_handler(ProxyApiTimeout)
+    async def proxy_timeout_handler(request: Request, exc: ProxyApiTimeout) -> JSONResponse:
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+    @app.exception_handler(ProxyApiError)
+    async def proxy_error_handler(request: Request, exc: ProxyApiError) -> JSONResponse:
+        return JSONResponse(status_code=502, content={"detail": str(exc)})
+
     app.include_router(health.router)
     app.include_router(stores.router)
     app.include_router(sales.router)
+    app.include_router(live.router)
+    app.include_router(metrics.router)
+
+    background_tasks: list[asyncio.Task] = []
 
     @app.on_event("startup")
     async def startup_event() -> None:
         logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+        background_tasks.append(asyncio.create_task(get_health_monitor().run_forever()))
+        materializer = get_sales_materializer()
+        if materializer is not None:
+            background_tasks.append(asyncio.create_task(materializer.run_forever()))
 
     @app.on_event("shutdown")
     async def shutdown_event() -> None:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await get_live_feed().close()
         await close_proxy_client()
 
     return app
@@ -0,0 +1,102 @@
+"""Keyset pagination over sorted sales results."""
+
+from __future__ import annotations
+
+import base64
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import orjson
+
+
+MAX_PAGE_SIZE = 1000
+
+
+def _day(row: Dict[str, Any]) -> int:
+    return date.fromisoformat(str(row.get("ORDER_DATE"))[:10]).toordinal()
+
+
+def _cash(row: Dict[str, Any]) -> float:
+    return float(row.get("TOTAL_CASH", 0) or 0)
+
+
+def _store_id(row: Dict[str, Any]) -> int:
+    return int(row.get("STORE_ID", 0) or 0)
+
+
+# Every sort key covers (store id, day) - store names are not unique - so the
+# order is total and a cursor points at exactly one position. Descending
+# fields are negated.
+SORT_KEYS: Dict[str, Callable[[Dict[str, Any]], Tuple]] = {
+    "date": lambda row: (-_day(row), str(row.get("STORE_NAME", "")), _store_id(row)),
+    "store": lambda row: (str(row.get("STORE_NAME", "")), _store_id(row), _day(row)),
+    "total_cash": lambda row: (-_cash(row), str(row.get("STORE_NAME", "")), _day(row), _store_id(row)),
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor is malformed or was issued for another sort."""
+
+
+def encode_cursor(sort: str, key: Tuple) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([sort, list(key)])).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple:
+    try:
+        cursor_sort, key = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if cursor_sort != sort or not isinstance(key, list):
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return tuple(key)
+
+
+class SortedSales:
+    """Rows sorted once by a sort key, with the keys kept for bisecting."""
+
+    def __init__(self, rows: List[Dict[str, Any]], sort: str) -> None:
+        key_func = SORT_KEYS[sort]
+        pairs = sorted(((key_func(row), row) for row in rows), key=lambda pair: pair[0])
+        self.sort = sort
+        self.keys = [key for key, _ in pairs]
+        self.rows = [row for _, row in pairs]
+
+    def page(self, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Rows after ``cursor`` (at most ``limit``) and the cursor of the next page."""
+        start = 0
+        if cursor:
+            after = decode_cursor(cursor, self.sort)
+            try:
+                start = bisect_right(self.keys, after)
+            except TypeError as exc:
+                raise InvalidCursor("Malformed cursor") from exc
+        end = start + limit
+        next_cursor = encode_cursor(self.sort, self.keys[end - 1]) if end < len(self.rows) else None
+        return self.rows[start:end], next_cursor
+
+
+class SortedSalesCache:
+    """LRU of sorted results so that following pages skip re-sorting."""
+
+    def __init__(self, ttl: float, max_entries: int = 64) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, SortedSales]]" = OrderedDict()
+
+    async def get_or_build(self, key: Hashable, build: Callable[[], Awaitable[SortedSales]]) -> SortedSales:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        result = await build()
+        self._entries[key] = (now + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
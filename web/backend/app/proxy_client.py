@@ -2,11 +2,30 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
 
 import httpx
 
+from . import deadline
+from .circuit_breaker import CircuitBreaker
+from .metrics import UPSTREAM_HEDGES, UPSTREAM_REQUEST_DURATION, UPSTREAM_RESPONSE_SIZE, UPSTREAM_RETRIES
+
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying for idempotent requests
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
 
 class ProxyApiError(Exception):
     """Base exception for proxy API errors."""
@@ -16,6 +35,91 @@ class ProxyApiAuthError(ProxyApiError):
     pass
 
 
+class ProxyApiUnavailable(ProxyApiError):
+    """Proxy API could not be reached (connection or protocol failure)."""
+
+
+class ProxyApiTimeout(ProxyApiError):
+    """The request budget ran out before the Proxy API answered."""
+
+
+class ProxyApiBudgetExceeded(ProxyApiTimeout):
+    """The request budget was spent before the call was made (not an upstream fault)."""
+
+
+class ProxyApiServerError(ProxyApiError):
+    """Proxy API answered with a 5xx status."""
+
+
+class ProxyApiCircuitOpen(ProxyApiUnavailable):
+    """Call rejected without contacting the Proxy API: the circuit is open."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Failures that say the upstream itself is unhealthy
+BREAKER_FAILURES = (ProxyApiUnavailable, ProxyApiTimeout, ProxyApiServerError)
+
+
+# Goods counted as coffee packages (PACKAGES_KG): packed coffee by weight and Caotina packages
+PACKAGE_GOODS_FILTER = """(
+                    (
+                        (G.NAME LIKE '%250 g%' OR G.NAME LIKE '%250г%' OR
+                         G.NAME LIKE '%500 g%' OR G.NAME LIKE '%500г%' OR
+                         G.NAME LIKE '%1 kg%' OR G.NAME LIKE '%1кг%' OR
+                         G.NAME LIKE '%200 g%' OR G.NAME LIKE '%200г%' OR
+                         G.NAME LIKE '%125 g%' OR G.NAME LIKE '%125г%' OR
+                         G.NAME LIKE '%80 g%' OR G.NAME LIKE '%80г%' OR
+                         G.NAME LIKE '%0.25%' OR G.NAME LIKE '%0.5%' OR
+                         G.NAME LIKE '%0.2%' OR G.NAME LIKE '%0.125%' OR
+                         G.NAME LIKE '%0.08%')
+                        AND (G.NAME LIKE '%Coffee%' OR G.NAME LIKE '%кофе%' OR G.NAME LIKE '%Кофе%' OR G.NAME LIKE '%Blaser%')
+                    )
+                    OR (GG.NAME LIKE '%Caotina swiss chocolate drink (package)%')
+              )"""
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls, per statement kind."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=size))
+
+    def observe(self, kind: str, seconds: float) -> None:
+        self._samples[kind].append(seconds)
+
+    def quantile(self, kind: str, q: float) -> Optional[float]:
+        """The ``q`` quantile for ``kind``; None until enough calls were seen."""
+        samples = self._samples.get(kind)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
 class ProxyApiClient:
     def __init__(
         self,
@@ -23,6 +127,17 @@ class ProxyApiClient:
         primary_token: Optional[str] = None,
         fallback_token: Optional[str] = None,
         timeout: int = 30,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.05,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         tokens: List[str] = []
@@ -35,7 +150,28 @@ class ProxyApiClient:
             raise ValueError("No API token provided")
         self._token_index = 0
         self.timeout = timeout
-        self._client = httpx.AsyncClient(timeout=timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.latencies = LatencyWindow()
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http2=http2,
+        )
+        # Identical concurrent calls share one upstream execution (single-flight)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
 
     @property
     def current_token(self) -> str:
@@ -50,67 +186,269 @@ class ProxyApiClient:
     async def close(self) -> None:
         await self._client.aclose()
 
-    async def _request(self, method: str, path: str, *, json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def _single_flight(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run ``factory`` once per ``key`` while a call with that key is in flight.
+
+        Callers arriving while the call is running await the same task. The
+        task is shielded, so one cancelled caller does not cancel the others.
+        It runs under the first caller's deadline; a later caller with less
+        time left stops waiting when its own budget runs out.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        left = deadline.remaining()
+        if left is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(left, 0.0))
+        except asyncio.TimeoutError as exc:
+            raise ProxyApiTimeout("Request budget ran out waiting for a shared Proxy API call") from exc
+
+    def _attempt_timeout(self) -> float:
+        """Timeout for the next attempt: the client timeout capped by the request budget."""
+        left = deadline.remaining()
+        if left is None:
+            return float(self.timeout)
+        if left <= 0:
+            raise ProxyApiBudgetExceeded("Request budget exhausted before calling Proxy API")
+        return min(float(self.timeout), left)
+
+    async def _backoff(self, retry: int, retry_after: Optional[str] = None) -> bool:
+        """Sleep before retry number ``retry``; False when the budget does not allow it."""
+        delay = _parse_retry_after(retry_after)
+        if delay is None:
+            # Full jitter: spreads retries of concurrent requests apart
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** retry)))
+        left = deadline.remaining()
+        limit = float(self.timeout) if left is None else left
+        if delay >= limit:
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None,
+        kind: str = "other",
+        probe: bool = False,
+    ) -> Dict[str, Any]:
+        """Call the Proxy API, recording latency and payload size under ``kind``.
+
+        Calls go through the circuit breaker; a ``probe`` bypasses the open
+        circuit but still reports its outcome, so a healthy probe closes it.
+        Every call settles with the breaker: an answer from the upstream,
+        including an auth failure or another 4xx, counts as healthy; a call
+        that ends without reaching a verdict (spent budget, cancellation)
+        releases a half-open trial slot.
+        """
+        if idempotent is None:
+            idempotent = method in ("GET", "HEAD", "OPTIONS")
+        if not probe and not self.breaker.allow():
+            UPSTREAM_REQUEST_DURATION.observe(0.0, kind=kind, outcome="circuit_open")
+            raise ProxyApiCircuitOpen("Proxy API circuit is open", self.breaker.retry_after())
+
+        started = time.perf_counter()
+        outcome = "error"
+        healthy: Optional[bool] = None
+        try:
+            if idempotent and self.hedge and not probe:
+                payload, size = await self._hedged_send(method, path, json, kind)
+            else:
+                payload, size = await self._send(method, path, json, idempotent, kind)
+            outcome = "ok"
+            healthy = True
+            self.latencies.observe(kind, time.perf_counter() - started)
+            UPSTREAM_RESPONSE_SIZE.observe(size, kind=kind)
+            return payload
+        except ProxyApiBudgetExceeded:
+            outcome = "budget_exceeded"
+            raise
+        except BREAKER_FAILURES as exc:
+            outcome = "timeout" if isinstance(exc, ProxyApiTimeout) else "error"
+            healthy = False
+            raise
+        except ProxyApiError:
+            # Non-retryable client error: the upstream answered, so it is up
+            healthy = True
+            raise
+        finally:
+            if healthy is True:
+                self.breaker.record_success()
+            elif healthy is False:
+                self.breaker.record_failure()
+            elif not probe:
+                self.breaker.release()
+            UPSTREAM_REQUEST_DURATION.observe(time.perf_counter() - started, kind=kind, outcome=outcome)
+
+    def _hedge_delay(self, kind: str) -> Optional[float]:
+        latency = self.latencies.quantile(kind, self.hedge_quantile)
+        if latency is None:
+            return None
+        return max(self.hedge_min_delay, latency)
+
+    async def _hedged_send(
+        self,
+        method: str,
+        path: str,
+        json: Optional[Dict[str, Any]],
+        kind: str,
+    ) -> Tuple[Dict[str, Any], int]:
+        """``_send`` of an idempotent call, duplicated once if it outlives the hedge delay.
+
+        The delay is the p95 latency of recent calls of the same kind, so only
+        the slowest few percent get a second attempt. The first answer wins
+        and the other attempt is cancelled.
+        """
+        delay = self._hedge_delay(kind)
+        left = deadline.remaining()
+        if delay is None or (left is not None and left <= delay):
+            return await self._send(method, path, json, True, kind)
+
+        # Attempts are tasks created in this context, so they share the request deadline
+        primary = asyncio.ensure_future(self._send(method, path, json, True, kind))
+        attempts = [primary]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if done:
+                return primary.result()
+            hedge = asyncio.ensure_future(self._send(method, path, json, True, kind))
+            attempts.append(hedge)
+            pending = set(attempts)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        UPSTREAM_HEDGES.inc(kind=kind, winner="hedge" if task is hedge else "primary")
+                        return task.result()
+                    error = error or task.exception()
+            UPSTREAM_HEDGES.inc(kind=kind, winner="none")
+            assert error is not None
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # a losing attempt's error is not logged as unretrieved
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        json: Optional[Dict[str, Any]],
+        idempotent: bool,
+        kind: str,
+    ) -> Tuple[Dict[str, Any], int]:
         url = f"{self.base_url}{path}"
         attempts = 0
         max_attempts = len(self.tokens)
+        retries = 0
 
-        while attempts < max_attempts:
-            headers = {"Authorization": f"Bearer {self.current_token}"}
-            response = await self._client.request(method, url, json=json, headers=headers)
+        while True:
+            timeout = self._attempt_timeout()
+            # The upstream may drop work nobody waits for once this runs out
+            headers = {"Authorization": f"Bearer {self.current_token}", "X-Request-Timeout": f"{timeout:.3f}"}
+            try:
+                response = await self._client.request(method, url, json=json, headers=headers, timeout=timeout)
+            except httpx.TransportError as exc:
+                if idempotent and retries < self.max_retries and await self._backoff(retries):
+                    retries += 1
+                    UPSTREAM_RETRIES.inc(kind=kind, reason=type(exc).__name__)
+                    continue
+                if isinstance(exc, httpx.TimeoutException):
+                    raise ProxyApiTimeout(f"Proxy API did not answer in time: {exc!r}") from exc
+                raise ProxyApiUnavailable(f"Proxy API is unavailable: {exc!r}") from exc
 
-            if response.status_code == 401 and self._switch_token():
+            if response.status_code == 401:
+                if not self._switch_token():
+                    raise ProxyApiAuthError("Authentication with Proxy API failed")
                 attempts += 1
+                if attempts >= max_attempts:
+                    raise ProxyApiAuthError("All Proxy API tokens failed")
                 continue
 
-            if response.status_code == 401:
-                raise ProxyApiAuthError("Authentication with Proxy API failed")
+            if (
+                response.status_code in RETRY_STATUSES
+                and idempotent
+                and retries < self.max_retries
+                and await self._backoff(retries, response.headers.get("Retry-After"))
+            ):
+                retries += 1
+                UPSTREAM_RETRIES.inc(kind=kind, reason=str(response.status_code))
+                continue
 
             if response.status_code >= 400:
                 try:
                     payload = response.json()
                 except ValueError:
                     payload = response.text
-                raise ProxyApiError(f"Proxy API error {response.status_code}: {payload}")
+                error = ProxyApiServerError if response.status_code >= 500 else ProxyApiError
+                raise error(f"Proxy API error {response.status_code}: {payload}")
 
             try:
-                return response.json()
+                return response.json(), len(response.content)
             except ValueError as exc:
                 raise ProxyApiError("Invalid JSON from Proxy API") from exc
 
-        raise ProxyApiAuthError("All Proxy API tokens failed")
-
-    async def health(self) -> Dict[str, Any]:
-        return await self._request("GET", "/api/health")
+    async def health(self, probe: bool = False) -> Dict[str, Any]:
+        return await self._request("GET", "/api/health", kind="health", probe=probe)
 
     async def get_tables(self) -> List[str]:
-        payload = await self._request("GET", "/api/tables")
+        payload = await self._request("GET", "/api/tables", kind="tables")
         return payload.get("tables", [])
 
-    async def execute_query(self, query: str, params: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+    async def execute_query(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        kind: str = "query",
+    ) -> List[Dict[str, Any]]:
         body: Dict[str, Any] = {"query": query}
         if params is not None:
             body["params"] = list(params)
-        payload = await self._request("POST", "/api/query", json=body)
+        # Read-only statements can be repeated safely
+        idempotent = query.lstrip().upper().startswith("SELECT")
+        payload = await self._request("POST", "/api/query", json=body, idempotent=idempotent, kind=kind)
         if not payload.get("success"):
             raise ProxyApiError(payload.get("error", "Unknown query error"))
         return payload.get("data", [])
 
     async def get_stores(self) -> List[Dict[str, Any]]:
         query = "SELECT ID, NAME FROM STORGRP ORDER BY NAME"
-        return await self.execute_query(query)
+        return await self.execute_query(query, kind="stores")
 
     async def get_sales(
         self,
         store_ids: Sequence[int],
         start_date: str,
         end_date: str,
+    ) -> List[Dict[str, Any]]:
+        stores = tuple(sorted(set(store_ids)))
+        return await self._single_flight(
+            ("sales", stores, start_date, end_date),
+            lambda: self._fetch_sales(stores, start_date, end_date),
+        )
+
+    async def _fetch_sales(
+        self,
+        store_ids: Sequence[int],
+        start_date: str,
+        end_date: str,
     ) -> List[Dict[str, Any]]:
         placeholders = ",".join(["?"] * len(store_ids))
         params: List[Any] = list(store_ids) + [start_date, end_date]
 
         cups_query = f"""
             SELECT 
+                D.STORGRPID AS STORE_ID,
                 stgp.NAME AS STORE_NAME,
                 D.DAT_ AS ORDER_DATE,
                 COUNT(*) AS ALLCUP,
@@ -120,12 +458,13 @@ class ProxyApiClient:
             WHERE D.STORGRPID IN ({placeholders})
               AND D.CSDTKTHBID IN ('1', '2', '3', '5')
               AND D.DAT_ >= ? AND D.DAT_ <= ?
-            GROUP BY stgp.NAME, D.DAT_
+            GROUP BY D.STORGRPID, stgp.NAME, D.DAT_
             ORDER BY stgp.NAME, D.DAT_
         """
 
         packages_query = f"""
             SELECT
+                D.STORGRPID AS STORE_ID,
                 stgp.NAME AS STORE_NAME,
                 D.DAT_ AS ORDER_DATE,
                 SUM(GD.SOURCE) AS PACKAGES_KG
@@ -137,39 +476,82 @@ class ProxyApiClient:
             WHERE D.STORGRPID IN ({placeholders})
               AND D.CSDTKTHBID IN ('1', '2', '3', '5')
               AND D.DAT_ >= ? AND D.DAT_ <= ?
-              AND (
-                    (
-                        (G.NAME LIKE '%250 g%' OR G.NAME LIKE '%250г%' OR
-                         G.NAME LIKE '%500 g%' OR G.NAME LIKE '%500г%' OR
-                         G.NAME LIKE '%1 kg%' OR G.NAME LIKE '%1кг%' OR
-                         G.NAME LIKE '%200 g%' OR G.NAME LIKE '%200г%' OR
-                         G.NAME LIKE '%125 g%' OR G.NAME LIKE '%125г%' OR
-                         G.NAME LIKE '%80 g%' OR G.NAME LIKE '%80г%' OR
-                         G.NAME LIKE '%0.25%' OR G.NAME LIKE '%0.5%' OR
-                         G.NAME LIKE '%0.2%' OR G.NAME LIKE '%0.125%' OR
-                         G.NAME LIKE '%0.08%')
-                        AND (G.NAME LIKE '%Coffee%' OR G.NAME LIKE '%кофе%' OR G.NAME LIKE '%Кофе%' OR G.NAME LIKE '%Blaser%')
-                    )
-                    OR (GG.NAME LIKE '%Caotina swiss chocolate drink (package)%')
-              )
-            GROUP BY stgp.NAME, D.DAT_
+              AND {PACKAGE_GOODS_FILTER}
+            GROUP BY D.STORGRPID, stgp.NAME, D.DAT_
             ORDER BY stgp.NAME, D.DAT_
         """
 
-        cups = await self.execute_query(cups_query, params=params)
-        packages = await self.execute_query(packages_query, params=params)
+        # The statements are independent - run them concurrently
+        cups, packages = await asyncio.gather(
+            self.execute_query(cups_query, params=params, kind="cups"),
+            self.execute_query(packages_query, params=params, kind="packages"),
+        )
         return self._merge_sales(cups, packages)
 
+    async def get_sales_since(self, day: str, after_id: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Per-store totals of the documents of ``day`` with ID above ``after_id``.
+
+        Returns merged rows and the highest document ID they cover, which is
+        the ``after_id`` of the next call. Packages are bounded by the same
+        ID window, so documents committed between the two statements are
+        left for the next call.
+
+        The watermark assumes documents commit in ID order. A document whose
+        transaction commits after one with a higher ID was already returned
+        stays below ``after_id`` and is never returned; callers that need
+        exact totals re-read the day with ``after_id=0`` now and then (see
+        ``LiveSalesFeed.reconcile``).
+        """
+        cups_query = """
+            SELECT
+                D.STORGRPID AS STORE_ID,
+                stgp.NAME AS STORE_NAME,
+                D.DAT_ AS ORDER_DATE,
+                COUNT(*) AS ALLCUP,
+                SUM(D.SUMMA) AS TOTAL_CASH,
+                MAX(D.ID) AS LAST_ID
+            FROM STORZAKAZDT D
+            JOIN STORGRP stgp ON D.STORGRPID = stgp.ID
+            WHERE D.CSDTKTHBID IN ('1', '2', '3', '5')
+              AND D.DAT_ = ? AND D.ID > ?
+            GROUP BY D.STORGRPID, stgp.NAME, D.DAT_
+        """
+        cups = await self.execute_query(cups_query, params=[day, after_id], kind="live_cups")
+        if not cups:
+            return [], after_id
+        last_id = max(int(row["LAST_ID"]) for row in cups)
+
+        packages_query = f"""
+            SELECT
+                D.STORGRPID AS STORE_ID,
+                stgp.NAME AS STORE_NAME,
+                D.DAT_ AS ORDER_DATE,
+                SUM(GD.SOURCE) AS PACKAGES_KG
+            FROM STORZAKAZDT D
+            JOIN STORZDTGDS GD ON D.ID = GD.SZID
+            JOIN GOODS G ON GD.GODSId = G.ID
+            JOIN STORGRP stgp ON D.STORGRPID = stgp.ID
+            LEFT JOIN GOODSGROUPS GG ON G.OWNER = GG.ID
+            WHERE D.CSDTKTHBID IN ('1', '2', '3', '5')
+              AND D.DAT_ = ? AND D.ID > ? AND D.ID <= ?
+              AND {PACKAGE_GOODS_FILTER}
+            GROUP BY D.STORGRPID, stgp.NAME, D.DAT_
+        """
+        packages = await self.execute_query(packages_query, params=[day, after_id, last_id], kind="live_packages")
+        return self._merge_sales(cups, packages), last_id
+
     def _merge_sales(
         self,
         cups: List[Dict[str, Any]],
         packages: List[Dict[str, Any]],
     ) -> List[Dict[str, Any]]:
+        # Store names are not unique, rows are matched by store ID
         merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
 
         for row in cups:
-            key = (str(row.get("STORE_NAME")), str(row.get("ORDER_DATE")))
+            key = (str(row.get("STORE_ID")), str(row.get("ORDER_DATE")))
             merged[key] = {
+                "STORE_ID": row.get("STORE_ID"),
                 "STORE_NAME": row.get("STORE_NAME"),
                 "ORDER_DATE": row.get("ORDER_DATE"),
                 "ALLCUP": row.get("ALLCUP", 0),
@@ -178,10 +560,11 @@ class ProxyApiClient:
             }
 
         for row in packages:
-            key = (str(row.get("STORE_NAME")), str(row.get("ORDER_DATE")))
+            key = (str(row.get("STORE_ID")), str(row.get("ORDER_DATE")))
             record = merged.setdefault(
                 key,
                 {
+                    "STORE_ID": row.get("STORE_ID"),
                     "STORE_NAME": row.get("STORE_NAME"),
                     "ORDER_DATE": row.get("ORDER_DATE"),
                     "ALLCUP": 0,
@@ -3,12 +3,16 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Optional
 
 from fastapi import APIRouter, Depends
+from starlette.concurrency import run_in_threadpool
 
 from ..config import Settings, get_settings
-from ..deps import get_proxy_client
-from ..proxy_client import ProxyApiClient
+from ..deps import get_health_monitor, get_sales_cache, get_sales_materializer
+from ..health_monitor import HealthMonitor
+from ..sales_cache import SalesCache
+from ..sales_store import SalesMaterializer
 from ..schemas import HealthResponse
 
 
@@ -18,13 +22,19 @@ router = APIRouter(prefix="/health", tags=["health"])
 @router.get("", response_model=HealthResponse)
 async def health_check(
     settings: Settings = Depends(get_settings),
-    proxy_client: ProxyApiClient = Depends(get_proxy_client),
+    monitor: HealthMonitor = Depends(get_health_monitor),
+    sales_cache: SalesCache = Depends(get_sales_cache),
+    materializer: Optional[SalesMaterializer] = Depends(get_sales_materializer),
 ) -> HealthResponse:
-    proxy_status = await proxy_client.health()
+    # Cached by the background monitor: /health never waits on the upstream
+    proxy_status = await monitor.snapshot()
+    store_status = await run_in_threadpool(materializer.stats) if materializer is not None else None
     return HealthResponse(
-        status="ok",
+        status="ok" if proxy_status["healthy"] else "degraded",
         timestamp=datetime.now(timezone.utc),
         environment=settings.app_env,
         proxy_api=proxy_status,
+        cache=sales_cache.stats(),
+        store=store_status,
     )
 
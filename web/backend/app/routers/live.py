@@ -0,0 +1,23 @@
+"""Live sales stream."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from ..deps import get_live_feed
+from ..live_feed import LiveSalesFeed
+
+
+router = APIRouter(prefix="/sales", tags=["sales"])
+
+
+@router.get("/live", response_class=StreamingResponse, responses={200: {"content": {"text/event-stream": {}}}})
+async def live_sales(feed: LiveSalesFeed = Depends(get_live_feed)) -> StreamingResponse:
+    """Today's per-store totals over SSE: a ``snapshot`` event, then ``delta`` events."""
+    return StreamingResponse(
+        feed.events(),
+        media_type="text/event-stream",
+        # No caching or proxy buffering of the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
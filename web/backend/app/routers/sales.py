@@ -2,49 +2,395 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import List
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from ..deps import get_proxy_client
+from .. import deadline
+from ..aggregation import period_totals, pivot, pivot_totals, sales_frame, summarize
+from ..config import get_settings
+from ..deps import get_proxy_client, get_sales_cache, get_sales_store, get_shared_cache, get_sorted_sales_cache
+from ..downsampling import auto_granularity, downsample_series
+from ..export import (
+    MEDIA_TYPES,
+    SALES_HEADER,
+    SALES_TYPES,
+    Batches,
+    parquet_available,
+    pivot_rows,
+    primed,
+    sales_rows,
+    single_batch,
+    stream_export,
+)
+from ..pagination import MAX_PAGE_SIZE, InvalidCursor, SortedSales, SortedSalesCache
 from ..proxy_client import ProxyApiClient
-from ..schemas import SalesRecord, SalesResponse
+from ..sales_cache import SalesCache
+from ..sales_store import SalesStore, date_chunks
+from ..schemas import SalesColumnarResponse, SalesPage, SalesPivot, SalesResponse, SalesSeries, SalesSummary
+from ..serialization import (
+    MalformedSalesRow,
+    coerce_sales_rows,
+    encode_sales_columnar,
+    encode_sales_json,
+    encode_sales_page,
+    iter_sales_ndjson,
+)
+from ..shared_cache import SharedCache, cache_key
 
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Records per streamed chunk: small enough for an early first byte,
+# large enough to keep per-chunk overhead low.
+STREAM_BATCH_SIZE = 500
 
-@router.get("", response_model=SalesResponse)
+
+def _validate_request(store_ids: List[int], start_date: str, end_date: str) -> None:
+    if not store_ids:
+        raise HTTPException(status_code=400, detail="store_ids must not be empty")
+
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format") from exc
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+
+async def _load_sales(
+    sales_store: Optional[SalesStore],
+    shared_cache: Optional[SharedCache],
+    sales_cache: SalesCache,
+    proxy_client: ProxyApiClient,
+    store_ids: Sequence[int],
+    start_date: str,
+    end_date: str,
+) -> List[Dict[str, Any]]:
+    """Rows from the local store when it covers the range, otherwise from the live path.
+
+    With a shared cache, a window loaded by any worker serves all of them.
+    """
+    if sales_store is not None:
+        rows = await run_in_threadpool(
+            sales_store.get_sales, store_ids, date.fromisoformat(start_date), date.fromisoformat(end_date)
+        )
+        if rows is not None:
+            return rows
+
+    async def load() -> List[Dict[str, Any]]:
+        return await sales_cache.get_sales(proxy_client, store_ids, start_date, end_date)
+
+    if shared_cache is None:
+        return await load()
+    settings = get_settings()
+    ttl = (
+        settings.sales_cache_today_ttl
+        if date.fromisoformat(end_date) >= date.today()
+        else settings.shared_cache_history_ttl
+    )
+    key = cache_key("sales", sorted(set(store_ids)), start_date, end_date)
+    return await shared_cache.get_or_load(key, ttl, load)
+
+
+async def _load_export_chunk(
+    sales_store: Optional[SalesStore],
+    shared_cache: Optional[SharedCache],
+    sales_cache: SalesCache,
+    proxy_client: ProxyApiClient,
+    store_ids: Sequence[int],
+    chunk_start: date,
+    chunk_end: date,
+) -> List[Dict[str, Any]]:
+    """``_load_sales`` of one export chunk under its own ``EXPORT_BUDGET``.
+
+    A long export takes far longer than one request budget, so every chunk
+    gets a fresh budget instead of sharing the one the request started with.
+    """
+    token = deadline.restart(get_settings().export_budget)
+    try:
+        return await _load_sales(
+            sales_store,
+            shared_cache,
+            sales_cache,
+            proxy_client,
+            store_ids,
+            chunk_start.isoformat(),
+            chunk_end.isoformat(),
+        )
+    finally:
+        deadline.reset(token)
+
+
+def _check_export_format(export_format: str) -> None:
+    if export_format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires the pyarrow package")
+
+
+def _export_response(body: AsyncIterator[bytes], export_format: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
+
+def _wants_ndjson(request: Request, response_format: str) -> bool:
+    if response_format == "ndjson":
+        return True
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+@router.get(
+    "",
+    response_model=Union[SalesResponse, SalesColumnarResponse],
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
 async def get_sales(
+    request: Request,
     store_ids: List[int] = Query(..., description="Список ID магазинов"),
     start_date: str = Query(..., description="Начальная дата (YYYY-MM-DD)"),
     end_date: str = Query(..., description="Конечная дата (YYYY-MM-DD)"),
+    response_format: str = Query(
+        "json",
+        alias="format",
+        pattern="^(json|columnar|ndjson)$",
+        description="Формат ответа: json, columnar или ndjson (также Accept: application/x-ndjson)",
+    ),
     proxy_client: ProxyApiClient = Depends(get_proxy_client),
-) -> SalesResponse:
-    if not store_ids:
-        raise HTTPException(status_code=400, detail="store_ids must not be empty")
+    sales_cache: SalesCache = Depends(get_sales_cache),
+    sales_store: Optional[SalesStore] = Depends(get_sales_store),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache),
+) -> Response:
+    _validate_request(store_ids, start_date, end_date)
+    data = await _load_sales(sales_store, shared_cache, sales_cache, proxy_client, store_ids, start_date, end_date)
+
+    if _wants_ndjson(request, response_format):
+        return StreamingResponse(iter_sales_ndjson(data, STREAM_BATCH_SIZE), media_type=NDJSON_MEDIA_TYPE)
+
+    # Encoded directly to bytes: no per-row models and no response_model validation
+    try:
+        columns = coerce_sales_rows(data)
+    except MalformedSalesRow as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    encode = encode_sales_columnar if response_format == "columnar" else encode_sales_json
+    return Response(content=encode(columns), media_type="application/json")
+
+
+@router.get("/page", response_model=SalesPage)
+async def get_sales_page(
+    store_ids: List[int] = Query(..., description="Список ID магазинов"),
+    start_date: str = Query(..., description="Начальная дата (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Конечная дата (YYYY-MM-DD)"),
+    sort: str = Query("date", pattern="^(date|store|total_cash)$", description="Сортировка: date, store или total_cash"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из предыдущего ответа"),
+    proxy_client: ProxyApiClient = Depends(get_proxy_client),
+    sales_cache: SalesCache = Depends(get_sales_cache),
+    sales_store: Optional[SalesStore] = Depends(get_sales_store),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache),
+    sorted_cache: SortedSalesCache = Depends(get_sorted_sales_cache),
+) -> Response:
+    _validate_request(store_ids, start_date, end_date)
+    stores = tuple(sorted(set(store_ids)))
+
+    async def build() -> SortedSales:
+        rows = await _load_sales(sales_store, shared_cache, sales_cache, proxy_client, stores, start_date, end_date)
+        return SortedSales(rows, sort)
+
+    # Sorted once per filter set; following pages only bisect the cached result
+    sorted_sales = await sorted_cache.get_or_build((stores, start_date, end_date, sort), build)
+    try:
+        rows, next_cursor = sorted_sales.page(cursor, limit)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    try:
+        columns = coerce_sales_rows(rows)
+    except MalformedSalesRow as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return Response(
+        content=encode_sales_page(columns, len(sorted_sales.rows), next_cursor),
+        media_type="application/json",
+    )
 
-    data = await proxy_client.get_sales(store_ids=store_ids, start_date=start_date, end_date=end_date)
-    records: List[SalesRecord] = []
-    for row in data:
-        try:
-            order_date_raw = row.get("ORDER_DATE")
-            if isinstance(order_date_raw, str):
-                order_date = datetime.fromisoformat(order_date_raw)
-            else:
-                order_date = datetime.fromisoformat(str(order_date_raw))
-
-            record = SalesRecord(
-                store_name=str(row.get("STORE_NAME", "")),
-                order_date=order_date,
-                allcup=float(row.get("ALLCUP", 0) or 0),
-                    packages_kg=float(row.get("PACKAGES_KG", 0) or 0),
-                total_cash=float(row.get("TOTAL_CASH", 0) or 0),
+
+@router.get("/summary", response_model=SalesSummary)
+async def get_sales_summary(
+    store_ids: List[int] = Query(..., description="Список ID магазинов"),
+    start_date: str = Query(..., description="Начальная дата (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Конечная дата (YYYY-MM-DD)"),
+    proxy_client: ProxyApiClient = Depends(get_proxy_client),
+    sales_cache: SalesCache = Depends(get_sales_cache),
+    sales_store: Optional[SalesStore] = Depends(get_sales_store),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache),
+) -> SalesSummary:
+    _validate_request(store_ids, start_date, end_date)
+    data = await _load_sales(sales_store, shared_cache, sales_cache, proxy_client, store_ids, start_date, end_date)
+    summary = await run_in_threadpool(lambda: summarize(sales_frame(data)))
+    return SalesSummary(**summary)
+
+
+@router.get("/pivot", response_model=SalesPivot)
+async def get_sales_pivot(
+    store_ids: List[int] = Query(..., description="Список ID магазинов"),
+    start_date: str = Query(..., description="Начальная дата (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Конечная дата (YYYY-MM-DD)"),
+    granularity: str = Query(
+        "day", pattern="^(day|week|month|auto)$", description="Период: day, week, month или auto"
+    ),
+    max_periods: Optional[int] = Query(
+        None, ge=1, le=1000, description="Для auto: максимум периодов (по умолчанию PIVOT_MAX_PERIODS)"
+    ),
+    proxy_client: ProxyApiClient = Depends(get_proxy_client),
+    sales_cache: SalesCache = Depends(get_sales_cache),
+    sales_store: Optional[SalesStore] = Depends(get_sales_store),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache),
+) -> SalesPivot:
+    """Store x period grid.
+
+    ``granularity=auto`` picks the finest of day, week and month that keeps
+    the number of periods within ``max_periods``, so long ranges arrive as a
+    table the dashboard can still show.
+    """
+    _validate_request(store_ids, start_date, end_date)
+    if granularity == "auto":
+        granularity = auto_granularity(
+            date.fromisoformat(start_date),
+            date.fromisoformat(end_date),
+            max_periods or get_settings().pivot_max_periods,
+        )
+    data = await _load_sales(sales_store, shared_cache, sales_cache, proxy_client, store_ids, start_date, end_date)
+    # Grouping is CPU-bound - keep it off the event loop
+    table = await run_in_threadpool(lambda: pivot(sales_frame(data), granularity))
+    return SalesPivot(**table)
+
+
+@router.get("/series", response_model=SalesSeries)
+async def get_sales_series(
+    store_ids: List[int] = Query(..., description="Список ID магазинов"),
+    start_date: str = Query(..., description="Начальная дата (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Конечная дата (YYYY-MM-DD)"),
+    measure: str = Query(
+        "total_cash",
+        pattern="^(allcup|packages_kg|total_cash)$",
+        description="Показатель: allcup, packages_kg или total_cash",
+    ),
+    granularity: str = Query(
+        "day", pattern="^(day|week|month|auto)$", description="Период: day, week, month или auto"
+    ),
+    max_points: Optional[int] = Query(
+        None, ge=3, le=10000, description="Максимум точек на магазин (по умолчанию SERIES_MAX_POINTS)"
+    ),
+    proxy_client: ProxyApiClient = Depends(get_proxy_client),
+    sales_cache: SalesCache = Depends(get_sales_cache),
+    sales_store: Optional[SalesStore] = Depends(get_sales_store),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache),
+) -> SalesSeries:
+    """Per-store series of one measure for charts, at most ``max_points`` points each.
+
+    Periods are summed first; a series still longer than the budget is
+    reduced with LTTB, which keeps the peaks a plain average would flatten.
+    ``granularity=auto`` coarsens to weeks or months before that.
+    """
+    _validate_request(store_ids, start_date, end_date)
+    max_points = max_points or get_settings().series_max_points
+    if granularity == "auto":
+        granularity = auto_granularity(date.fromisoformat(start_date), date.fromisoformat(end_date), max_points)
+    data = await _load_sales(sales_store, shared_cache, sales_cache, proxy_client, store_ids, start_date, end_date)
+    stores = await run_in_threadpool(
+        lambda: downsample_series(period_totals(sales_frame(data), granularity), measure, max_points)
+    )
+    return SalesSeries(granularity=granularity, measure=measure, max_points=max_points, stores=stores)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}},
+)
+async def export_sales(
+    store_ids: List[int] = Query(..., description="Список ID магазинов"),
+    start_date: str = Query(..., description="Начальная дата (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Конечная дата (YYYY-MM-DD)"),
+    export_format: str = Query(
+        "csv",
+        alias="format",
+        pattern="^(csv|xlsx|parquet)$",
+        description="Формат файла: csv, xlsx или parquet",
+    ),
+    proxy_client: ProxyApiClient = Depends(get_proxy_client),
+    sales_cache: SalesCache = Depends(get_sales_cache),
+    sales_store: Optional[SalesStore] = Depends(get_sales_store),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache),
+) -> StreamingResponse:
+    """Daily sales as a file, fetched and written one date chunk at a time."""
+    _validate_request(store_ids, start_date, end_date)
+    _check_export_format(export_format)
+    chunks = list(
+        date_chunks(date.fromisoformat(start_date), date.fromisoformat(end_date), get_settings().export_chunk_days)
+    )
+
+    async def batches() -> Batches:
+        for chunk_start, chunk_end in chunks:
+            rows = await _load_export_chunk(
+                sales_store, shared_cache, sales_cache, proxy_client, store_ids, chunk_start, chunk_end
             )
-        except Exception as exc:  # noqa: BLE001
-            raise HTTPException(status_code=500, detail=f"Malformed sales record: {row}") from exc
-        records.append(record)
+            yield sales_rows(rows)
+
+    try:
+        first_chunk_onwards = await primed(batches())
+    except MalformedSalesRow as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    body = stream_export(export_format, SALES_HEADER, SALES_TYPES, first_chunk_onwards, "Продажи")
+    return _export_response(body, export_format, f"sales_{start_date}_{end_date}")
+
+
+@router.get(
+    "/pivot/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}},
+)
+async def export_sales_pivot(
+    store_ids: List[int] = Query(..., description="Список ID магазинов"),
+    start_date: str = Query(..., description="Начальная дата (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Конечная дата (YYYY-MM-DD)"),
+    granularity: str = Query("month", pattern="^(day|week|month)$", description="Период: day, week или month"),
+    export_format: str = Query(
+        "csv",
+        alias="format",
+        pattern="^(csv|xlsx|parquet)$",
+        description="Формат файла: csv, xlsx или parquet",
+    ),
+    proxy_client: ProxyApiClient = Depends(get_proxy_client),
+    sales_cache: SalesCache = Depends(get_sales_cache),
+    sales_store: Optional[SalesStore] = Depends(get_sales_store),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache),
+) -> StreamingResponse:
+    """Store x period pivot as a file: a row per store and measure, a column per period.
+
+    Daily rows are folded into period totals chunk by chunk, so memory is
+    bounded by the size of the pivot rather than the length of the range.
+    """
+    _validate_request(store_ids, start_date, end_date)
+    _check_export_format(export_format)
+    chunks = list(
+        date_chunks(date.fromisoformat(start_date), date.fromisoformat(end_date), get_settings().export_chunk_days)
+    )
 
-    return SalesResponse(items=records, count=len(records))
+    totals = period_totals(sales_frame([]), granularity)
+    for chunk_start, chunk_end in chunks:
+        rows = await _load_export_chunk(
+            sales_store, shared_cache, sales_cache, proxy_client, store_ids, chunk_start, chunk_end
+        )
+        chunk_totals = await run_in_threadpool(lambda: period_totals(sales_frame(rows), granularity))
+        totals = totals.add(chunk_totals, fill_value=0.0)
 
+    header, types, pivot_table_rows = pivot_rows(await run_in_threadpool(pivot_totals, totals, granularity))
+    body = stream_export(export_format, header, types, single_batch(pivot_table_rows), "Сводная таблица")
+    return _export_response(body, export_format, f"sales_pivot_{granularity}_{start_date}_{end_date}")
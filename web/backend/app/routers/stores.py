@@ -2,19 +2,31 @@
 
 from __future__ import annotations
 
+from typing import Optional
+
 from fastapi import APIRouter, Depends
 
-from ..deps import get_proxy_client
+from ..config import get_settings
+from ..deps import get_proxy_client, get_shared_cache
 from ..proxy_client import ProxyApiClient
 from ..schemas import Store
+from ..shared_cache import SharedCache, cache_key
 
 
 router = APIRouter(prefix="/stores", tags=["stores"])
 
 
 @router.get("", response_model=list[Store])
-async def list_stores(proxy_client: ProxyApiClient = Depends(get_proxy_client)) -> list[Store]:
-    records = await proxy_client.get_stores()
+async def list_stores(
+    proxy_client: ProxyApiClient = Depends(get_proxy_client),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache),
+) -> list[Store]:
+    if shared_cache is None:
+        records = await proxy_client.get_stores()
+    else:
+        records = await shared_cache.get_or_load(
+            cache_key("stores"), get_settings().shared_cache_stores_ttl, proxy_client.get_stores
+        )
     stores: list[Store] = []
     for record in records:
         try:
@@ -0,0 +1,194 @@
+"""In-process cache of daily sales cells keyed by (store, day)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .proxy_client import BREAKER_FAILURES, ProxyApiClient
+
+
+logger = logging.getLogger(__name__)
+
+CellKey = Tuple[int, date]
+
+
+def _parse_day(value: Any) -> date:
+    return date.fromisoformat(str(value)[:10])
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def _runs(days: Sequence[date]) -> List[Tuple[date, date]]:
+    """Contiguous (first, last) runs of sorted ``days``."""
+    runs: List[Tuple[date, date]] = []
+    for day in days:
+        if runs and runs[-1][1] + timedelta(days=1) == day:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def _estimate_size(row: Optional[Dict[str, Any]]) -> int:
+    size = sys.getsizeof(row)
+    if row:
+        size += sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in row.items())
+    return size
+
+
+class SalesCache:
+    """LRU cache of merged sales rows, one cell per (store id, day).
+
+    Closed days (before today) never change upstream and are kept until
+    evicted by the byte budget. Today and later days expire after
+    ``today_ttl`` seconds. A cell with no sales is cached as ``None`` so
+    that empty days are not queried again.
+
+    Expired cells stay in memory until replaced or evicted. With
+    ``serve_stale`` they answer a request while the upstream is failing,
+    as long as every missing cell has such a stale copy.
+    """
+
+    def __init__(self, max_bytes: int, today_ttl: float, serve_stale: bool = False) -> None:
+        self.max_bytes = max_bytes
+        self.today_ttl = today_ttl
+        self.serve_stale = serve_stale
+        # key -> (row, size in bytes, expires_at monotonic or None)
+        self._cells: "OrderedDict[CellKey, Tuple[Optional[Dict[str, Any]], int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.upstream_queries = 0
+        self.stale_served = 0
+
+    # Storage ------------------------------------------------------------
+    def _lookup(self, key: CellKey, now: float) -> Tuple[Optional[bool], Optional[Dict[str, Any]]]:
+        """(True, row) for a fresh cell, (False, row) for an expired one, (None, None) if absent."""
+        entry = self._cells.get(key)
+        if entry is None:
+            return None, None
+        row, _, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            return False, row
+        self._cells.move_to_end(key)
+        return True, row
+
+    def _store(self, key: CellKey, row: Optional[Dict[str, Any]], today: date, now: float) -> None:
+        expires_at = None if key[1] < today else now + self.today_ttl
+        size = _estimate_size(row)
+        previous = self._cells.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._cells[key] = (row, size, expires_at)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._cells:
+            _, (_, evicted_size, _) = self._cells.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cells),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "upstream_queries": self.upstream_queries,
+            "stale_served": self.stale_served,
+        }
+
+    # Assembly -----------------------------------------------------------
+    async def get_sales(
+        self,
+        client: ProxyApiClient,
+        store_ids: Sequence[int],
+        start_date: str,
+        end_date: str,
+    ) -> List[Dict[str, Any]]:
+        """Assemble a sales response from cached cells.
+
+        Only missing cells are loaded: one upstream query per contiguous run
+        of missing days, shared by the stores missing exactly that run, all
+        runs concurrently. Cached days around a gap are not fetched again.
+        """
+        start, end = _parse_day(start_date), _parse_day(end_date)
+        stores = sorted(set(int(store_id) for store_id in store_ids))
+        days = _days(start, end)
+        today = date.today()
+        now = time.monotonic()
+
+        rows: List[Dict[str, Any]] = []
+        missing: Dict[int, List[date]] = {}
+        stale_rows: List[Dict[str, Any]] = []
+        all_stale = True
+        for store_id in stores:
+            for day in days:
+                fresh, row = self._lookup((store_id, day), now)
+                if fresh:
+                    self.hits += 1
+                    if row is not None:
+                        rows.append(row)
+                else:
+                    self.misses += 1
+                    missing.setdefault(store_id, []).append(day)
+                    if fresh is None:
+                        all_stale = False
+                    elif row is not None:
+                        stale_rows.append(row)
+
+        runs: Dict[Tuple[date, date], List[int]] = {}
+        for store_id, store_days in missing.items():
+            for run in _runs(store_days):
+                runs.setdefault(run, []).append(store_id)
+
+        if runs:
+            self.upstream_queries += len(runs)
+            try:
+                results = await asyncio.gather(
+                    *(
+                        client.get_sales(
+                            store_ids=run_stores,
+                            start_date=run_start.isoformat(),
+                            end_date=run_end.isoformat(),
+                        )
+                        for (run_start, run_end), run_stores in runs.items()
+                    )
+                )
+            except BREAKER_FAILURES as exc:
+                if not (self.serve_stale and all_stale):
+                    raise
+                logger.warning("Serving stale sales cells, upstream failed: %s", exc)
+                self.stale_served += 1
+                rows.extend(stale_rows)
+                rows.sort(key=lambda row: (str(row.get("STORE_NAME")), str(row.get("ORDER_DATE"))))
+                return rows
+
+            for ((run_start, run_end), run_stores), fetched in zip(runs.items(), results):
+                fetched_cells: Dict[CellKey, Dict[str, Any]] = {}
+                for row in fetched:
+                    fetched_cells[(int(row["STORE_ID"]), _parse_day(row["ORDER_DATE"]))] = row
+                for store_id in run_stores:
+                    for day in _days(run_start, run_end):
+                        row = fetched_cells.get((store_id, day))
+                        self._store((store_id, day), row, today, now)
+                        if row is not None:
+                            rows.append(row)
+
+        rows.sort(key=lambda row: (str(row.get("STORE_NAME")), str(row.get("ORDER_DATE"))))
+        return rows
@@ -0,0 +1,234 @@
+"""Local SQLite store of daily per-store sales aggregates.
+
+A background ``SalesMaterializer`` backfills history once and then keeps
+the most recent days up to date. Sales endpoints read covered ranges from
+the store by primary key, so they do not wait for Firebird; ranges outside
+the synced window fall back to the live path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .proxy_client import ProxyApiClient
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_sales (
+    store_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    store_name TEXT NOT NULL,
+    allcup REAL NOT NULL,
+    packages_kg REAL NOT NULL,
+    total_cash REAL NOT NULL,
+    PRIMARY KEY (store_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_sales_day ON daily_sales (day, store_id);
+CREATE TABLE IF NOT EXISTS synced_stores (
+    store_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    synced_from TEXT NOT NULL,
+    synced_through TEXT NOT NULL
+);
+"""
+
+
+def _parse_day(value: Any) -> date:
+    return date.fromisoformat(str(value)[:10])
+
+
+def date_chunks(start: date, end: date, days: int) -> Iterable[Tuple[date, date]]:
+    while start <= end:
+        chunk_end = min(end, start + timedelta(days=days - 1))
+        yield start, chunk_end
+        start = chunk_end + timedelta(days=1)
+
+
+class SalesStore:
+    """Daily aggregates keyed by (store id, day) in a SQLite file.
+
+    Methods are blocking; async callers run them in a worker thread.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per call keeps the store safe to use from any thread
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def synced_stores(self) -> Dict[int, Tuple[str, date, date]]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT store_id, name, synced_from, synced_through FROM synced_stores").fetchall()
+        return {row[0]: (row[1], date.fromisoformat(row[2]), date.fromisoformat(row[3])) for row in rows}
+
+    def replace_range(
+        self,
+        stores: Dict[int, str],
+        start: date,
+        end: date,
+        rows: Sequence[Dict[str, Any]],
+    ) -> None:
+        """Replace all cells of ``stores`` in ``[start, end]`` and extend their synced window."""
+        placeholders = ",".join("?" * len(stores))
+        store_ids = list(stores)
+        with self._connect() as conn:
+            conn.execute(
+                f"DELETE FROM daily_sales WHERE store_id IN ({placeholders}) AND day BETWEEN ? AND ?",
+                [*store_ids, start.isoformat(), end.isoformat()],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO daily_sales VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        int(row["STORE_ID"]),
+                        _parse_day(row["ORDER_DATE"]).isoformat(),
+                        str(row.get("STORE_NAME", "")),
+                        float(row.get("ALLCUP", 0) or 0),
+                        float(row.get("PACKAGES_KG", 0) or 0),
+                        float(row.get("TOTAL_CASH", 0) or 0),
+                    )
+                    for row in rows
+                ],
+            )
+            conn.executemany(
+                """
+                INSERT INTO synced_stores VALUES (?, ?, ?, ?)
+                ON CONFLICT (store_id) DO UPDATE SET
+                    name = excluded.name,
+                    synced_from = MIN(synced_from, excluded.synced_from),
+                    synced_through = MAX(synced_through, excluded.synced_through)
+                """,
+                [(store_id, name, start.isoformat(), end.isoformat()) for store_id, name in stores.items()],
+            )
+
+    def get_sales(self, store_ids: Sequence[int], start: date, end: date) -> Optional[List[Dict[str, Any]]]:
+        """Rows in the upstream shape, or None when the range is not fully synced."""
+        stores = sorted(set(int(store_id) for store_id in store_ids))
+        synced = self.synced_stores()
+        for store_id in stores:
+            window = synced.get(store_id)
+            if window is None or window[1] > start or window[2] < end:
+                return None
+
+        placeholders = ",".join("?" * len(stores))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT store_id, store_name, day, allcup, packages_kg, total_cash
+                FROM daily_sales
+                WHERE store_id IN ({placeholders}) AND day BETWEEN ? AND ?
+                ORDER BY store_name, day
+                """,
+                [*stores, start.isoformat(), end.isoformat()],
+            ).fetchall()
+        return [
+            {
+                "STORE_ID": row[0],
+                "STORE_NAME": row[1],
+                "ORDER_DATE": row[2],
+                "ALLCUP": row[3],
+                "PACKAGES_KG": row[4],
+                "TOTAL_CASH": row[5],
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            cells, first_day, last_day = conn.execute(
+                "SELECT COUNT(*), MIN(day), MAX(day) FROM daily_sales"
+            ).fetchone()
+            stores = conn.execute("SELECT COUNT(*) FROM synced_stores").fetchone()[0]
+        return {"cells": cells, "stores": stores, "first_day": first_day, "last_day": last_day}
+
+
+class SalesMaterializer:
+    """Background sync of the Proxy API into a ``SalesStore``.
+
+    New stores are backfilled ``backfill_days`` back from today in chunks of
+    ``chunk_days``; afterwards every ``refresh_interval`` seconds only the
+    last ``refresh_days`` days (or everything since the last sync, if the
+    service was down longer) are fetched again.
+    """
+
+    def __init__(
+        self,
+        store: SalesStore,
+        client: ProxyApiClient,
+        backfill_days: int,
+        refresh_days: int,
+        refresh_interval: float,
+        chunk_days: int = 31,
+    ) -> None:
+        self.store = store
+        self.client = client
+        self.backfill_days = backfill_days
+        self.refresh_days = refresh_days
+        self.refresh_interval = refresh_interval
+        self.chunk_days = chunk_days
+        self.last_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def _sync_range(self, stores: Dict[int, str], start: date, end: date) -> None:
+        for chunk_start, chunk_end in date_chunks(start, end, self.chunk_days):
+            rows = await self.client.get_sales(
+                store_ids=sorted(stores),
+                start_date=chunk_start.isoformat(),
+                end_date=chunk_end.isoformat(),
+            )
+            await asyncio.to_thread(self.store.replace_range, stores, chunk_start, chunk_end, rows)
+
+    async def sync_once(self) -> None:
+        today = date.today()
+        upstream = {int(row["ID"]): str(row["NAME"]) for row in await self.client.get_stores()}
+        synced = await asyncio.to_thread(self.store.synced_stores)
+
+        # Stores seen for the first time: full backfill (resumes after a restart)
+        backfill_start = today - timedelta(days=self.backfill_days - 1)
+        new_stores = {store_id: name for store_id, name in upstream.items() if store_id not in synced}
+        if new_stores:
+            logger.info("Backfilling %d stores from %s", len(new_stores), backfill_start)
+            await self._sync_range(new_stores, backfill_start, today)
+
+        # Known stores: recent days only
+        known = {store_id: name for store_id, name in upstream.items() if store_id in synced}
+        if known:
+            recent_start = today - timedelta(days=self.refresh_days - 1)
+            start = min(min(synced[store_id][2] + timedelta(days=1) for store_id in known), recent_start)
+            await self._sync_range(known, start, today)
+
+        self.last_sync = time.time()
+        self.last_error = None
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Sales store sync failed")
+                self.last_error = str(exc)
+            await asyncio.sleep(self.refresh_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.store.stats(), "last_sync": self.last_sync, "last_error": self.last_error}
@@ -2,8 +2,8 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Any, List, Optional
 
 from pydantic import BaseModel
 
@@ -13,6 +13,8 @@ class HealthResponse(BaseModel):
     timestamp: datetime
     environment: str
     proxy_api: dict
+    cache: Optional[dict] = None
+    store: Optional[dict] = None
 
 
 class Store(BaseModel):
@@ -32,3 +34,49 @@ class SalesResponse(BaseModel):
     items: List[SalesRecord]
     count: int
 
+
+class SalesPage(BaseModel):
+    items: List[SalesRecord]
+    count: int
+    total: int
+    next_cursor: Optional[str] = None
+
+
+class SalesColumnarResponse(BaseModel):
+    columns: List[str]
+    data: List[List[Any]]
+    count: int
+
+
+class SalesSummary(BaseModel):
+    record_count: int
+    store_count: int
+    day_count: int
+    allcup: float
+    packages_kg: float
+    total_cash: float
+
+
+class SalesPivot(BaseModel):
+    granularity: str
+    periods: List[date]
+    stores: List[str]
+    # Rows follow ``stores``, columns follow ``periods``
+    allcup: List[List[float]]
+    packages_kg: List[List[float]]
+    total_cash: List[List[float]]
+
+
+class SalesSeriesLine(BaseModel):
+    store_name: str
+    periods: List[date]
+    values: List[float]
+    # Points before downsampling
+    source_points: int
+
+
+class SalesSeries(BaseModel):
+    granularity: str
+    measure: str
+    max_points: int
+    stores: List[SalesSeriesLine]
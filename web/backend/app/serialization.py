@@ -0,0 +1,106 @@
+"""Fast encoding of sales rows without per-row pydantic models.
+
+Upstream rows are coerced column by column (dates are parsed once per
+distinct value) and encoded straight to bytes with orjson. The output of
+``encode_sales_json`` matches ``SalesResponse`` field for field.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import orjson
+
+
+logger = logging.getLogger(__name__)
+
+SALES_COLUMNS = ["store_name", "order_date", "allcup", "packages_kg", "total_cash"]
+
+
+class MalformedSalesRow(ValueError):
+    """Raised when an upstream row cannot be coerced to a sales record."""
+
+    def __init__(self, row: Dict[str, Any]) -> None:
+        super().__init__(f"Malformed sales record: {row}")
+        self.row = row
+
+
+def _coerce_dates(values: List[Any]) -> List[str]:
+    # A response spans few distinct days - parse each one once
+    parsed: Dict[Any, str] = {}
+    result: List[str] = []
+    for value in values:
+        iso = parsed.get(value)
+        if iso is None:
+            iso = datetime.fromisoformat(str(value)).isoformat()
+            parsed[value] = iso
+        result.append(iso)
+    return result
+
+
+def _coerce_column(rows: Sequence[Dict[str, Any]], convert: Callable[[List[Any]], List[Any]], values: List[Any]) -> List[Any]:
+    try:
+        return convert(values)
+    except (TypeError, ValueError):
+        # Slow path only to report the offending row
+        for row, value in zip(rows, values):
+            try:
+                convert([value])
+            except (TypeError, ValueError):
+                raise MalformedSalesRow(row) from None
+        raise
+
+
+def _floats(values: List[Any]) -> List[float]:
+    return list(map(float, values))
+
+
+def coerce_sales_rows(rows: Sequence[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Convert upstream rows into typed columns keyed by ``SALES_COLUMNS``."""
+    return {
+        "store_name": [str(row.get("STORE_NAME", "")) for row in rows],
+        "order_date": _coerce_column(rows, _coerce_dates, [row.get("ORDER_DATE") for row in rows]),
+        "allcup": _coerce_column(rows, _floats, [row.get("ALLCUP", 0) or 0 for row in rows]),
+        "packages_kg": _coerce_column(rows, _floats, [row.get("PACKAGES_KG", 0) or 0 for row in rows]),
+        "total_cash": _coerce_column(rows, _floats, [row.get("TOTAL_CASH", 0) or 0 for row in rows]),
+    }
+
+
+def _row_tuples(columns: Dict[str, List[Any]]):
+    return zip(*(columns[name] for name in SALES_COLUMNS))
+
+
+def encode_sales_json(columns: Dict[str, List[Any]]) -> bytes:
+    """``{"items": [...], "count": n}`` - the ``SalesResponse`` shape."""
+    items = [dict(zip(SALES_COLUMNS, values)) for values in _row_tuples(columns)]
+    return orjson.dumps({"items": items, "count": len(items)})
+
+
+def encode_sales_page(columns: Dict[str, List[Any]], total: int, next_cursor: Optional[str]) -> bytes:
+    """``SalesPage`` shape: one page of items plus the cursor of the next one."""
+    items = [dict(zip(SALES_COLUMNS, values)) for values in _row_tuples(columns)]
+    return orjson.dumps({"items": items, "count": len(items), "total": total, "next_cursor": next_cursor})
+
+
+def encode_sales_columnar(columns: Dict[str, List[Any]]) -> bytes:
+    """``{"columns": [...], "data": [[...], ...], "count": n}`` - compact tabular shape."""
+    data = [list(values) for values in _row_tuples(columns)]
+    return orjson.dumps({"columns": SALES_COLUMNS, "data": data, "count": len(data)})
+
+
+def iter_sales_ndjson(rows: Sequence[Dict[str, Any]], batch_size: int) -> Iterator[bytes]:
+    """Coerce and encode rows batch by batch as newline-delimited JSON."""
+    for offset in range(0, len(rows), batch_size):
+        batch = rows[offset:offset + batch_size]
+        try:
+            columns = coerce_sales_rows(batch)
+        except MalformedSalesRow as exc:
+            logger.error("%s", exc)
+            # Headers are already sent - report the failure in-band and stop
+            yield b'{"error": "Malformed sales record"}\n'
+            return
+        yield b"".join(
+            orjson.dumps(dict(zip(SALES_COLUMNS, values))) + b"\n" for values in _row_tuples(columns)
+        )
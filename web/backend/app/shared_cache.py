@@ -0,0 +1,154 @@
+"""Result cache shared by all worker processes on a host.
+
+Values live in one SQLite file in WAL mode. A value is published with a
+single ``INSERT OR REPLACE`` transaction, so readers in other processes
+see either the previous value or the complete new one. A short lease per
+key lets one worker load a missing value while the others wait for it
+instead of querying the Proxy API themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+import orjson
+
+from . import deadline
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def cache_key(*parts: Any) -> str:
+    return orjson.dumps(parts).decode()
+
+
+class SharedCache:
+    """JSON values with a time-to-live in a SQLite file.
+
+    Methods other than ``get_or_load`` are blocking. Expiry uses wall-clock
+    time because it is compared across processes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_timeout: float = 30.0,
+        poll_interval: float = 0.05,
+        purge_every: int = 256,
+    ) -> None:
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.purge_every = purge_every
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return orjson.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        payload = orjson.dumps(value)
+        now = time.time()
+        self._puts += 1
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, payload, now + ttl))
+            if self._puts % self.purge_every == 0:
+                conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+                conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+
+    def _try_lease(self, key: str) -> bool:
+        """Take the right to load ``key``; False while another process holds it."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute("INSERT OR IGNORE INTO leases VALUES (?, ?)", (key, now + self.lease_timeout))
+            return cursor.rowcount == 1
+
+    def _is_leased(self, key: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def _wait_limit(self) -> float:
+        """How long to wait for another worker's load within the request budget."""
+        left = deadline.remaining()
+        if left is None:
+            return self.lease_timeout
+        return min(self.lease_timeout, max(left, 0.0) / 2)
+
+    def _release(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ?", (key,))
+
+    async def get_or_load(self, key: str, ttl: float, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value, or ``load()`` run by exactly one worker and published to all.
+
+        A worker waiting for another one's load gives up after half of its
+        request budget at most and loads the value itself with the rest.
+        """
+        value = await asyncio.to_thread(self.get, key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        if not await asyncio.to_thread(self._try_lease, key):
+            # Another worker is loading the same key: wait for its result
+            self.waits += 1
+            wait_until = time.monotonic() + self._wait_limit()
+            while time.monotonic() < wait_until:
+                await asyncio.sleep(self.poll_interval)
+                value = await asyncio.to_thread(self.get, key)
+                if value is not None:
+                    return value
+                if not await asyncio.to_thread(self._is_leased, key):
+                    break  # the holder failed without publishing
+            if not await asyncio.to_thread(self._try_lease, key):
+                return await load()
+
+        try:
+            value = await load()
+            await asyncio.to_thread(self.put, key, value, ttl)
+            return value
+        finally:
+            await asyncio.to_thread(self._release, key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM entries WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses, "waits": self.waits}
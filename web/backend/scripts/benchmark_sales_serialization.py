@@ -0,0 +1,117 @@
+"""Throughput of GET /sales serialization: per-row pydantic vs orjson fast path.
+
+Serves the same synthetic rows through two minimal FastAPI routes and
+measures requests/second over an in-process ASGI transport, so the numbers
+reflect conversion and encoding only (no network, no upstream).
+
+Usage (from web/backend):
+    python scripts/benchmark_sales_serialization.py [--rows 10000 100000] [--seconds 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+import httpx
+from fastapi import FastAPI, Response
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas import SalesRecord, SalesResponse  # noqa: E402
+from app.serialization import (  # noqa: E402
+    coerce_sales_rows,
+    encode_sales_columnar,
+    encode_sales_json,
+)
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    stores = 40
+    first_day = date(2025, 1, 1)
+    return [
+        {
+            "STORE_ID": index % stores,
+            "STORE_NAME": f"Store {index % stores}",
+            "ORDER_DATE": (first_day + timedelta(days=index // stores)).isoformat(),
+            "ALLCUP": index % 300,
+            "PACKAGES_KG": (index % 17) * 0.25,
+            "TOTAL_CASH": (index % 5000) * 1.5,
+        }
+        for index in range(count)
+    ]
+
+
+def _legacy_record(row: Dict[str, Any]) -> SalesRecord:
+    # The conversion GET /sales used before the fast path
+    return SalesRecord(
+        store_name=str(row.get("STORE_NAME", "")),
+        order_date=datetime.fromisoformat(str(row.get("ORDER_DATE"))),
+        allcup=float(row.get("ALLCUP", 0) or 0),
+        packages_kg=float(row.get("PACKAGES_KG", 0) or 0),
+        total_cash=float(row.get("TOTAL_CASH", 0) or 0),
+    )
+
+
+def create_bench_app(rows: List[Dict[str, Any]]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=SalesResponse)
+    async def legacy() -> SalesResponse:
+        records = [_legacy_record(row) for row in rows]
+        return SalesResponse(items=records, count=len(records))
+
+    @app.get("/fast")
+    async def fast() -> Response:
+        return Response(content=encode_sales_json(coerce_sales_rows(rows)), media_type="application/json")
+
+    @app.get("/columnar")
+    async def columnar() -> Response:
+        return Response(content=encode_sales_columnar(coerce_sales_rows(rows)), media_type="application/json")
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, seconds: float) -> Dict[str, float]:
+    response = await client.get(path)  # warm-up, also gives the payload size
+    response.raise_for_status()
+    requests = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        (await client.get(path)).raise_for_status()
+        requests += 1
+    elapsed = time.perf_counter() - started
+    return {"rps": requests / elapsed, "bytes": len(response.content)}
+
+
+async def run(row_counts: List[int], seconds: float) -> None:
+    print(f"{'rows':>8} {'path':>10} {'req/s':>10} {'speedup':>8} {'payload':>12}")
+    for count in row_counts:
+        app = create_bench_app(make_rows(count))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            baseline = None
+            for path in ("/legacy", "/fast", "/columnar"):
+                result = await measure(client, path, seconds)
+                baseline = baseline or result["rps"]
+                print(
+                    f"{count:>8} {path:>10} {result['rps']:>10.2f} "
+                    f"{result['rps'] / baseline:>7.1f}x {result['bytes']:>11,}B"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seconds", type=float, default=3.0, help="Measurement time per path")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,3 +16,60 @@ export type SalesResponse = {
   count: number;
 };
 
+export type SalesSummary = {
+  record_count: number;
+  store_count: number;
+  day_count: number;
+  allcup: number;
+  packages_kg: number;
+  total_cash: number;
+};
+
+export type SalesPivot = {
+  granularity: "day" | "week" | "month";
+  periods: string[];
+  stores: string[];
+  allcup: number[][];
+  packages_kg: number[][];
+  total_cash: number[][];
+};
+
+export type SalesPage = SalesResponse & {
+  total: number;
+  next_cursor: string | null;
+};
+
+// GET /sales/live (text/event-stream): a "snapshot" event, then "delta" events
+export type SalesSeriesLine = {
+  store_name: string;
+  periods: string[];
+  values: number[];
+  source_points: number;
+};
+
+export type SalesSeries = {
+  granularity: "day" | "week" | "month";
+  measure: "allcup" | "packages_kg" | "total_cash";
+  max_points: number;
+  stores: SalesSeriesLine[];
+};
+
+export type LiveStoreSales = {
+  store_id: number;
+  store_name: string;
+  allcup: number;
+  packages_kg: number;
+  total_cash: number;
+};
+
+export type LiveSalesSnapshot = {
+  day: string | null;
+  last_id: number;
+  stores: LiveStoreSales[];
+};
+
+export type LiveSalesDelta = {
+  day: string;
+  last_id: number;
+  stores: LiveStoreSales[];
+};
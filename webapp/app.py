@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional
 
-from flask import Flask, render_template, request
+import requests
+from flask import Flask, Response, g, make_response, render_template, request
 
+import deadline
 from config import get_settings
 from proxy_client import ProxyApiClient, ProxyApiError
-from services.analytics import aggregate_sales, build_table_rows
+from services.columnar import SORTS, SalesColumns
+from services.downsampling import period_rows, sales_chart
+from services.page_cache import PageCache
+from services.pagination import SortedRows, SortedRowsCache, clamp_page_size
+from services.shared_cache import SharedCache, cache_key
 
 settings = get_settings()
 
@@ -20,11 +27,53 @@ client = ProxyApiClient(
     primary_token=settings.proxy_primary_token,
     fallback_token=settings.proxy_fallback_token,
     timeout=settings.proxy_timeout,
+    max_workers=settings.proxy_max_workers,
+    pool_maxsize=settings.proxy_pool_size,
+    schema_ttl=settings.proxy_schema_ttl,
+    stores_ttl=settings.proxy_stores_ttl,
+    max_retries=settings.proxy_max_retries,
+    hedge=settings.proxy_hedge,
+    hedge_min_delay=settings.proxy_hedge_min_delay,
 )
 
+# Page-level fan-out; separate from the client's own pool so that a page task
+# waiting on its statements never starves them of threads.
+page_executor = ThreadPoolExecutor(max_workers=settings.page_workers, thread_name_prefix="page")
+
+sorted_rows_cache = SortedRowsCache()
+page_cache = PageCache(
+    max_entries=settings.page_cache_max_entries,
+    today_ttl=settings.page_cache_today_ttl,
+    history_ttl=settings.page_cache_history_ttl,
+)
+# Upstream results shared by all worker processes on the host (optional)
+shared_cache = SharedCache(settings.shared_cache_path) if settings.shared_cache_path else None
+
+# Rows shown in the dashboard preview table
+DASHBOARD_ROWS = 10
+
 logger = logging.getLogger(__name__)
 
 
+@app.before_request
+def _start_deadline() -> None:
+    budget = settings.request_budget
+    requested = request.headers.get("X-Request-Timeout")
+    if requested:
+        try:
+            budget = min(budget, max(0.0, float(requested)))
+        except ValueError:
+            pass
+    g.deadline_token = deadline.start(budget)
+
+
+@app.teardown_request
+def _reset_deadline(exc: Optional[BaseException]) -> None:
+    token = g.pop("deadline_token", None)
+    if token is not None:
+        deadline.reset(token)
+
+
 def _parse_int(value: str | None) -> Optional[int]:
     if not value:
         return None
@@ -40,24 +89,88 @@ def _default_dates() -> tuple[str, str]:
     return start.isoformat(), today.isoformat()
 
 
+def _parse_date(value: str | None, default: str) -> str:
+    """ISO date from a query parameter; malformed values fall back to ``default``."""
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        return default
+
+
+def _shared(key: tuple, ttl: float, load: Callable[[], Any]) -> Any:
+    if shared_cache is None:
+        return load()
+    return shared_cache.get_or_load(cache_key(*key), ttl, load)
+
+
+def _load_stores() -> List[Dict[str, Any]]:
+    return _shared(("stores",), settings.shared_cache_stores_ttl, client.get_stores)
+
+
+def _load_sales(store_ids: Optional[List[int]], start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """Sales of one window; a window loaded by any worker serves all of them."""
+    if date.fromisoformat(end_date) >= datetime.utcnow().date():
+        ttl = settings.shared_cache_today_ttl
+    else:
+        ttl = settings.shared_cache_history_ttl
+    return _shared(
+        ("sales", store_ids, start_date, end_date), ttl, lambda: client.get_sales(store_ids, start_date, end_date)
+    )
+
+
+def _cached_page(key: Hashable, end_date: str, render: Callable[[], tuple[str, bool]]) -> Response:
+    """Serve a rendered page from the cache, honouring If-None-Match/If-Modified-Since.
+
+    ``render`` returns the HTML and whether it may be cached; pages rendered
+    after an upstream error are served once and not stored.
+    """
+    page = page_cache.get(key)
+    if page is None:
+        body, cacheable = render()
+        if not cacheable:
+            return make_response(body)
+        page = page_cache.put(key, body, page_cache.ttl_for(date.fromisoformat(end_date)))
+
+    response = make_response(page.body)
+    response.set_etag(page.etag)
+    response.last_modified = page.last_modified
+    # Browsers revalidate on every view; unchanged pages come back as 304
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
 @app.route("/")
 def dashboard():
     start_date, end_date = _default_dates()
+    return _cached_page(("dashboard", start_date, end_date), end_date, lambda: _render_dashboard(start_date, end_date))
+
 
+def _render_dashboard(start_date: str, end_date: str) -> tuple[str, bool]:
+    # Independent upstream calls run concurrently; sales cover all stores,
+    # so they do not wait for the store list.
+    health_future = deadline.submit(page_executor, client.health)
+    stores_future = deadline.submit(page_executor, _load_stores)
+    sales_future = deadline.submit(page_executor, _load_sales, None, start_date, end_date)
     try:
-        health = client.health()
-        stores = client.get_stores()
-        sales = client.get_sales([store["ID"] for store in stores], start_date, end_date)
+        health = health_future.result()
+        stores = stores_future.result()
+        sales = sales_future.result() if stores else []
+        cacheable = True
     except ProxyApiError as exc:
         logger.error("Proxy API error: %s", exc)
         health = None
         stores = []
         sales = []
+        cacheable = False
 
-    rows = build_table_rows(sales)
-    totals = aggregate_sales(sales)
+    # Totals are computed on arrays; only the rows the dashboard shows become dicts
+    columns = SalesColumns.from_records(sales)
+    rows = columns.rows(columns.order("store")[:DASHBOARD_ROWS])
+    totals = columns.totals()
 
-    return render_template(
+    body = render_template(
         "dashboard.html",
         stores_count=len(stores),
         totals=totals,
@@ -65,49 +178,105 @@ def dashboard():
         period={"start": start_date, "end": end_date},
         health=health,
     )
+    return body, cacheable
 
 
 @app.route("/sales")
 def sales_table():
-    start_date = request.args.get("start_date") or _default_dates()[0]
-    end_date = request.args.get("end_date") or _default_dates()[1]
+    default_start, default_end = _default_dates()
+    start_date = _parse_date(request.args.get("start_date"), default_start)
+    end_date = _parse_date(request.args.get("end_date"), default_end)
     store_filter = _parse_int(request.args.get("store"))
     sort = request.args.get("sort", "date")
+    if sort not in SORTS:
+        sort = "date"
+    limit = clamp_page_size(_parse_int(request.args.get("limit")))
+    cursor = request.args.get("cursor") or ""
+
+    key = ("sales", start_date, end_date, store_filter, sort, limit, cursor)
+    return _cached_page(
+        key, end_date, lambda: _render_sales_table(start_date, end_date, store_filter, sort, limit, cursor)
+    )
+
 
+def _render_sales_table(
+    start_date: str,
+    end_date: str,
+    store_filter: Optional[int],
+    sort: str,
+    limit: int,
+    cursor: str,
+) -> tuple[str, bool]:
+    # The store list (for the filter) is loaded while the sales are fetched
+    stores_future = deadline.submit(page_executor, _load_stores)
+    store_ids: Optional[List[int]] = [store_filter] if store_filter else None
     try:
-        stores = client.get_stores()
-        store_ids: List[int]
-        if store_filter:
-            store_ids = [store_filter]
-        else:
-            store_ids = [int(store["ID"]) for store in stores]
-
-        sales = client.get_sales(store_ids, start_date, end_date)
+        # Sorted once per filter set; following pages only bisect the cached result
+        sorted_rows = sorted_rows_cache.get_or_build(
+            (store_filter, start_date, end_date, sort),
+            lambda: SortedRows(SalesColumns.from_records(_load_sales(store_ids, start_date, end_date)), sort),
+        )
+        page = sorted_rows.page(cursor, limit)
+        stores = stores_future.result()
+        cacheable = True
     except ProxyApiError as exc:
         logger.error("Proxy API error: %s", exc)
         stores = []
-        sales = []
-
-    rows = build_table_rows(sales)
+        sorted_rows = SortedRows(SalesColumns.from_records([]), sort)
+        page = sorted_rows.page(None, limit)
+        cacheable = False
 
-    if sort == "store":
-        rows.sort(key=lambda r: (r["store_name"], r["order_date"]))
-    elif sort == "sum":
-        rows.sort(key=lambda r: r["total_cash"], reverse=True)
-    else:
-        rows.sort(key=lambda r: r["order_date"], reverse=True)
+    # Long ranges: the chart keeps at most CHART_MAX_POINTS days (LTTB), the
+    # period table switches to weeks or months
+    columns = sorted_rows.columns
+    chart = sales_chart(columns, settings.chart_max_points)
+    periods = period_rows(
+        columns, date.fromisoformat(start_date), date.fromisoformat(end_date), settings.period_table_rows
+    )
 
-    return render_template(
+    body = render_template(
         "sales_table.html",
-        rows=rows,
+        rows=page["rows"],
+        page=page,
+        chart=chart,
+        periods=periods,
         stores=[{"id": int(store["ID"]), "name": store["NAME"]} for store in stores],
         filters={
             "start_date": start_date,
             "end_date": end_date,
             "store": store_filter,
             "sort": sort,
+            "limit": limit,
         },
     )
+    return body, cacheable
+
+
+def warm_up() -> None:
+    """Compile templates, open upstream connections and load the store list.
+
+    Called once per worker process (see ``gunicorn.conf.py``). The upstream
+    calls share a ``WARMUP_BUDGET`` deadline that bounds every attempt and
+    retry, so a slow or unreachable Proxy API only logs a warning and the
+    worker still boots well within gunicorn's ``timeout``.
+    """
+    for template in ("dashboard.html", "sales_table.html"):
+        app.jinja_env.get_template(template)
+    token = deadline.start(settings.warmup_budget)
+    try:
+        futures = [deadline.submit(page_executor, client.health) for _ in range(settings.warmup_connections)]
+        futures.append(deadline.submit(page_executor, client.get_stores))
+    finally:
+        deadline.reset(token)
+    # Every call ends by the deadline: wait for all so none outlives the warm-up
+    errors = []
+    for future in futures:
+        try:
+            future.result()
+        except (ProxyApiError, requests.RequestException) as exc:
+            errors.append(exc)
+    if errors:
+        logger.warning("Proxy API warm-up failed (%d of %d calls): %s", len(errors), len(futures), errors[0])
 
 
 if __name__ == "__main__":
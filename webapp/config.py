@@ -31,6 +31,40 @@ class Settings:
         self.proxy_primary_token: str | None = os.getenv("PROXY_PRIMARY_TOKEN")
         self.proxy_fallback_token: str | None = os.getenv("PROXY_FALLBACK_TOKEN")
         self.proxy_timeout: int = int(os.getenv("PROXY_TIMEOUT", "30"))
+        # Threads for parallel upstream statements and for page-level fan-out
+        self.proxy_max_workers: int = int(os.getenv("PROXY_MAX_WORKERS", "8"))
+        self.page_workers: int = int(os.getenv("PAGE_WORKERS", "16"))
+        # Table list and store list kept in the client, refreshed in the background
+        self.proxy_schema_ttl: float = float(os.getenv("PROXY_SCHEMA_TTL", "3600"))
+        self.proxy_stores_ttl: float = float(os.getenv("PROXY_STORES_TTL", "300"))
+        # Time budget of one incoming request (X-Request-Timeout may shorten it);
+        # every Proxy API attempt and retry fits into what is left
+        self.request_budget: float = float(os.getenv("REQUEST_BUDGET", "25"))
+        self.proxy_max_retries: int = int(os.getenv("PROXY_MAX_RETRIES", "3"))
+        # Duplicate a slow idempotent query once its latency passes the p95 of its kind
+        self.proxy_hedge: bool = os.getenv("PROXY_HEDGE", "false").lower() in ("1", "true", "yes")
+        self.proxy_hedge_min_delay: float = float(os.getenv("PROXY_HEDGE_MIN_DELAY", "0.05"))
+        # Keep-alive connections per process; by default every client and page thread gets one
+        self.proxy_pool_size: int = int(
+            os.getenv("PROXY_POOL_SIZE", str(self.proxy_max_workers + self.page_workers))
+        )
+        # Cross-worker cache file for upstream results; empty disables it
+        self.shared_cache_path: str = os.getenv("SHARED_CACHE_PATH", "")
+        self.shared_cache_today_ttl: float = float(os.getenv("SHARED_CACHE_TODAY_TTL", "60"))
+        self.shared_cache_history_ttl: float = float(os.getenv("SHARED_CACHE_HISTORY_TTL", "3600"))
+        self.shared_cache_stores_ttl: float = float(os.getenv("SHARED_CACHE_STORES_TTL", "300"))
+        # Upstream connections opened when a worker boots, within WARMUP_BUDGET
+        # seconds (retries included) so a dead Proxy API cannot stall the boot
+        self.warmup_connections: int = int(os.getenv("WARMUP_CONNECTIONS", "4"))
+        self.warmup_budget: float = float(os.getenv("WARMUP_BUDGET", "10"))
+        # Rendered pages: short TTL while the range includes today, long for closed ranges
+        self.page_cache_max_entries: int = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "256"))
+        self.page_cache_today_ttl: float = float(os.getenv("PAGE_CACHE_TODAY_TTL", "60"))
+        self.page_cache_history_ttl: float = float(os.getenv("PAGE_CACHE_HISTORY_TTL", "3600"))
+
+        # Sales page: points of the daily chart (LTTB) and rows of the period table
+        self.chart_max_points: int = int(os.getenv("CHART_MAX_POINTS", "300"))
+        self.period_table_rows: int = int(os.getenv("PERIOD_TABLE_ROWS", "12"))
 
         if not self.secret_key or self.secret_key == "change-me":
             raise RuntimeError("SECRET_KEY is not configured")
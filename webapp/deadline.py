@@ -0,0 +1,45 @@
+"""Per-request time budget shared with Proxy API calls.
+
+A ``before_request`` hook starts a deadline for every incoming request; the
+Proxy API client reads it to bound each attempt and to stop retrying once
+the budget is spent. Thread pools do not inherit it: work that should run
+under the caller's deadline is handed over with ``submit``. Outside a
+request there is no deadline.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import time
+from concurrent.futures import Executor, Future
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Optional
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def start(budget: float) -> Token:
+    """Set a deadline ``budget`` seconds from now (never later than an enclosing one)."""
+    deadline = time.monotonic() + budget
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    return _deadline.set(deadline)
+
+
+def reset(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None when unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def submit(executor: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """``executor.submit`` that runs ``fn`` under the caller's deadline."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
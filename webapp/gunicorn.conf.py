@@ -0,0 +1,40 @@
+"""Gunicorn settings for production serving of the Flask webapp.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Each worker process imports ``app`` itself (no preloading), so every worker
+owns its ``ProxyApiClient``, HTTP connection pool and thread pools; nothing
+created before ``fork`` is shared between processes.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Requests mostly wait on the Proxy API, so each process also serves
+# several requests on threads.
+workers = int(os.getenv("WEB_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "4"))
+
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then to bound memory growth of the caches
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+preload_app = False
+# An empty ACCESS_LOG turns the access log off
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the app is loaded, before it accepts connections
+    from app import warm_up
+
+    warm_up()
+    worker.log.info("Worker %s warmed up", worker.pid)
@@ -2,12 +2,27 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Generic, List, Optional, Sequence, Set, TypeVar
 
 import requests
 from requests import Response
 from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+import deadline
+
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying for idempotent requests
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
 
 class ProxyApiError(Exception):
@@ -18,6 +33,114 @@ class ProxyApiAuthError(ProxyApiError):
     pass
 
 
+class ProxyApiUnavailable(ProxyApiError):
+    """Proxy API could not be reached."""
+
+
+class ProxyApiTimeout(ProxyApiError):
+    """The request budget ran out before the Proxy API answered."""
+
+
+# Goods counted as coffee packages (PACKAGES_KG): packed coffee by weight and Caotina packages.
+# Must stay identical to PACKAGE_GOODS_FILTER in web/backend/app/proxy_client.py
+PACKAGE_GOODS_FILTER = """(
+                    (
+                        (G.NAME LIKE '%250 g%' OR G.NAME LIKE '%250г%' OR
+                         G.NAME LIKE '%500 g%' OR G.NAME LIKE '%500г%' OR
+                         G.NAME LIKE '%1 kg%' OR G.NAME LIKE '%1кг%' OR
+                         G.NAME LIKE '%200 g%' OR G.NAME LIKE '%200г%' OR
+                         G.NAME LIKE '%125 g%' OR G.NAME LIKE '%125г%' OR
+                         G.NAME LIKE '%80 g%' OR G.NAME LIKE '%80г%' OR
+                         G.NAME LIKE '%0.25%' OR G.NAME LIKE '%0.5%' OR
+                         G.NAME LIKE '%0.2%' OR G.NAME LIKE '%0.125%' OR
+                         G.NAME LIKE '%0.08%')
+                        AND (G.NAME LIKE '%Coffee%' OR G.NAME LIKE '%кофе%' OR G.NAME LIKE '%Кофе%' OR G.NAME LIKE '%Blaser%')
+                    )
+                    OR (GG.NAME LIKE '%Caotina swiss chocolate drink (package)%')
+              )"""
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class _LatencyWindow:
+    """Latencies of the most recent successful calls, per statement kind."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=size))
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[kind].append(seconds)
+
+    def quantile(self, kind: str, q: float) -> Optional[float]:
+        """The ``q`` quantile for ``kind``; None until enough calls were seen."""
+        with self._lock:
+            samples = self._samples.get(kind)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _WarmValue(Generic[T]):
+    """A value loaded once and refreshed in the background once older than ``ttl``.
+
+    Callers get the cached value immediately, stale or not; only the very
+    first access waits for the load. A failed refresh keeps the old value
+    and is retried on a later access.
+    """
+
+    def __init__(self, load: Callable[[], T], ttl: float) -> None:
+        self._load = load
+        self.ttl = ttl
+        self._value: Optional[T] = None
+        self._loaded_at: Optional[float] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._cold_lock = threading.Lock()
+
+    def get(self, executor: Executor) -> T:
+        with self._lock:
+            loaded_at, value = self._loaded_at, self._value
+            if loaded_at is not None and time.monotonic() - loaded_at >= self.ttl and not self._refreshing:
+                self._refreshing = True
+                executor.submit(self._refresh)
+        if loaded_at is not None:
+            return value  # type: ignore[return-value]
+        # Cold: one thread loads, concurrent callers wait for its result
+        with self._cold_lock:
+            if self._loaded_at is None:
+                self._store(self._load())
+            return self._value  # type: ignore[return-value]
+
+    def _store(self, value: T) -> None:
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.monotonic()
+
+    def _refresh(self) -> None:
+        try:
+            self._store(self._load())
+        except Exception as exc:  # noqa: BLE001 - keep serving the previous value
+            logger.warning("Background refresh failed: %s", exc)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+
 class ProxyApiClient:
     def __init__(
         self,
@@ -25,6 +148,16 @@ class ProxyApiClient:
         primary_token: str,
         fallback_token: Optional[str] = None,
         timeout: int = 30,
+        max_workers: int = 8,
+        pool_maxsize: Optional[int] = None,
+        schema_ttl: float = 3600.0,
+        stores_ttl: float = 300.0,
+        max_retries: int = 3,
+        backoff_factor: float = 1.0,
+        backoff_max: float = 5.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.05,
     ) -> None:
         if not base_url:
             raise ValueError("base_url is required")
@@ -37,14 +170,28 @@ class ProxyApiClient:
             self.tokens.append(fallback_token)
         self._token_index = 0
         self.timeout = timeout
-
-        retry_strategy = Retry(
-            total=3,
-            status_forcelist=[429, 500, 502, 503, 504],
-            backoff_factor=1,
-            allowed_methods=["GET", "POST"],
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Retries are made by ``_send`` rather than urllib3, so that each one
+        # fits into the request deadline
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.latencies = _LatencyWindow()
+
+        # Room for statement threads plus callers issuing requests themselves
+        adapter = HTTPAdapter(max_retries=0, pool_maxsize=pool_maxsize or max_workers * 2)
+        # Independent statements of one call (e.g. cups and packages) run in parallel
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="proxy-api")
+        # Attempts of hedged calls; separate so that a statement thread waiting
+        # on its attempts never starves them
+        self._hedge_executor = ThreadPoolExecutor(max_workers=max_workers * 2, thread_name_prefix="proxy-api-hedge")
+
+        # Schema discovery and the store list change rarely: served from memory,
+        # refreshed in the background
+        self._tables = _WarmValue(self._load_tables, schema_ttl)
+        self._stores = _WarmValue(self._load_stores, stores_ttl)
 
         self.session = requests.Session()
         self.session.mount("http://", adapter)
@@ -62,27 +209,133 @@ class ProxyApiClient:
         return True
 
     def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._hedge_executor.shutdown(wait=False, cancel_futures=True)
         self.session.close()
 
-    def _request(self, method: str, path: str, *, json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        url = f"{self.base_url}{path}"
+    def _attempt_timeout(self) -> float:
+        """Timeout for the next attempt: the client timeout capped by the request budget."""
+        left = deadline.remaining()
+        if left is None:
+            return float(self.timeout)
+        if left <= 0:
+            raise ProxyApiTimeout("Request budget exhausted before calling Proxy API")
+        return min(float(self.timeout), left)
+
+    def _backoff(self, retry: int, retry_after: Optional[str] = None) -> bool:
+        """Sleep before retry number ``retry``; False when the budget does not allow it."""
+        delay = _parse_retry_after(retry_after)
+        if delay is None:
+            # Full jitter: spreads retries of concurrent requests apart
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** retry)))
+        left = deadline.remaining()
+        if left is not None and delay >= left:
+            return False
+        time.sleep(delay)
+        return True
 
-        for attempt in range(len(self.tokens)):
-            headers = {"Authorization": f"Bearer {self.current_token}"}
-            response: Response = self.session.request(
-                method=method,
-                url=url,
-                json=json,
-                headers=headers,
-                timeout=self.timeout,
-            )
+    def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None,
+        kind: str = "other",
+    ) -> Dict[str, Any]:
+        if idempotent is None:
+            idempotent = method == "GET"
+        started = time.monotonic()
+        if idempotent and self.hedge:
+            payload = self._hedged_send(method, path, json, kind)
+        else:
+            payload = self._send(method, path, json, idempotent)
+        self.latencies.observe(kind, time.monotonic() - started)
+        return payload
+
+    def _hedge_delay(self, kind: str) -> Optional[float]:
+        latency = self.latencies.quantile(kind, self.hedge_quantile)
+        if latency is None:
+            return None
+        return max(self.hedge_min_delay, latency)
+
+    def _hedged_send(self, method: str, path: str, json: Optional[Dict[str, Any]], kind: str) -> Dict[str, Any]:
+        """``_send`` of an idempotent call, duplicated once if it outlives the hedge delay.
+
+        The delay is the p95 latency of recent calls of the same kind, so only
+        the slowest few percent get a second attempt. The first answer wins;
+        the other attempt cannot be interrupted and finishes within the same
+        deadline, its result discarded.
+        """
+        delay = self._hedge_delay(kind)
+        left = deadline.remaining()
+        if delay is None or (left is not None and left <= delay):
+            return self._send(method, path, json, True)
+
+        primary = deadline.submit(self._hedge_executor, self._send, method, path, json, True)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        logger.debug("Hedging %s call after %.3fs", kind, delay)
+        pending: Set[Future] = {primary, deadline.submit(self._hedge_executor, self._send, method, path, json, True)}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = error or future.exception()
+        assert error is not None
+        raise error
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        json: Optional[Dict[str, Any]],
+        idempotent: bool,
+    ) -> Dict[str, Any]:
+        url = f"{self.base_url}{path}"
+        auth_failures = 0
+        retries = 0
 
-            if response.status_code == 401 and self._switch_token():
-                continue
+        while True:
+            timeout = self._attempt_timeout()
+            # The upstream may drop work nobody waits for once this runs out
+            headers = {"Authorization": f"Bearer {self.current_token}", "X-Request-Timeout": f"{timeout:.3f}"}
+            try:
+                response: Response = self.session.request(
+                    method=method,
+                    url=url,
+                    json=json,
+                    headers=headers,
+                    timeout=timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if idempotent and retries < self.max_retries and self._backoff(retries):
+                    retries += 1
+                    continue
+                if isinstance(exc, requests.Timeout):
+                    raise ProxyApiTimeout(f"Proxy API did not answer in time: {exc!r}") from exc
+                raise ProxyApiUnavailable(f"Proxy API is unavailable: {exc!r}") from exc
 
             if response.status_code == 401:
+                auth_failures += 1
+                if auth_failures < len(self.tokens) and self._switch_token():
+                    continue
                 raise ProxyApiAuthError("Authentication with Proxy API failed")
 
+            if (
+                response.status_code in RETRY_STATUSES
+                and idempotent
+                and retries < self.max_retries
+                and self._backoff(retries, response.headers.get("Retry-After"))
+            ):
+                retries += 1
+                continue
+
             if response.status_code >= 400:
                 try:
                     payload = response.json()
@@ -95,57 +348,75 @@ class ProxyApiClient:
             except ValueError as exc:
                 raise ProxyApiError("Invalid JSON response from Proxy API") from exc
 
-        raise ProxyApiAuthError("All tokens failed")
-
     # Public methods -----------------------------------------------------
     def health(self) -> Dict[str, Any]:
-        return self._request("GET", "/api/health")
+        return self._request("GET", "/api/health", kind="health")
+
+    def get_tables(self) -> Set[str]:
+        return self._tables.get(self._executor)
+
+    def has_table(self, name: str) -> bool:
+        return name.upper() in self.get_tables()
+
+    def _load_tables(self) -> Set[str]:
+        payload = self._request("GET", "/api/tables", kind="tables")
+        return {str(table).upper() for table in payload.get("tables", [])}
 
     def get_stores(self) -> List[Dict[str, Any]]:
-        payload = self._request("GET", "/api/tables")
-        tables = payload.get("tables", [])
-        if "STORGRP" not in tables:
+        return self._stores.get(self._executor)
+
+    def _load_stores(self) -> List[Dict[str, Any]]:
+        if not self.has_table("STORGRP"):
             return []
-        query = "SELECT ID, NAME FROM STORGRP ORDER BY NAME"
-        return self.execute_query(query)
+        return self.execute_query("SELECT ID, NAME FROM STORGRP ORDER BY NAME", kind="stores")
 
-    def execute_query(self, query: str, params: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+    def execute_query(
+        self, query: str, params: Optional[Sequence[Any]] = None, kind: str = "query"
+    ) -> List[Dict[str, Any]]:
         body: Dict[str, Any] = {"query": query}
         if params is not None:
             body["params"] = list(params)
-        payload = self._request("POST", "/api/query", json=body)
+        # Read-only statements can be repeated safely
+        idempotent = query.lstrip().upper().startswith("SELECT")
+        payload = self._request("POST", "/api/query", json=body, idempotent=idempotent, kind=kind)
         if not payload.get("success"):
             raise ProxyApiError(payload.get("error", "Unknown query error"))
         return payload.get("data", [])
 
     def get_sales(
         self,
-        store_ids: Sequence[int],
+        store_ids: Optional[Sequence[int]],
         start_date: str,
         end_date: str,
     ) -> List[Dict[str, Any]]:
-        if not store_ids:
+        """Daily sales per store; ``store_ids=None`` means all stores."""
+        if store_ids is None:
+            store_filter = ""
+            params: List[Any] = [start_date, end_date]
+        elif not store_ids:
             return []
-        placeholders = ",".join(["?"] * len(store_ids))
-        params = list(store_ids) + [start_date, end_date]
+        else:
+            store_filter = f"D.STORGRPID IN ({','.join(['?'] * len(store_ids))}) AND "
+            params = list(store_ids) + [start_date, end_date]
 
         cups_query = f"""
             SELECT 
+                D.STORGRPID AS STORE_ID,
                 stgp.NAME AS STORE_NAME,
                 D.DAT_ AS ORDER_DATE,
                 COUNT(*) AS ALLCUP,
                 SUM(D.SUMMA) AS TOTAL_CASH
             FROM STORZAKAZDT D
             JOIN STORGRP stgp ON D.STORGRPID = stgp.ID
-            WHERE D.STORGRPID IN ({placeholders})
-              AND D.CSDTKTHBID IN ('1', '2', '3', '5')
+            WHERE {store_filter}D.CSDTKTHBID IN ('1', '2', '3', '5')
               AND D.DAT_ >= ? AND D.DAT_ <= ?
-            GROUP BY stgp.NAME, D.DAT_
-            ORDER BY stgp.NAME, D.DAT_
+            GROUP BY D.STORGRPID, stgp.NAME, D.DAT_
+            ORDER BY stgp.NAME, D.STORGRPID, D.DAT_
         """
 
         packages_query = f"""
             SELECT
+                D.STORGRPID AS STORE_ID,
                 stgp.NAME AS STORE_NAME,
                 D.DAT_ AS ORDER_DATE,
                 SUM(GD.SOURCE) AS PACKAGES_KG
@@ -154,35 +425,24 @@ class ProxyApiClient:
             JOIN GOODS G ON GD.GODSId = G.ID
             JOIN STORGRP stgp ON D.STORGRPID = stgp.ID
             LEFT JOIN GOODSGROUPS GG ON G.OWNER = GG.ID
-            WHERE D.STORGRPID IN ({placeholders})
-              AND D.CSDTKTHBID IN ('1', '2', '3', '5')
-              AND D.DAT_ >= ? AND D.DАТ_ <= ?
-              AND (
-                    (
-                        (G.NAME LIKE '%250 g%' OR G.NAME LIKE '%250г%' OR
-                         G.NAME LIKE '%500 g%' OR G.NAME LIKE '%500г%' OR
-                         G.NAME LIKE '%1 kg%' OR G.NAME LIKE '%1кг%' OR
-                         G.NAME LIKE '%200 g%' OR G.NAME LIKE '%200г%' OR
-                         G.NAME LIKE '%125 g%' OR G.NAME LIKE '%125г%' OR
-                         G.NAME LIKE '%80 g%' OR G.NAME LIKE '%80г%' OR
-                         G.NAME LIKE '%0.25%' OR G.NAME LIKE '%0.5%' OR
-                         G.NAME LIKE '%0.2%' OR G.NAME LIKE '%0.125%' OR
-                         G.NAME LIKE '%0.08%')
-                        AND (G.NAME LIKE '%Coffee%' OR G.NAME LIKE '%кофе%' OR G.NAME LIKE '%Кофе%' OR G.NAME LIKE '%Blaser%')
-                    )
-                    OR (GG.NAME LIKE '%Caotina swiss chocolate drink (package)%')
-              )
-            GROUP BY stgp.NAME, D.ДАТ_
-            ORDER BY stgp.NAME, D.ДАТ_
+            WHERE {store_filter}D.CSDTKTHBID IN ('1', '2', '3', '5')
+              AND D.DAT_ >= ? AND D.DAT_ <= ?
+              AND {PACKAGE_GOODS_FILTER}
+            GROUP BY D.STORGRPID, stgp.NAME, D.DAT_
+            ORDER BY stgp.NAME, D.STORGRPID, D.DAT_
         """
 
-        cups = self.execute_query(cups_query, params=params)
-        packages = self.execute_query(packages_query, params=params)
+        cups_future = deadline.submit(self._executor, self.execute_query, cups_query, params, kind="cups")
+        packages_future = deadline.submit(self._executor, self.execute_query, packages_query, params, kind="packages")
+        cups = cups_future.result()
+        packages = packages_future.result()
 
+        # Store names are not unique, rows are matched by store ID
         merged: Dict[tuple[str, str], Dict[str, Any]] = {}
         for row in cups:
-            key = (str(row.get("STORE_NAME")), str(row.get("ORDER_DATE")))
+            key = (str(row.get("STORE_ID")), str(row.get("ORDER_DATE")))
             merged[key] = {
+                "STORE_ID": row.get("STORE_ID"),
                 "STORE_NAME": row.get("STORE_NAME"),
                 "ORDER_DATE": row.get("ORDER_DATE"),
                 "ALLCUP": row.get("ALLCUP", 0) or 0,
@@ -191,10 +451,11 @@ class ProxyApiClient:
             }
 
         for row in packages:
-            key = (str(row.get("STORE_NAME")), str(row.get("ORDER_DATE")))
+            key = (str(row.get("STORE_ID")), str(row.get("ORDER_DATE")))
             merged.setdefault(
                 key,
                 {
+                    "STORE_ID": row.get("STORE_ID"),
                     "STORE_NAME": row.get("STORE_NAME"),
                     "ORDER_DATE": row.get("ORDER_DATE"),
                     "ALLCUP": 0,
@@ -0,0 +1,99 @@
+"""Micro-benchmark of the /sales data path: row dicts vs columnar arrays.
+
+Both paths start from the same synthetic upstream payload and produce the
+totals, per-store sums and one sorted page of rows:
+
+- rows: ``build_table_rows`` + ``aggregate_sales`` + ``group_sales_by_store``
+  + sorting every row dict by the page sort key;
+- columnar: ``SalesColumns.from_records`` + ``totals``/``by_store`` +
+  ``SortedRows`` (NumPy lexsort) materializing only the visible page.
+
+Usage (from webapp):
+    python scripts/benchmark_analytics.py [--rows 100000] [--repeat 5] [--limit 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.analytics import aggregate_sales, build_table_rows, group_sales_by_store  # noqa: E402
+from services.columnar import SORTS, SalesColumns  # noqa: E402
+from services.pagination import SortedRows  # noqa: E402
+
+# The sort keys the table used before the columnar path
+ROW_SORT_KEYS: Dict[str, Callable[[Dict[str, Any]], tuple]] = {
+    "date": lambda r: (-r["order_date"].toordinal(), r["store_name"]),
+    "store": lambda r: (r["store_name"], r["order_date"].toordinal()),
+    "sum": lambda r: (-r["total_cash"], r["store_name"], r["order_date"].toordinal()),
+}
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    stores = 40
+    first_day = date(2025, 1, 1)
+    return [
+        {
+            "STORE_NAME": f"Store {index % stores:02d}",
+            "ORDER_DATE": (first_day + timedelta(days=index // stores)).isoformat(),
+            "ALLCUP": index % 300,
+            "PACKAGES_KG": (index % 17) * 0.25,
+            "TOTAL_CASH": (index % 5000) * 1.5,
+        }
+        for index in range(count)
+    ]
+
+
+def rows_path(records: List[Dict[str, Any]], sort: str, limit: int) -> List[Dict[str, Any]]:
+    rows = build_table_rows(records)
+    aggregate_sales(records)
+    group_sales_by_store(records)
+    return sorted(rows, key=ROW_SORT_KEYS[sort])[:limit]
+
+
+def columnar_path(records: List[Dict[str, Any]], sort: str, limit: int) -> List[Dict[str, Any]]:
+    columns = SalesColumns.from_records(records)
+    columns.totals()
+    columns.by_store()
+    return SortedRows(columns, sort).page(None, limit)["rows"]
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    records = make_rows(args.rows)
+    print(f"{args.rows} rows, page of {args.limit}, best of {args.repeat}")
+    print(f"{'sort':>6} {'rows, ms':>10} {'columnar, ms':>13} {'speedup':>8}")
+    for sort in SORTS:
+        expected = rows_path(records, sort, args.limit)
+        actual = columnar_path(records, sort, args.limit)
+        assert [(r["store_name"], r["order_date"]) for r in expected] == [
+            (r["store_name"], r["order_date"]) for r in actual
+        ], f"orders differ for sort={sort}"
+
+        rows_time = measure(lambda: rows_path(records, sort, args.limit), args.repeat)
+        columnar_time = measure(lambda: columnar_path(records, sort, args.limit), args.repeat)
+        print(f"{sort:>6} {rows_time * 1000:>10.1f} {columnar_time * 1000:>13.1f} {rows_time / columnar_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
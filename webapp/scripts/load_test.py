@@ -0,0 +1,159 @@
+"""Throughput of the webapp under gunicorn for different worker counts.
+
+Starts a stub Proxy API (fixed latency, synthetic sales) and, for each
+worker count, a gunicorn server on top of it; then drives ``/sales`` with
+concurrent clients for a fixed time and reports requests/second. The page
+cache is disabled unless ``--page-cache`` is given, so every request
+renders and waits on the upstream.
+
+Usage (from webapp):
+    python scripts/load_test.py [--workers 1 2 4] [--threads 4] [--clients 32] [--seconds 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import requests
+
+WEBAPP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WEBAPP_DIR)
+
+from scripts.benchmark_analytics import make_rows  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_upstream(rows: int, latency: float) -> ThreadingHTTPServer:
+    sales = json.dumps({"success": True, "data": make_rows(rows)}).encode()
+    stores = json.dumps({"success": True, "data": [{"ID": 1, "NAME": "Store 01"}]}).encode()
+    tables = json.dumps({"tables": ["STORGRP"]}).encode()
+    health = json.dumps({"proxy_api": {"database_connected": True}}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, body: bytes) -> None:
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802
+            self._reply(tables if self.path == "/api/tables" else health)
+
+        def do_POST(self) -> None:  # noqa: N802
+            query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["query"]
+            self._reply(stores if "FROM STORGRP ORDER BY" in query else sales)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", _free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_webapp(upstream: str, workers: int, threads: int, page_cache: bool) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "load-test"),
+        "PROXY_API_URL": upstream,
+        "PROXY_PRIMARY_TOKEN": "load-test",
+        "PORT": str(port),
+        "WEB_WORKERS": str(workers),
+        "WEB_THREADS": str(threads),
+        "LOG_LEVEL": "warning",
+        "ACCESS_LOG": "",
+    }
+    if not page_cache:
+        env["PAGE_CACHE_TODAY_TTL"] = env["PAGE_CACHE_HISTORY_TTL"] = "0"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=WEBAPP_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            requests.get(f"{base_url}/sales", timeout=5)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def drive(base_url: str, clients: int, seconds: float) -> tuple[int, List[float]]:
+    stop_at = time.monotonic() + seconds
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def client(index: int) -> None:
+        session = requests.Session()
+        page = 0
+        while time.monotonic() < stop_at:
+            # Different sorts and page sizes so requests are not identical
+            sort = ("date", "store", "sum")[(index + page) % 3]
+            started = time.perf_counter()
+            response = session.get(f"{base_url}/sales", params={"sort": sort, "limit": 100 + page % 5}, timeout=60)
+            elapsed = time.perf_counter() - started
+            response.raise_for_status()
+            with lock:
+                latencies.append(elapsed)
+            page += 1
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    return len(latencies), sorted(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=2000, help="sales rows returned by the stub upstream")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub upstream latency, seconds")
+    parser.add_argument("--page-cache", action="store_true")
+    args = parser.parse_args()
+
+    upstream = start_stub_upstream(args.rows, args.latency)
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+    print(f"{args.clients} clients, {args.threads} threads/worker, {args.seconds:g}s per run, cpus={os.cpu_count()}")
+    print(f"{'workers':>7} {'req/s':>8} {'p50, ms':>8} {'p95, ms':>8}")
+    for workers in args.workers:
+        process, base_url = start_webapp(upstream_url, workers, args.threads, args.page_cache)
+        try:
+            count, latencies = drive(base_url, args.clients, args.seconds)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0.0
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0
+        print(f"{workers:>7} {count / args.seconds:>8.1f} {p50:>8.1f} {p95:>8.1f}")
+    upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Columnar (NumPy) view of Proxy API sales rows.
+
+The upstream payload is converted once into typed arrays; totals, per-store
+sums and the table sort orders are computed on the arrays. Row dicts in the
+``build_table_rows`` shape are only built for the rows that are displayed.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+SORTS = ("date", "store", "sum")
+
+
+def _floats(values: List[Any]) -> np.ndarray:
+    # None and missing values become 0, numeric strings are parsed
+    return np.nan_to_num(np.array(values, dtype=np.float64), nan=0.0)
+
+
+def _encode(values: Iterable[Any], count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted distinct values and, per item, its index among them."""
+    codes: Dict[Any, int] = {}
+    first_seen = np.fromiter(
+        (codes.setdefault(value, len(codes)) for value in values), dtype=np.intp, count=count
+    )
+    distinct = np.empty(len(codes), dtype=object)
+    distinct[:] = list(codes)
+    rank = np.argsort(distinct, kind="stable")
+    remap = np.empty(len(rank), dtype=np.intp)
+    remap[rank] = np.arange(len(rank))
+    return distinct[rank], remap[first_seen]
+
+
+class SalesColumns:
+    """Sales rows as parallel arrays.
+
+    ``store_code`` indexes ``store_names``, which is sorted, so ordering by
+    code is ordering by store name. Names are not unique; ``store_id`` tells
+    same-named stores apart. Dates are kept as epoch seconds.
+    """
+
+    def __init__(
+        self,
+        store_names: np.ndarray,
+        store_code: np.ndarray,
+        store_id: np.ndarray,
+        order_date: np.ndarray,
+        allcup: np.ndarray,
+        packages_kg: np.ndarray,
+        total_cash: np.ndarray,
+    ) -> None:
+        self.store_names = store_names
+        self.store_code = store_code
+        self.store_id = store_id
+        self.order_date = order_date
+        self.allcup = allcup
+        self.packages_kg = packages_kg
+        self.total_cash = total_cash
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "SalesColumns":
+        count = len(records)
+        store_names, store_code = _encode(
+            (row.get("STORE_NAME", "") for row in records), count
+        )
+        # Each distinct date string is parsed once
+        day_strings, day_code = _encode((str(row.get("ORDER_DATE")) for row in records), count)
+        day_seconds = np.array(list(day_strings), dtype="datetime64[s]").astype(np.int64)
+        return cls(
+            store_names=store_names,
+            store_code=store_code,
+            store_id=np.fromiter(
+                (int(row.get("STORE_ID") or 0) for row in records), dtype=np.int64, count=count
+            ),
+            order_date=day_seconds[day_code],
+            allcup=_floats([row.get("ALLCUP") for row in records]),
+            packages_kg=_floats([row.get("PACKAGES_KG") for row in records]),
+            total_cash=_floats([row.get("TOTAL_CASH") for row in records]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.store_code)
+
+    # Aggregates ---------------------------------------------------------
+    def totals(self) -> Dict[str, float]:
+        """Same keys as ``aggregate_sales``."""
+        return {
+            "total_sales": float(self.total_cash.sum()),
+            "total_cups": float(self.allcup.sum()),
+            "total_packages": float(self.packages_kg.sum()),
+        }
+
+    def by_store(self) -> Dict[str, Dict[str, float]]:
+        """Totals per store name."""
+        size = len(self.store_names)
+        sums = {
+            "total_sales": np.bincount(self.store_code, weights=self.total_cash, minlength=size),
+            "total_cups": np.bincount(self.store_code, weights=self.allcup, minlength=size),
+            "total_packages": np.bincount(self.store_code, weights=self.packages_kg, minlength=size),
+        }
+        return {
+            str(name): {key: float(values[code]) for key, values in sums.items()}
+            for code, name in enumerate(self.store_names)
+        }
+
+    # Ordering -----------------------------------------------------------
+    def order(self, sort: str) -> np.ndarray:
+        """Row indices for a table sort; the last keys make the order total.
+
+        - ``date``: newest first, then store name and ID
+        - ``store``: store name and ID, then oldest first
+        - ``sum``: largest total first, then store name, date and store ID
+        """
+        if sort == "date":
+            return np.lexsort((self.store_id, self.store_code, -self.order_date))
+        if sort == "store":
+            return np.lexsort((self.order_date, self.store_id, self.store_code))
+        if sort == "sum":
+            return np.lexsort((self.store_id, self.order_date, self.store_code, -self.total_cash))
+        raise ValueError(f"Unknown sort: {sort}")
+
+    def sort_key(self, sort: str, index: int) -> Tuple:
+        """Comparable key of one row, consistent with ``order(sort)``."""
+        store = str(self.store_names[self.store_code[index]]) if len(self.store_names) else ""
+        store_id = int(self.store_id[index])
+        seconds = int(self.order_date[index])
+        if sort == "date":
+            return (-seconds, store, store_id)
+        if sort == "store":
+            return (store, store_id, seconds)
+        return (-float(self.total_cash[index]), store, seconds, store_id)
+
+    # Materialization ----------------------------------------------------
+    def row(self, index: int) -> Dict[str, Any]:
+        return {
+            "store_name": self.store_names[self.store_code[index]],
+            "order_date": np.datetime64(int(self.order_date[index]), "s").astype(datetime),
+            "allcup": float(self.allcup[index]),
+            "packages_kg": float(self.packages_kg[index]),
+            "total_cash": float(self.total_cash[index]),
+        }
+
+    def rows(self, indices: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.row(int(index)) for index in indices]
@@ -0,0 +1,130 @@
+"""Downsampling of long sales ranges for the chart and the period table.
+
+The chart gets Largest-Triangle-Three-Buckets (LTTB) over the daily totals,
+which keeps peaks and dips that averaging would flatten. The period table is
+coarsened to weeks or months once the range has too many days.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .columnar import SalesColumns
+
+GRANULARITIES = ("day", "week", "month")
+DAY_SECONDS = 86400
+MEASURES = {"total_sales": "total_cash", "total_cups": "allcup", "total_packages": "packages_kg"}
+
+
+def period_count(start: date, end: date, granularity: str) -> int:
+    if granularity == "day":
+        return (end - start).days + 1
+    if granularity == "week":
+        return (end.toordinal() - end.weekday() - (start.toordinal() - start.weekday())) // 7 + 1
+    if granularity == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def auto_granularity(start: date, end: date, max_periods: int) -> str:
+    """Finest granularity with at most ``max_periods`` periods; month otherwise."""
+    for granularity in GRANULARITIES:
+        if period_count(start, end, granularity) <= max_periods:
+            return granularity
+    return GRANULARITIES[-1]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the ``threshold`` points of (x, y) kept by LTTB.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the point kept
+    from the previous bucket and the mean of the next one.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # threshold - 2 non-empty buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        # Twice the triangle area; the factor does not change the argmax
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def period_totals(columns: SalesColumns, granularity: str) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Sorted period starts (``datetime64[D]``) and every measure summed per period."""
+    days = (columns.order_date // DAY_SECONDS).astype("datetime64[D]")
+    if granularity == "day":
+        starts = days
+    elif granularity == "week":
+        # 1970-01-01 was a Thursday: shift every day back to its Monday
+        starts = days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    elif granularity == "month":
+        starts = days.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    periods, index = np.unique(starts, return_inverse=True)
+    sums = {
+        key: np.bincount(index, weights=getattr(columns, measure), minlength=len(periods))
+        for key, measure in MEASURES.items()
+    }
+    return periods, sums
+
+
+def period_rows(columns: SalesColumns, start: date, end: date, max_rows: int) -> Dict[str, Any]:
+    """Totals per period, coarsened so the table has at most ``max_rows`` rows."""
+    granularity = auto_granularity(start, end, max_rows)
+    periods, sums = period_totals(columns, granularity)
+    rows = [
+        {"period": period, **{key: float(values[index]) for key, values in sums.items()}}
+        for index, period in enumerate(periods.astype(object))
+    ]
+    return {"granularity": granularity, "rows": rows}
+
+
+def sales_chart(
+    columns: SalesColumns, max_points: int, width: int = 800, height: int = 200
+) -> Optional[Dict[str, Any]]:
+    """Daily sales sum as SVG polyline points, reduced to ``max_points`` by LTTB."""
+    periods, sums = period_totals(columns, "day")
+    if len(periods) < 2:
+        return None
+    x = periods.astype(np.int64)
+    y = sums["total_sales"]
+    kept = lttb(x, y, max_points)
+    x, y = x[kept], y[kept]
+
+    low, high = min(float(y.min()), 0.0), float(y.max())
+    scale_y = height / (high - low) if high > low else 0.0
+    # SVG y grows downwards
+    px = (x - x[0]) * (width / (x[-1] - x[0]))
+    py = height - (y - low) * scale_y
+    return {
+        "points": " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(px, py)),
+        "width": width,
+        "height": height,
+        "max": high,
+        "start": periods[0].astype(object),
+        "end": periods[-1].astype(object),
+        "shown": int(len(kept)),
+        "days": int(len(periods)),
+    }
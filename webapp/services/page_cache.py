@@ -0,0 +1,68 @@
+"""Cache of rendered pages with validators for conditional GET."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Hashable, Optional
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    body: str
+    etag: str
+    last_modified: datetime
+    expires: float
+
+
+class PageCache:
+    """Thread-safe LRU of rendered HTML keyed by normalized filters.
+
+    Pages whose range reaches today expire after ``today_ttl`` seconds;
+    closed historical ranges only change on backfills and live for
+    ``history_ttl``.
+    """
+
+    def __init__(self, max_entries: int = 256, today_ttl: float = 60.0, history_ttl: float = 3600.0) -> None:
+        self.max_entries = max_entries
+        self.today_ttl = today_ttl
+        self.history_ttl = history_ttl
+        self._entries: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl_for(self, end_date: date, today: Optional[date] = None) -> float:
+        today = today or datetime.utcnow().date()
+        return self.today_ttl if end_date >= today else self.history_ttl
+
+    def get(self, key: Hashable) -> Optional[CachedPage]:
+        now = time.monotonic()
+        with self._lock:
+            page = self._entries.get(key)
+            # Expired pages stay until evicted so a re-render can compare against them
+            if page is None or page.expires <= now:
+                return None
+            self._entries.move_to_end(key)
+            return page
+
+    def put(self, key: Hashable, body: str, ttl: float) -> CachedPage:
+        etag = hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+        # HTTP dates have second precision
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        with self._lock:
+            previous = self._entries.get(key)
+            # An unchanged re-render keeps its Last-Modified
+            last_modified = previous.last_modified if previous is not None and previous.etag == etag else now
+            page = CachedPage(body, etag, last_modified, time.monotonic() + ttl)
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return page
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()